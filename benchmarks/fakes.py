@@ -0,0 +1,38 @@
+# benchmarks/fakes.py
+from types import SimpleNamespace
+
+CANNED_ANALYSIS = (
+    "1. Bullish Engulfing at the latest candle (Confidence: Medium)\n"
+    "Ideal Buy Zone $100 - $102, Stop Loss: $97, Take profit: $108\n"
+    "Risk-reward ratio 1:2"
+)
+
+
+class FakeLLMClient:
+    """Offline stand-in for the OpenAI client that answers instantly with canned text"""
+
+    def __init__(self, content=CANNED_ANALYSIS):
+        self.content = content
+        self.calls = 0
+        self.last_messages = None
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, temperature=None, stream=False, **kwargs):
+        self.calls += 1
+        self.last_messages = messages
+        if stream:
+            return self._stream()
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_chars // 4,
+                completion_tokens=len(self.content) // 4,
+                total_tokens=(prompt_chars + len(self.content)) // 4,
+            ),
+        )
+
+    def _stream(self):
+        # Word-sized chunks shaped like the OpenAI streaming API's deltas
+        for word in self.content.split(" "):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
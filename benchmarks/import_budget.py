@@ -0,0 +1,109 @@
+# benchmarks/import_budget.py
+"""Import-time budget for the app's entry modules
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 100
+
+Each module is imported in a fresh interpreter, so nothing is already
+cached in `sys.modules`. Times are measured beyond a plain `import pandas`,
+which every entry point needs and which dominates on its own. Exits with
+status 1 when a module goes over its budget or loads one of the heavy
+dependencies (yfinance, matplotlib, openai, ...) that should wait for first use.
+Entry modules that cannot be imported in this tree are listed as unmeasured.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from utils.startup import HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds each module may add on top of pandas
+BUDGETS = {
+    "cli": 20,
+    "utils.data_fetcher": 50,
+    "utils.indicators": 50,
+    "utils.analysis": 50,
+    "utils.llm_cache": 50,
+    "utils.llm_service": 50,
+    "utils.visualization": 50,
+    "utils.report_generator": 50,
+    "utils.live": 75,
+    "utils.batch": 50,
+    "utils.pipeline": 75,
+}
+
+# Entry modules with no budget yet, and why they are not measured
+UNMEASURED = {
+    "main": "imports utils.initialize_client and utils.analysis.calculate_sentiment_analysis, "
+            "which this tree does not have (the utils it does import are budgeted above)",
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import pandas
+baseline = time.perf_counter() - started
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+heavy = sorted({{name.split(".")[0] for name in {heavy!r}}} & set(sys.modules))
+print(json.dumps({{"baseline": baseline, "seconds": seconds, "heavy": heavy}}))
+"""
+
+
+def probe(module):
+    """Import `module` in a new interpreter; returns its seconds beyond pandas and heavy modules loaded"""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(module, repeat):
+    runs = [probe(module) for _ in range(repeat)]
+    return {
+        "ms": statistics.median(run["seconds"] for run in runs) * 1000,
+        "pandas_ms": statistics.median(run["baseline"] for run in runs) * 1000,
+        "heavy": sorted(set().union(*(run["heavy"] for run in runs))),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check entry-module import times against their budgets.")
+    parser.add_argument("modules", nargs="*", help="Modules to check (default: every budgeted one)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--budget-ms", type=float, help="Use one budget for every module")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<26}{'import ms':>10}{'budget':>8}{'pandas ms':>11}  heavy modules")
+    for module in args.modules or [*BUDGETS, *UNMEASURED]:
+        if module in UNMEASURED:
+            print(f"{module:<26}{'-':>10}{'-':>8}{'-':>11}  unmeasured: {UNMEASURED[module]}")
+            continue
+        budget = args.budget_ms if args.budget_ms is not None else BUDGETS.get(module, 50)
+        result = measure(module, args.repeat)
+        over = result["ms"] > budget
+        if over or result["heavy"]:
+            failures.append(module)
+        flag = "  OVER" if over else ""
+        print(
+            f"{module:<26}{result['ms']:>10.1f}{budget:>8.0f}{result['pandas_ms']:>11.1f}"
+            f"  {', '.join(result['heavy']) or '-'}{flag}"
+        )
+
+    if failures:
+        print(f"\n{len(failures)} module(s) over budget or loading heavy dependencies: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
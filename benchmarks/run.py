@@ -0,0 +1,302 @@
+# benchmarks/run.py
+"""Offline benchmarks for every pipeline stage
+
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --threshold 0.25
+
+Inputs are synthetic OHLCV frames and the LLM client is a local fake, so no
+network access or API key is needed. `--compare` exits with status 1 when
+any case's median is slower than the baseline by more than the threshold.
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fakes import FakeLLMClient
+from benchmarks.synthetic import daily_5y, intraday_7d_5m, make_intraday, make_panel
+
+CASES = {}
+
+
+def case(name, repeat=None):
+    """Register `setup(options) -> callable` as a benchmark case"""
+    def decorator(setup):
+        CASES[name] = (setup, repeat)
+        return setup
+    return decorator
+
+
+def _prepared(frame):
+    from utils.indicators import calculate_technical_indicators
+    return calculate_technical_indicators(frame, cache=False)
+
+
+def _prediction(ticker, df):
+    from utils.pipeline import build_snapshot
+    return build_snapshot(ticker, df)
+
+
+@case("data/resample_5m_to_15m")
+def bench_resample(options):
+    from utils.resample import resample_bars
+    frame = make_intraday(21, "5min")  # The 1mo of 5m bars behind the 5d period
+    return lambda: resample_bars(frame, "15m", "5m")
+
+
+@case("data/replay_15m_from_5m")
+def bench_replay(options):
+    import tempfile
+    from utils.fetch_scheduler import FetchRecorder, FetchScheduler
+    recorder = FetchRecorder(tempfile.mkdtemp(prefix="bench-replay-"))
+    recorder.record("BENCH", "5m", make_intraday(21, "5min"), period="1mo")
+    scheduler = FetchScheduler(source=None, recorder=recorder, mode="replay")
+    return lambda: scheduler.fetch("BENCH", "15m", period="1mo")
+
+
+@case("indicators/daily_5y")
+def bench_indicators_daily(options):
+    from utils.indicators import calculate_technical_indicators
+    frame = daily_5y()
+    return lambda: calculate_technical_indicators(frame, cache=False)
+
+
+@case("indicators/intraday_7d_5m")
+def bench_indicators_intraday(options):
+    from utils.indicators import calculate_technical_indicators
+    frame = intraday_7d_5m()
+    return lambda: calculate_technical_indicators(frame, cache=False)
+
+
+@case("indicators/daily_5y_cached")
+def bench_indicators_cached(options):
+    from utils.indicators import calculate_technical_indicators
+    frame = daily_5y()
+    frame.attrs.update(ticker="BENCH", interval="1d")  # As set by the fetch layer
+    return lambda: calculate_technical_indicators(frame)
+
+
+@case("indicators/panel_vectorized", repeat=3)
+def bench_indicators_panel(options):
+    from utils.vector_indicators import indicator_frames
+    panel = make_panel(options.panel_size)
+    return lambda: indicator_frames(panel, intraday=False)
+
+
+@case("screener/update_panel", repeat=3)
+def bench_screener_update(options):
+    from utils.screener import Screener
+    panel = make_panel(options.panel_size)
+    return lambda: Screener("1y").update(panel)
+
+
+@case("screener/query_panel")
+def bench_screener_query(options):
+    from utils.screener import Screener, below_lower_band, oversold
+    screener = Screener("1y")
+    screener.update(make_panel(options.panel_size))
+    return lambda: screener.query(oversold(35), below_lower_band(), rank_by="RSI", limit=20)
+
+
+@case("analysis/prompt_daily_5y")
+def bench_prompt_daily(options):
+    from utils.analysis import analyze_candlestick_patterns
+    df = _prepared(daily_5y())
+    client = FakeLLMClient()
+    return lambda: analyze_candlestick_patterns(client, df, "5y", cache=False, prescreen=False, shared=False)
+
+
+@case("analysis/prompt_intraday_7d_5m")
+def bench_prompt_intraday(options):
+    from utils.analysis import analyze_candlestick_patterns
+    df = _prepared(intraday_7d_5m())
+    client = FakeLLMClient()
+    return lambda: analyze_candlestick_patterns(client, df, "1d", cache=False, prescreen=False, shared=False)
+
+
+@case("analysis/compare_encodings_daily_5y")
+def bench_compare_encodings(options):
+    from utils.prompt_encoding import compare_encodings
+    df = _prepared(daily_5y())
+    for fmt, payload in compare_encodings(df).items():
+        print(f"  {fmt:<8} {payload.bars:4d} bars {payload.tokens:6d} tokens {payload.build_seconds * 1000:8.2f} ms build")
+    return lambda: compare_encodings(df)
+
+
+@case("analysis/prescreen_daily_5y")
+def bench_prescreen(options):
+    from utils.analysis import prescreen_patterns
+    df = _prepared(daily_5y())
+    return lambda: prescreen_patterns(df)
+
+
+def _live_session(period, bars, feed):
+    """LiveSession over `bars` polling `feed`, whose forming bar's close moves on every poll"""
+    from utils.live import LiveSession
+    tick = iter(range(10**9))
+
+    def source(ticker, interval, period=None, start=None):
+        # The forming bar's close moves on every poll, as it does during a session
+        latest = feed[feed.index >= start].copy()
+        latest.iloc[-1, latest.columns.get_loc("Close")] *= 1 + (next(tick) % 7 - 3) * 1e-4
+        return latest
+
+    session = LiveSession("BENCH", period, source=source).start(bars)
+    update = session.poll()
+    # Only the forming bar is revised, so this times the incremental path
+    assert (update.replaced_bars, update.new_bars) == (1, 0), update
+    return session.poll
+
+
+@case("live/poll_5m")
+def bench_live_poll(options):
+    bars = intraday_7d_5m()
+    bars.attrs.update(ticker="BENCH", interval="5m")
+    return _live_session("1d", bars, bars)
+
+
+@case("live/poll_15m_from_5m")
+def bench_live_poll_derived(options):
+    from utils.resample import resample_bars
+    feed = intraday_7d_5m()
+    bars = resample_bars(feed, "15m", "5m")
+    bars.attrs.update(ticker="BENCH")
+    return _live_session("5d", bars, feed)
+
+
+@case("charts/screen_daily", repeat=3)
+def bench_charts_screen(options):
+    from utils import visualization
+    df = _prepared(daily_5y())
+    prediction = _prediction("BENCH", df)
+
+    return lambda: visualization.render_charts(df, prediction, "1y", dpi=visualization.SCREEN_DPI, cache=False)
+
+
+@case("charts/print_daily", repeat=3)
+def bench_charts_print(options):
+    from utils import visualization
+    df = _prepared(daily_5y())
+    prediction = _prediction("BENCH", df)
+
+    return lambda: visualization.render_charts(df, prediction, "1y", dpi=visualization.PRINT_DPI, cache=False)
+
+
+@case("report/pdf_with_charts", repeat=3)
+def bench_pdf_report(options):
+    from utils.report_generator import generate_pdf_report
+    from utils.visualization import render_charts, PRINT_DPI
+    df = _prepared(daily_5y())
+    prediction = _prediction("BENCH", df)
+    candlestick_img, rsi_img = render_charts(df, prediction, "1y", dpi=PRINT_DPI, cache=False)
+    analysis = FakeLLMClient().content * 20
+    return lambda: generate_pdf_report(prediction, analysis, candlestick_img, rsi_img)
+
+
+@case("report/combined_pdf_10_tickers", repeat=3)
+def bench_combined_report(options):
+    import io
+    from utils.report_generator import write_combined_report
+    from utils.visualization import render_charts, SCREEN_DPI
+    df = _prepared(daily_5y())
+    prediction = _prediction("BENCH", df)
+    candlestick_img, rsi_img = render_charts(df, prediction, "1y", dpi=SCREEN_DPI, cache=False)
+    analysis = FakeLLMClient().content * 20
+    reports = [(dict(prediction, ticker=f"T{i}"), analysis, candlestick_img, rsi_img) for i in range(10)]
+    return lambda: write_combined_report(iter(reports), io.BytesIO())
+
+
+def measure(func, repeat, warmup=1):
+    """Seconds per call over `repeat` runs, after `warmup` untimed calls"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "repeat": repeat,
+    }
+
+
+def environment():
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run_cases(patterns, options):
+    results = {}
+    for name, (setup, repeat) in CASES.items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        func = setup(options)
+        results[name] = measure(func, repeat or options.repeat)
+        print(f"{name:<34} median {results[name]['median'] * 1000:10.2f} ms  min {results[name]['min'] * 1000:10.2f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Cases whose median got slower than `baseline` by more than `threshold` (a fraction)"""
+    regressions = []
+    print(f"\n{'case':<34} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<34} {'-':>12} {current['median'] * 1000:12.2f} {'new':>8}")
+            continue
+        change = current["median"] / previous["median"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<34} {previous['median'] * 1000:12.2f} {current['median'] * 1000:12.2f} {change:+8.1%}{flag}")
+        if change > threshold:
+            regressions.append((name, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline pipeline benchmarks.")
+    parser.add_argument("cases", nargs="*", help="Glob patterns selecting cases (default: all)")
+    parser.add_argument("--list", action="store_true", help="List case names and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--panel-size", type=int, default=1000, help="Tickers in the panel benchmarks")
+    parser.add_argument("--save", metavar="FILE", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    results = run_cases(args.cases, args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
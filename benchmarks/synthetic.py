@@ -0,0 +1,56 @@
+# benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(n_bars, freq="B", start="2020-01-01", price=100.0, volatility=0.02, seed=0, tz=None):
+    """Random-walk OHLCV frame shaped like yfinance's history() output"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=n_bars, freq=freq, tz=tz)
+    returns = rng.normal(0, volatility, n_bars)
+    close = price * np.exp(np.cumsum(returns))
+    open_ = close * np.exp(rng.normal(0, volatility / 2, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, n_bars)))
+    volume = rng.integers(100_000, 5_000_000, n_bars).astype(np.int64)
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Volume": volume,
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+def make_intraday(days=7, freq="5min", seed=0, tz="America/New_York"):
+    """Regular-session bars (09:30-16:00) over `days` business days"""
+    sessions = pd.bdate_range("2024-01-02", periods=days)
+    index = pd.DatetimeIndex(
+        np.concatenate([
+            pd.date_range(f"{day:%Y-%m-%d} 09:30", f"{day:%Y-%m-%d} 15:55", freq=freq, tz=tz)
+            for day in sessions
+        ])
+    )
+    df = make_ohlcv(len(index), seed=seed, volatility=0.002)
+    df.index = index
+    return df
+
+
+def daily_5y(seed=0):
+    """About five years of business-day bars"""
+    return make_ohlcv(1260, seed=seed)
+
+
+def intraday_7d_5m(seed=0):
+    """Seven sessions of 5-minute bars, the window used for the 1d period"""
+    return make_intraday(7, "5min", seed=seed)
+
+
+def make_panel(n_tickers=1000, n_bars=252, seed=0):
+    """Dict of ticker -> daily frame for universe-wide benchmarks"""
+    return {f"T{i:04d}": make_ohlcv(n_bars, seed=seed + i) for i in range(n_tickers)}
@@ -0,0 +1,95 @@
+# cli.py
+import argparse
+import os
+import sys
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate analysis report bundles for every ticker in a watchlist, without Streamlit."
+    )
+    parser.add_argument("watchlist", help="Text file with one ticker per line (# starts a comment)")
+    parser.add_argument("--period", default="1y", choices=["1d", "5d", "1mo", "6mo", "1y", "5y"])
+    parser.add_argument("--out", default="reports", help="Directory for the ZIP bundles and manifest")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--dpi", type=int, default=300, help="Chart resolution")
+    parser.add_argument("--no-resume", action="store_true", help="Redo tickers a previous run already finished")
+    parser.add_argument("--no-progress", action="store_true", help="Hide the progress bar")
+    parser.add_argument("--combined", metavar="PDF", help="Also write one PDF covering every ticker, in watchlist order")
+    parser.add_argument(
+        "--screen",
+        action="append",
+        metavar="NAME",
+        help="Only report tickers passing this screen (repeatable; all must pass): oversold, overbought, "
+        "below-lower-band, above-upper-band, golden-cross, death-cross",
+    )
+    parser.add_argument("--top", type=int, default=20, help="Most tickers a screen passes on to the reports")
+    parser.add_argument(
+        "--timing-log",
+        metavar="PATH",
+        help="Append per-stage timing spans as JSON lines to PATH (or 'stderr'); also set by CMA_TIMING_LOG",
+    )
+    args = parser.parse_args(argv)
+
+    from utils.profiling import TIMING_LOG_ENV, enable_timing_log_from_env
+
+    if args.timing_log:
+        os.environ[TIMING_LOG_ENV] = args.timing_log  # Worker processes inherit it
+    enable_timing_log_from_env()
+
+    from utils.pipeline import run_watchlist, summarize_timings, write_combined_pdf
+
+    with open(args.watchlist, encoding="utf-8") as f:
+        tickers = [line.split("#", 1)[0].strip() for line in f]
+
+    if args.screen:
+        from utils.screener import DEFAULT_SCREENER_DIR, SCREENS, Screener
+
+        unknown = [name for name in args.screen if name not in SCREENS]
+        if unknown:
+            parser.error(f"unknown screen(s): {', '.join(unknown)}")
+        # Rows for tickers whose last bar hasn't changed are reused from the stored table
+        universe = [t for t in tickers if t]
+        screener = Screener(args.period, root=os.environ.get("CMA_SCREENER_DIR", DEFAULT_SCREENER_DIR))
+        _, errors = screener.refresh(universe)
+        for ticker, error in errors.items():
+            print(f"  {ticker}: {error}", file=sys.stderr)
+        matches = screener.screen(*args.screen, limit=args.top, tickers=universe)
+        print(f"Screen {' + '.join(args.screen)}: {len(matches)} of {len(universe)} tickers")
+        print(matches.to_string(columns=["Close", "Change", "RSI", "%B", "Spread"], float_format="{:.3f}".format))
+        tickers = list(matches.index)
+
+    # The API key comes from the environment so it never lands in shell history
+    api_key = os.environ.get("DEEPSEEK_API_KEY")
+    if not api_key:
+        print("DEEPSEEK_API_KEY is not set; reports will skip the AI analysis.", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = run_watchlist(
+        tickers,
+        args.out,
+        period=args.period,
+        api_key=api_key,
+        workers=args.workers,
+        dpi=args.dpi,
+        resume=not args.no_resume,
+        progress=not args.no_progress,
+    )
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r["status"] != "ok"]
+    print(f"\n{len(results) - len(failed)} reports written, {len(failed)} failed in {elapsed:.1f}s")
+    for result in failed:
+        print(f"  {result['ticker']}: {result['error']}")
+    print("Stage timings (seconds):")
+    for stage, stats in summarize_timings(results).items():
+        print(f"  {stage:<11} total {stats['total']:8.2f}  mean {stats['mean']:6.2f}  max {stats['max']:6.2f}")
+    if args.combined:
+        count = write_combined_pdf(args.out, args.combined, tickers)
+        print(f"Combined report for {count} tickers written to {args.combined}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
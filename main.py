@@ -2,12 +2,96 @@
 import streamlit as st
 from utils.data_fetcher import fetch_stock_data
 from utils.indicators import calculate_technical_indicators
-from utils.analysis import analyze_candlestick_patterns, calculate_sentiment_analysis
-from utils.visualization import plot_predictions
-from utils.report_generator import generate_pdf_report
+from utils.analysis import calculate_sentiment_analysis
+from utils.llm_cache import get_default_cache as get_llm_cache
+from utils.llm_service import AnalysisService, stream_analysis
+from utils.visualization import plot_predictions, render_charts, PRINT_DPI, SCREEN_DPI
+from utils.report_generator import build_report_bundle
 from utils.initialize_client import initialize_openai_client
+from utils.profiling import enable_timing_log_from_env, trace
+from utils.live import LiveSession, LIVE_PERIODS
+from utils.startup import preload_heavy_modules
+
+@st.cache_resource
+def warm_up():
+    """Start loading yfinance, matplotlib, openai and the PDF libraries once per server process"""
+    enable_timing_log_from_env()
+    return preload_heavy_modules()
+
+@st.cache_resource
+def get_analysis_service(api_key, _client):
+    """One analysis service per API key, shared by every session using it"""
+    return AnalysisService(_client, cache=get_llm_cache())
+
+def render_debug_panel(request_trace):
+    """Show per-stage timings (and the profiler report, if captured) for the last request"""
+    with st.expander("Timing debug", expanded=True):
+        st.write(f"**Total:** {request_trace.duration * 1000:.0f} ms")
+        st.dataframe([span.to_dict() for span in request_trace.spans])
+        st.download_button(
+            label="Download timings (JSON)",
+            data=request_trace.to_json(),
+            file_name="timings.json",
+            mime="application/json",
+        )
+        if request_trace.profile:
+            st.code(request_trace.profile)
+
+def render_live_panel(live):
+    """Apply the newest bars and redraw; runs as a fragment so the rest of the page stays put"""
+    try:
+        update = live.poll()
+    except Exception as e:
+        update = None
+        st.warning(f"Live update failed, showing the last bars received: {e}")
+    latest = live.frame.iloc[-1]
+    st.subheader(f"Live: {live.ticker} ({live.interval} bars)")
+    st.write(
+        f"**Last:** ${latest['Close']:.2f} at {live.frame.index[-1]:%Y-%m-%d %H:%M} | "
+        f"**RSI:** {latest['RSI']:.2f}"
+        + (f" | updated in {update.seconds * 1000:.0f} ms" if update else "")
+    )
+    candlestick_img, rsi_img = live.render()
+    st.image(candlestick_img)
+    st.image(rsi_img)
+    if update and update.analysis_updated:
+        st.info("Analysis refreshed: " + "; ".join(update.triggers))
+    if live.analysis:
+        st.write(live.analysis)
+
+def render_report_downloads():
+    """Build the PDF/ZIP bundle with print-resolution charts on request, then offer the download"""
+    inputs = st.session_state.get("report_inputs")
+    if inputs is None:
+        return
+    st.subheader("Download All Reports")
+    if "report_files" not in st.session_state:
+        if not st.button("Prepare report bundle"):
+            return
+        with st.spinner("Rendering print-quality charts..."):
+            candlestick_img, rsi_img = render_charts(
+                inputs["stock_data"], inputs["prediction"], inputs["period"], dpi=PRINT_DPI
+            )
+            zip_bytes, zip_filename = build_report_bundle(
+                inputs["prediction"], inputs["analysis"], candlestick_img, rsi_img
+            )
+        st.session_state.report_files = {
+            "zip_bundle": zip_bytes,
+            "zip_filename": zip_filename,
+            "candlestick_img": candlestick_img,
+            "rsi_img": rsi_img,
+        }
+    report_files = st.session_state.report_files
+    # Single download button for ZIP file
+    st.download_button(
+        label="📦 Download All Reports (ZIP)",
+        data=report_files["zip_bundle"],
+        file_name=report_files["zip_filename"],
+        mime="application/zip",
+    )
 
 def main():
+    warm_up()
     st.title("Chartered Market Analyst Agent for Stock and Crypto")
     st.write("Analyze stocks from the US and other markets or Cryptocurrency.")
 
@@ -34,13 +118,28 @@ def main():
         index=4,  # Default to 1 year
     )
 
+    # Optional timing/profiling panel for diagnosing slow requests
+    debug = st.sidebar.checkbox("Show timing debug panel")
+    profiler = None
+    if debug:
+        profiler = st.sidebar.selectbox(
+            "Profiler",
+            options=[None, "cprofile", "pyinstrument"],
+            format_func=lambda name: name or "off",
+        )
+
+    # Live polling for short periods: new bars are applied without rerunning the page
+    live_mode = period in LIVE_PERIODS and st.sidebar.checkbox(
+        "Live updates",
+        help="Poll for new bars every interval and re-run the AI analysis only on a new pattern or RSI 30/70 cross.",
+    )
+
    # Button to analyze the stock
     if st.button("Analyze"):
         if not client:
             st.error("Please enter a valid Deepseek API key to proceed.")
         else:
-            with st.spinner("Analyzing stock data..."):
-                time.sleep(1)  # Simulate a delay for demonstration
+            with st.spinner("Analyzing stock data..."), trace("analyze", profiler=profiler) as request_trace:
                 prediction, stock_data = predict_next_day(ticker, period)
 
                 if prediction and stock_data is not None:
@@ -80,61 +179,24 @@ def main():
                     if "report_files" in st.session_state:
                         del st.session_state.report_files
 
-                    # Analyze candlestick patterns using AI first
-                    analysis = analyze_candlestick_patterns(client, stock_data, period)
+                    # Analyze candlestick patterns using AI first, showing the answer as it streams in
                     st.subheader("Candlestick Pattern Analysis")
-                    st.write(analysis)
-
-                    # Plot predictions and get image paths
-                    candlestick_img, rsi_img = plot_predictions(
-                        stock_data, prediction, period
-                    )
-
-                    # Generate PDF report
-                    pdf_report = generate_pdf_report(prediction, analysis)
-
-                    # Store file paths in session state
-                    st.session_state.report_files = {
-                        "pdf_report": pdf_report,
-                        "candlestick_img": candlestick_img,
-                        "rsi_img": rsi_img,
+                    service = get_analysis_service(deepseek_api_key, client)
+                    analysis = st.write_stream(stream_analysis(service, stock_data, period))
+
+                    # Plot predictions at screen resolution; print-quality charts wait for the bundle
+                    plot_predictions(stock_data, prediction, period, dpi=SCREEN_DPI)
+
+                    # Keep what the report needs; the bundle is built when asked for
+                    st.session_state.report_inputs = {
+                        "prediction": prediction,
+                        "analysis": analysis,
+                        "stock_data": stock_data,
+                        "period": period,
                     }
 
-                    # Create ZIP file with all reports
-                    zip_filename = f"{ticker}_analysis_reports.zip"
-                    with zipfile.ZipFile(zip_filename, "w") as zipf:
-                        # Add PDF report
-                        if st.session_state.report_files["pdf_report"]:
-                            zipf.write(
-                                st.session_state.report_files["pdf_report"],
-                                os.path.basename(
-                                    st.session_state.report_files["pdf_report"]
-                                ),
-                            )
-
-                        # Add candlestick chart
-                        if st.session_state.report_files["candlestick_img"]:
-                            zipf.write(
-                                st.session_state.report_files["candlestick_img"],
-                                f"{ticker}_candlestick_chart.png",
-                            )
-
-                        # Add RSI chart
-                        if st.session_state.report_files["rsi_img"]:
-                            zipf.write(
-                                st.session_state.report_files["rsi_img"],
-                                f"{ticker}_rsi_chart.png",
-                            )
-
-                    # Single download button for ZIP file
-                    st.subheader("Download All Reports")
-                    with open(zip_filename, "rb") as f:
-                        st.download_button(
-                            label="📦 Download All Reports (ZIP)",
-                            data=f,
-                            file_name=zip_filename,
-                            mime="application/zip",
-                        )
+                    if live_mode:
+                        st.session_state.live = LiveSession(ticker, period, client=client).start(stock_data, analysis)
 
                     if st.button("Analyze a Different Stock"):
                         # Clear session state to reset the app
@@ -145,6 +207,15 @@ def main():
                         f"Unable to analyze {ticker}. Please check the ticker symbol."
                     )
 
+            if debug:
+                render_debug_panel(request_trace)
+
+    render_report_downloads()
+
+    live = st.session_state.get("live")
+    if live_mode and live is not None and (live.ticker, live.period) == (ticker, period):
+        st.fragment(run_every=live.poll_seconds)(render_live_panel)(live)
+
 
 # Run the Streamlit app
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+# tests/test_bar_cache.py
+import os
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_ohlcv
+from utils.bar_cache import BarCache
+from utils.resample import period_to_offset
+
+
+class FakeSource:
+    """Daily bars up to today, served like `yfinance_source` serves them"""
+
+    def __init__(self, days=2000):
+        self.bars = make_ohlcv(days, freq="D")
+        self.bars.index = pd.date_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=days, freq="D")
+        self.calls = []
+
+    def __call__(self, ticker, interval, period=None, start=None):
+        self.calls.append({"period": period, "start": start})
+        if start is not None:
+            return self.bars[self.bars.index >= start].copy()
+        return self.bars[self.bars.index > self.bars.index[-1] - period_to_offset(period)].copy()
+
+
+@pytest.fixture
+def source():
+    return FakeSource()
+
+
+def test_cold_fetch_downloads_the_lookback_and_stores_it(tmp_path, source):
+    cache = BarCache(str(tmp_path), source=source)
+    df = cache.get("^gspc", "1d", "1y")
+    assert source.calls == [{"period": "1y", "start": None}]
+    assert os.path.exists(cache.path("^GSPC", "1d")) and os.path.basename(cache.path("^GSPC", "1d")) == "_GSPC__1d.parquet"
+    assert 360 <= len(df) <= 366
+    stored = cache.load("^GSPC", "1d")
+    assert stored.attrs["lookback"] == "1y" and "fetched_at" in stored.attrs
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_fresh_series_is_served_without_the_source(tmp_path, source):
+    cache = BarCache(str(tmp_path), source=source)
+    first = cache.get("TEST", "1d", "1y")
+    second = cache.get("TEST", "1d", "1y")
+    assert len(source.calls) == 1
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+
+def test_stale_series_only_fetches_bars_after_the_last_stored_one(tmp_path, source):
+    cache = BarCache(str(tmp_path), source=source, max_staleness=pd.Timedelta(0))
+    cache.get("TEST", "1d", "1y")
+    # A new bar arrives and the last stored one is revised
+    last = source.bars.index[-1]
+    source.bars.loc[last, "Close"] += 1.0
+    new_bar = source.bars.iloc[-1:].copy()
+    new_bar.index = new_bar.index + pd.Timedelta(days=1)
+    source.bars = pd.concat([source.bars, new_bar])
+
+    df = cache.get("TEST", "1d", "1y")
+    assert source.calls[-1] == {"period": None, "start": last}
+    assert df.index[-1] == new_bar.index[0]
+    assert df.loc[last, "Close"] == source.bars.loc[last, "Close"]
+    assert not df.index.duplicated().any()
+
+
+def test_longer_lookback_refetches_and_shorter_ones_keep_the_history(tmp_path, source):
+    cache = BarCache(str(tmp_path), source=source)
+    cache.get("TEST", "1d", "1y")
+    five_years = cache.get("TEST", "1d", "5y")
+    assert source.calls[-1] == {"period": "5y", "start": None}
+    assert len(five_years) > 1800
+
+    one_year = cache.get("TEST", "1d", "1y")
+    assert len(source.calls) == 2  # Served from the 5y series
+    assert 360 <= len(one_year) <= 366
+    assert len(cache.load("TEST", "1d")) == len(five_years)
+
+
+def test_unreadable_file_is_a_miss(tmp_path, source):
+    cache = BarCache(str(tmp_path), source=source)
+    with open(cache.path("TEST", "1d"), "wb") as f:
+        f.write(b"truncated")
+    assert len(cache.get("TEST", "1d", "1y")) > 0
+    assert len(source.calls) == 1
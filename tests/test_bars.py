@@ -0,0 +1,57 @@
+# tests/test_bars.py
+import os
+import pickle
+import numpy as np
+import pytest
+from benchmarks.synthetic import make_intraday
+from utils.bars import Bars, map_shared
+
+
+@pytest.fixture
+def frame():
+    df = make_intraday(2)
+    df.attrs.update(ticker="TEST", interval="5m")
+    return df
+
+
+def test_save_and_open_round_trip(tmp_path, frame):
+    bars = Bars.from_frame(frame, dtype=np.float64)
+    path = str(tmp_path / "test.bars")
+    bars.save(path)
+    opened = Bars.open(path)
+
+    assert len(opened) == len(frame) and opened.tz == "America/New_York"
+    assert opened.attrs == {"ticker": "TEST", "interval": "5m"}
+    restored = opened.to_frame()
+    assert restored.index.equals(frame.index)
+    assert restored.equals(frame[["Open", "High", "Low", "Close", "Volume"]])
+    assert opened.tail(5).to_frame().equals(restored.tail(5))
+    assert not opened.columns["Close"].flags.writeable
+    with pytest.raises(ValueError):
+        restored.loc[restored.index[0], "Close"] = -1.0
+
+
+def test_open_rejects_other_files(tmp_path):
+    empty, other = tmp_path / "empty.bars", tmp_path / "other.bars"
+    empty.write_bytes(b"")
+    other.write_bytes(b"not bars at all")
+    for path in (empty, other):
+        with pytest.raises(ValueError):
+            Bars.open(str(path))
+
+
+def test_mapped_bars_pickle_as_a_reference_to_their_file(tmp_path, frame):
+    shared = map_shared(Bars.from_frame(frame), "TEST__1d", root=str(tmp_path))
+    assert os.path.dirname(shared.path) == str(tmp_path)
+    blob = pickle.dumps(shared)
+    assert len(blob) < 1000  # The path, not the columns
+    assert pickle.loads(blob).to_frame().equals(shared.to_frame())
+    # Slices and in-memory bars carry their data
+    assert pickle.loads(pickle.dumps(shared[-3:])).to_frame().equals(shared.to_frame().tail(3))
+
+
+def test_map_shared_prunes_old_files(tmp_path, frame):
+    old = map_shared(Bars.from_frame(frame), "OLD", root=str(tmp_path))
+    os.utime(old.path, (0, 0))
+    new = map_shared(Bars.from_frame(frame), "NEW", root=str(tmp_path))
+    assert os.listdir(tmp_path) == [os.path.basename(new.path)]
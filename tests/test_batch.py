@@ -0,0 +1,79 @@
+# tests/test_batch.py
+import json
+import multiprocessing
+import os
+import pandas as pd
+import pytest
+import utils.pipeline as pipeline_module
+from benchmarks.synthetic import make_ohlcv
+from utils.bar_cache import BarCache
+from utils.batch import analyze_batch, fetch_batch
+from utils.data_fetcher import InsufficientDataError
+from utils.pipeline import MANIFEST_NAME, read_manifest, run_watchlist
+from utils.vector_indicators import DAILY_COLUMNS
+
+
+class FlakySource:
+    """Daily bars up to today for every ticker except `bad`, which always fails"""
+
+    def __init__(self, bad="BAD"):
+        self.bad = bad
+        self.calls = []
+
+    def __call__(self, ticker, interval, period=None, start=None):
+        self.calls.append(ticker)
+        if ticker == self.bad:
+            raise ConnectionError(f"{ticker}: no response")
+        bars = make_ohlcv(400, seed=len(ticker))
+        bars.index = pd.date_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=len(bars), freq="D")
+        return bars
+
+
+def test_one_failing_ticker_leaves_the_others_alone(tmp_path):
+    source = FlakySource()
+    cache = BarCache(str(tmp_path), source=source)
+    result = analyze_batch(["AAA", "BAD", "CCCC", "AAA"], "1y", max_workers=3, cache=cache)
+    assert list(result.frames) == ["AAA", "CCCC"]
+    assert list(result.errors) == ["BAD"] and "no response" in result.errors["BAD"]
+    for df in result.frames.values():
+        assert set(DAILY_COLUMNS) <= set(df.columns) and len(df) >= 50
+    assert set(result.panel.index.get_level_values("Ticker")) == {"AAA", "CCCC"}
+    assert result.throughput > 0
+
+
+def test_failures_are_retried_per_ticker(tmp_path):
+    source = FlakySource()
+    cache = BarCache(str(tmp_path), source=source)
+    frames, errors = fetch_batch(["AAA", "BAD"], "1y", retries=2, backoff=0, cache=cache)
+    assert list(frames) == ["AAA"] and list(errors) == ["BAD"]
+    assert source.calls.count("BAD") == 3 and source.calls.count("AAA") == 1
+
+
+def _fake_load(ticker, period="1y", cache=None):
+    if ticker == "BAD":
+        raise InsufficientDataError(0)
+    df = make_ohlcv(300, seed=len(ticker))
+    df.attrs.update(ticker=ticker, interval="1d", period=period)
+    return df
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods() or multiprocessing.get_start_method() != "fork",
+    reason="worker processes only see the fake loader when forked",
+)
+def test_watchlist_workers_isolate_a_failing_ticker(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "load_stock_data", _fake_load)
+    out_dir = str(tmp_path)
+    results = run_watchlist(["AAA", "bad", "CCCC"], out_dir, workers=2, progress=False)
+    by_ticker = {result["ticker"]: result for result in results}
+    assert by_ticker["BAD"]["status"] == "error" and "Insufficient data" in by_ticker["BAD"]["error"]
+    for ticker in ("AAA", "CCCC"):
+        assert by_ticker[ticker]["status"] == "ok" and os.path.exists(by_ticker[ticker]["path"])
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        assert sorted(json.loads(line)["ticker"] for line in f) == ["AAA", "BAD", "CCCC"]
+    assert set(read_manifest(out_dir)) == {"AAA", "CCCC"}
+
+    # A rerun only retries the ticker that failed
+    rerun = run_watchlist(["AAA", "BAD", "CCCC"], out_dir, workers=1, progress=False)
+    assert [result["ticker"] for result in rerun] == ["BAD"]
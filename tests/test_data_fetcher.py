@@ -0,0 +1,52 @@
+# tests/test_data_fetcher.py
+import os
+import pytest
+from benchmarks.synthetic import make_ohlcv
+from utils import bars, data_fetcher
+from utils.bars import Bars
+from utils.shared_cache import SharedCache, SQLiteBackend
+
+
+def test_sessions_share_slim_bars_and_get_their_own_frames(monkeypatch, tmp_path):
+    loads = []
+
+    def load_stock_data(ticker, period="1y", cache=None):
+        loads.append(ticker)
+        df = make_ohlcv(300)
+        df.attrs.update(ticker=ticker, interval="1d", period=period)
+        return df
+
+    monkeypatch.setattr(data_fetcher, "load_stock_data", load_stock_data)
+    monkeypatch.setattr(bars, "DEFAULT_SHARED_BARS_DIR", str(tmp_path))
+    shared = SharedCache()
+    first = data_fetcher.fetch_stock_data("test", "1y", shared=shared)
+    second = data_fetcher.fetch_stock_data("TEST", "1y", shared=shared)
+
+    assert loads == ["test"]
+    stored = shared.get(("bars", "TEST", "1y"))
+    assert isinstance(stored, Bars)
+    assert shared.stats()["bytes"] == stored.nbytes
+    assert first is not second
+    expected = make_ohlcv(300)[["Open", "High", "Low", "Close", "Volume"]]
+    assert first.equals(expected) and second.equals(expected)
+    assert first.attrs == {"ticker": "test", "interval": "1d", "period": "1y"}
+    assert stored.path is not None and stored.path.startswith(str(tmp_path))
+    # Frames are views of the shared, mapped columns, so writes fail instead of leaking
+    with pytest.raises(ValueError):
+        first.loc[first.index[0], "Close"] = -1.0
+    assert second["Close"].iat[0] == expected["Close"].iat[0]
+
+
+def test_backend_entries_map_the_same_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_fetcher, "load_stock_data", lambda ticker, period="1y", cache=None: make_ohlcv(300))
+    monkeypatch.setattr(bars, "DEFAULT_SHARED_BARS_DIR", str(tmp_path / "bars"))
+    path = str(tmp_path / "shared.sqlite3")
+    data_fetcher.fetch_stock_data("TEST", "1y", shared=SharedCache(backend=SQLiteBackend(path)))
+    other = SharedCache(backend=SQLiteBackend(path))  # Another process
+    stored = other.get(("bars", "TEST", "1y"))
+    assert stored.path.startswith(str(tmp_path / "bars"))
+    assert data_fetcher.fetch_stock_data("TEST", "1y", shared=other).equals(stored.to_frame())
+
+    for name in os.listdir(tmp_path / "bars"):
+        os.remove(tmp_path / "bars" / name)
+    assert SharedCache(backend=SQLiteBackend(path)).get(("bars", "TEST", "1y")) is None
@@ -0,0 +1,119 @@
+# tests/test_fetch_scheduler.py
+import threading
+import time
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_intraday
+from utils.fetch_scheduler import BATCH, INTERACTIVE, FetchRecorder, FetchScheduler, RateLimiter, ReplayMissError
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.drains = 0
+
+    def drain(self):
+        self.drains += 1
+        super().drain()
+
+
+def _scheduler(source, **options):
+    scheduler = FetchScheduler(source=source, backoff=0, **options)
+    scheduler.limiter = CountingLimiter(1000)
+    return scheduler
+
+
+def test_identical_requests_in_flight_share_one_download():
+    calls = []
+
+    def source(ticker, interval, period=None, start=None):
+        calls.append(ticker)
+        time.sleep(0.2)
+        return make_intraday(1)
+
+    scheduler = _scheduler(source)
+    barrier = threading.Barrier(20)
+    results = []
+
+    def fetch():
+        barrier.wait()
+        results.append(scheduler.fetch("test", "5m", period="1d"))
+
+    threads = [threading.Thread(target=fetch) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 20 and all(df is results[0] for df in results)
+    assert scheduler.stats()["requests"] == 20
+
+
+def test_empty_responses_are_retried_without_draining_the_bucket():
+    responses = [pd.DataFrame(), pd.DataFrame(), make_intraday(1)]
+    scheduler = _scheduler(lambda *args, **kwargs: responses.pop(0))
+    df = scheduler.fetch("BAD", "5m", period="1d")
+    assert len(df) and not responses
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.limiter.drains == 0
+
+
+def test_failures_drain_the_bucket_and_reraise_after_the_last_attempt():
+    def source(*args, **kwargs):
+        raise ConnectionError("throttled")
+
+    scheduler = _scheduler(source, retries=2)
+    with pytest.raises(ConnectionError):
+        scheduler.fetch("TEST", "5m", period="1d")
+    assert scheduler.stats()["downloads"] == 3
+    assert scheduler.limiter.drains == 2
+
+
+def test_interactive_requests_are_served_before_waiting_batch_requests():
+    limiter = RateLimiter(5, burst=1)
+    limiter.drain()
+    served = []
+
+    def acquire(name, priority):
+        limiter.acquire(priority)
+        served.append(name)
+
+    batch = threading.Thread(target=acquire, args=("batch", BATCH))
+    batch.start()
+    time.sleep(0.05)  # The batch request is first in line and waiting for a token
+    interactive = threading.Thread(target=acquire, args=("interactive", INTERACTIVE))
+    interactive.start()
+    batch.join()
+    interactive.join()
+    assert served == ["interactive", "batch"]
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    bars = make_intraday(3)
+    source = lambda ticker, interval, period=None, start=None: bars
+    FetchScheduler(source=source, rate=None, recorder=FetchRecorder(str(tmp_path)), mode="record").fetch("TEST", "5m", period="5d")
+    return bars, FetchScheduler(rate=None, recorder=FetchRecorder(str(tmp_path)), mode="replay")
+
+
+def test_replay_serves_the_recorded_request(recorded):
+    bars, replay = recorded
+    pd.testing.assert_frame_equal(replay.fetch("test", "5m", period="5d"), bars, check_freq=False)
+    assert replay.stats()["replayed"] == 1
+
+
+def test_replay_answers_incremental_and_coarser_requests(recorded):
+    bars, replay = recorded
+    start = bars.index[-10]
+    assert replay.fetch("TEST", "5m", start=start).index.equals(bars.index[-10:])
+    quarter = replay.fetch("TEST", "15m", period="1mo")
+    assert len(quarter) == len(bars) // 3
+    assert quarter["Volume"].sum() == bars["Volume"].sum()
+
+
+def test_replay_without_a_recording_raises(recorded):
+    _, replay = recorded
+    with pytest.raises(ReplayMissError):
+        replay.fetch("OTHER", "5m", period="5d")
+    with pytest.raises(ReplayMissError):
+        replay.fetch("TEST", "1m", period="1d")
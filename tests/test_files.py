@@ -0,0 +1,24 @@
+# tests/test_files.py
+import os
+import pytest
+from utils.files import atomic_path, safe_name
+
+
+def test_safe_name():
+    assert safe_name("^gspc") == "_GSPC"
+    assert safe_name("brk/b") == "BRK_B"
+    assert safe_name("eurusd=x") == "EURUSD_X"
+
+
+def test_atomic_path_replaces_on_success_and_cleans_up_on_failure(tmp_path):
+    path = str(tmp_path / "data.bin")
+    with atomic_path(path) as tmp:
+        with open(tmp, "wb") as f:
+            f.write(b"first")
+    with pytest.raises(RuntimeError):
+        with atomic_path(path) as tmp:
+            with open(tmp, "wb") as f:
+                f.write(b"partial")
+            raise RuntimeError("crashed mid-write")
+    assert open(path, "rb").read() == b"first"
+    assert os.listdir(tmp_path) == ["data.bin"]
@@ -0,0 +1,25 @@
+# tests/test_import_budget.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _budget_check(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.import_budget", *args], cwd=ROOT, capture_output=True, text=True
+    )
+
+
+def test_entry_modules_import_within_budget():
+    result = _budget_check("--repeat", "2")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "main" in result.stdout and "unmeasured" in result.stdout
+
+
+def test_over_budget_or_eager_heavy_imports_fail():
+    over = _budget_check("utils.startup", "--repeat", "1", "--budget-ms", "0")
+    assert over.returncode == 1 and "OVER" in over.stdout
+    heavy = _budget_check("matplotlib.figure", "--repeat", "1", "--budget-ms", "10000")
+    assert heavy.returncode == 1 and "matplotlib" in heavy.stdout
@@ -0,0 +1,73 @@
+# tests/test_indicators.py
+import pandas as pd
+import utils.indicators as indicators_module
+from benchmarks.synthetic import make_ohlcv
+from utils.indicators import IndicatorCache, calculate_technical_indicators, indicator_cache_key
+
+
+def _bars(ticker="AAA", n=120, seed=0):
+    df = make_ohlcv(n, seed=seed)
+    df.attrs.update(ticker=ticker, interval="1d")
+    return df
+
+
+def test_input_frame_is_left_unchanged():
+    df = _bars()
+    before = df.copy()
+    attrs = dict(df.attrs)
+    result = calculate_technical_indicators(df, cache=IndicatorCache())
+    pd.testing.assert_frame_equal(df, before)
+    assert df.attrs == attrs
+    assert "RSI" in result.columns and "RSI" not in df.columns
+    assert result.attrs == attrs
+
+
+def test_results_are_reused_for_the_same_bars(monkeypatch):
+    cache = IndicatorCache()
+    calls = []
+    compute = indicators_module._indicator_columns
+    monkeypatch.setattr(indicators_module, "_indicator_columns", lambda df: calls.append(1) or compute(df))
+    df = _bars()
+    first = calculate_technical_indicators(df, cache=cache)
+    second = calculate_technical_indicators(df.copy(), cache=cache)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert cache.stats()["entries"] == 1
+
+    # A new last close is a different key
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc("Close")] += 1.0
+    calculate_technical_indicators(changed, cache=cache)
+    assert len(calls) == 2
+
+
+def test_results_match_an_uncached_computation():
+    df = _bars()
+    cached = calculate_technical_indicators(df, cache=IndicatorCache())
+    pd.testing.assert_frame_equal(cached, calculate_technical_indicators(df, cache=False))
+
+
+def test_least_recently_used_columns_are_evicted():
+    cache = IndicatorCache(max_entries=2)
+    frames = [_bars(ticker) for ticker in ("A", "B", "C")]
+    keys = [indicator_cache_key(df) for df in frames]
+    calculate_technical_indicators(frames[0], cache=cache)
+    calculate_technical_indicators(frames[1], cache=cache)
+    assert cache.get(keys[0]) is not None  # A is now the most recent
+    calculate_technical_indicators(frames[2], cache=cache)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_byte_budget_evicts_and_skips_oversized_columns():
+    columns = calculate_technical_indicators(_bars(), cache=False).iloc[:, 5:]
+    nbytes = int(columns.memory_usage(index=False).sum())
+    cache = IndicatorCache(max_bytes=nbytes * 2)
+    for key in ("a", "b", "c"):
+        cache.set(key, columns)
+    assert cache.stats() == {"entries": 2, "bytes": nbytes * 2}
+    assert cache.get("a") is None
+
+    small = IndicatorCache(max_bytes=nbytes - 1)
+    small.set("a", columns)
+    assert small.get("a") is None
@@ -0,0 +1,68 @@
+# tests/test_live.py
+import numpy as np
+import pytest
+from benchmarks.synthetic import make_intraday
+from utils.live import LiveSession
+from utils.resample import resample_bars
+
+
+class FeedSource:
+    """5m bars up to `available`, served like `scheduled_source` serves them"""
+
+    def __init__(self, bars, available):
+        self.bars = bars
+        self.available = available
+        self.requests = []
+
+    def __call__(self, ticker, interval, period=None, start=None):
+        self.requests.append((interval, start))
+        if interval != "5m":
+            raise AssertionError(f"Polled {interval} bars instead of the 5m base")
+        served = self.bars.iloc[:self.available]
+        return served[served.index >= start]
+
+
+def test_five_day_session_polls_the_base_interval_and_stays_aligned():
+    bars = make_intraday(5, "5min")
+    available = len(bars) - 40  # Stops mid-session, inside a 15m bar
+    source = FeedSource(bars, available)
+    session = LiveSession("TEST", "5d", source=source).start(resample_bars(bars.iloc[:available], "15m", "5m"))
+
+    for step in (1, 4, 7):  # Finish the forming bar, then add whole and partial bars
+        source.available += step
+        session.poll()
+
+    expected = resample_bars(bars.iloc[:source.available], "15m", "5m")
+    frame = session.frame
+    assert not frame.index.duplicated().any()
+    assert all(ts.minute in (0, 15, 30, 45) for ts in frame.index)
+    tail = expected.loc[frame.index[0]:]
+    assert frame.index.equals(tail.index)
+    np.testing.assert_allclose(frame[["Open", "High", "Low", "Close"]], tail[["Open", "High", "Low", "Close"]])
+    assert {interval for interval, _ in source.requests} == {"5m"}
+
+
+def test_misaligned_bars_are_rejected():
+    bars = make_intraday(5, "5min")
+    session = LiveSession("TEST", "1d", source=lambda *args, **kwargs: shifted).start(bars.iloc[:-10])
+    shifted = bars.iloc[-12:].copy()
+    shifted.index = shifted.index - np.timedelta64(2, "m")
+    with pytest.raises(ValueError, match="do not line up"):
+        session.poll()
+
+
+def test_bars_at_the_wrong_interval_are_rejected_before_changing_anything():
+    bars = make_intraday(5, "5min")
+    window = resample_bars(bars.iloc[:-40], "15m", "5m")
+    # A source ignoring the requested interval and serving 5m bars to a 15m window
+    session = LiveSession("TEST", "5d", source=lambda *args, **kwargs: bars.iloc[-45:]).start(window)
+    session.base_interval = "15m"
+    frame = session.frame
+    with pytest.raises(ValueError, match="do not line up"):
+        session.poll()
+    assert session.frame is frame
+
+
+def test_no_completed_bars_never_trigger():
+    session = LiveSession("TEST", "1d").start(make_intraday(5, "5min"))
+    assert session._triggers(0) == [] and session._triggers(-2) == []
@@ -0,0 +1,88 @@
+# tests/test_llm_cache.py
+import pytest
+from benchmarks.fakes import FakeLLMClient
+from benchmarks.synthetic import make_ohlcv
+from utils import llm_cache
+from utils.analysis import analyze_candlestick_patterns
+from utils.llm_cache import LLMResponseCache, make_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+
+
+def _analyze(client, df, cache):
+    return analyze_candlestick_patterns(client, df, "1y", cache=cache, prescreen=False, shared=False)
+
+
+def test_same_prompt_hits_and_changed_prompt_misses(cache):
+    client = FakeLLMClient()
+    df = make_ohlcv(300)
+    first = _analyze(client, df, cache)
+    second = _analyze(client, df, cache)
+    assert first == second == client.content
+    assert client.calls == 1
+
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc("Close")] += 1.0
+    _analyze(client, changed, cache)
+    assert client.calls == 2
+
+
+def test_key_covers_every_request_field():
+    base = make_key("model", 0.3, "system", "user")
+    assert base == make_key("model", 0.3, "system", "user")
+    assert base != make_key("other", 0.3, "system", "user")
+    assert base != make_key("model", 0.5, "system", "user")
+    assert base != make_key("model", 0.3, "other", "user")
+    assert base != make_key("model", 0.3, "system", "other")
+
+
+def test_entries_expire_after_their_ttl(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache.set("key", "answer", ttl=60)
+    now[0] += 59
+    assert cache.get("key") == "answer"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_by_count(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_entries=2)
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.set(key, key, ttl=3600)
+    now[0] += 1
+    cache.get("a")  # "b" is now the least recently used
+    now[0] += 1
+    cache.set("c", "c", ttl=3600)
+    assert cache.get("a") == "a"
+    assert cache.get("b") is None
+    assert cache.get("c") == "c"
+
+
+def test_entries_are_evicted_by_size(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=25)
+    for key in ("a", "b", "c"):
+        now[0] += 1
+        cache.set(key, key * 10, ttl=3600)
+    assert cache.stats()["bytes"] <= 25
+    assert cache.get("a") is None
+    assert cache.get("c") == "c" * 10
+
+
+def test_hit_and_miss_counters(cache):
+    cache.get("missing")
+    cache.set("key", "answer", ttl=60)
+    cache.get("key")
+    cache.get("key")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["bytes"] == len("answer")
@@ -0,0 +1,109 @@
+# tests/test_llm_service.py
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from benchmarks.fakes import CANNED_ANALYSIS, FakeLLMClient
+from benchmarks.synthetic import make_ohlcv
+from utils.llm_service import AnalysisService, stream_analysis
+from utils.shared_cache import SharedCache, SQLiteBackend
+
+
+def test_stream_analysis_yields_partial_text():
+    client = FakeLLMClient()
+    service = AnalysisService(client)
+    chunks = list(stream_analysis(service, make_ohlcv(300), "1y", prescreen=False))
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == CANNED_ANALYSIS
+    assert client.calls == 1
+
+
+class BreakingStreamClient(FakeLLMClient):
+    """Streams a few words, then fails mid-answer"""
+
+    def _stream(self):
+        yield from list(super()._stream())[:3]
+        raise ConnectionError("stream dropped")
+
+
+def test_failure_after_streaming_is_not_retried():
+    client = BreakingStreamClient()
+    service = AnalysisService(client, retries=2, backoff=0)
+    received = []
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.complete("prompt", on_token=received.append))
+    assert client.calls == 1
+    assert len(received) == 3  # Nothing was sent twice
+
+
+class SlowClient(FakeLLMClient):
+    def create(self, model, messages, temperature=None, stream=False, **kwargs):
+        time.sleep(0.3)
+        return super().create(model, messages, temperature)
+
+
+def test_timed_out_sync_call_is_not_retried():
+    client = SlowClient()
+    service = AnalysisService(client, timeout=0.05, retries=2, backoff=0)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(service.complete("prompt"))
+    assert client.calls == 1
+
+
+def test_errors_before_any_text_are_retried():
+    client = FakeLLMClient()
+    failures = [ConnectionError("refused")]
+    create = client.create
+
+    def flaky(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return create(*args, **kwargs)
+
+    client.chat = SimpleNamespace(completions=SimpleNamespace(create=flaky))
+    service = AnalysisService(client, retries=2, backoff=0)
+    assert asyncio.run(service.complete("prompt")) == CANNED_ANALYSIS
+
+
+class SlowStreamClient(FakeLLMClient):
+    def _stream(self):
+        for chunk in super()._stream():
+            time.sleep(0.01)
+            yield chunk
+
+
+def test_caller_joining_a_running_stream_gets_the_full_text():
+    client = SlowStreamClient()
+    service = AnalysisService(client)
+    first, second = [], []
+
+    async def overlapping():
+        running = asyncio.ensure_future(service.complete("prompt", on_token=first.append))
+        await asyncio.sleep(0.08)  # Several chunks have streamed already
+        joined = await service.complete("prompt", on_token=second.append)
+        return await running, joined
+
+    results = asyncio.run(overlapping())
+    assert results == (CANNED_ANALYSIS, CANNED_ANALYSIS)
+    assert "".join(first).strip() == "".join(second).strip() == CANNED_ANALYSIS
+    assert client.calls == 1 and service.coalesced == 1
+
+
+def test_services_sharing_a_backend_ask_the_model_once(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    clients = [SlowStreamClient(), SlowStreamClient()]
+    # Two processes' worth of services: separate caches over one SQLite file
+    services = [
+        AnalysisService(client, shared=SharedCache(backend=SQLiteBackend(path), poll_interval=0.01))
+        for client in clients
+    ]
+    streamed = []
+
+    async def both():
+        first = asyncio.ensure_future(services[0].complete("prompt", on_token=streamed.append, ttl=60))
+        await asyncio.sleep(0.05)
+        return await asyncio.gather(first, services[1].complete("prompt", ttl=60))
+
+    assert asyncio.run(both()) == [CANNED_ANALYSIS, CANNED_ANALYSIS]
+    assert [client.calls for client in clients] == [1, 0]
+    assert "".join(streamed).strip() == CANNED_ANALYSIS
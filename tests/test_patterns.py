@@ -0,0 +1,103 @@
+# tests/test_patterns.py
+import pandas as pd
+from benchmarks.fakes import FakeLLMClient
+from utils.analysis import NO_PATTERNS_MESSAGE, analyze_candlestick_patterns
+from utils.patterns import BEARISH, BULLISH, NEUTRAL, detect_patterns, significant_patterns
+
+
+def _frame(candles):
+    """OHLCV frame from `(open, high, low, close)` tuples, one per day"""
+    index = pd.date_range("2024-01-01", periods=len(candles), freq="D")
+    df = pd.DataFrame(candles, index=index, columns=["Open", "High", "Low", "Close"])
+    df["Volume"] = 1_000_000.0
+    return df
+
+
+def _trend(n, start, step):
+    """`n` one-point candles moving by `step`, bearish when falling"""
+    candles = []
+    for i in range(n):
+        mid = start + i * step
+        o, c = (mid + 0.5, mid - 0.5) if step < 0 else (mid - 0.5, mid + 0.5)
+        candles.append((o, max(o, c) + 0.2, min(o, c) - 0.2, c))
+    return candles
+
+
+def _found(df):
+    patterns = detect_patterns(df)
+    last = patterns[patterns["date"] == df.index[-1]]
+    return dict(zip(last["pattern"], last["direction"]))
+
+
+def test_bullish_engulfing_after_a_downtrend():
+    candles = _trend(10, 50, -1)
+    o1, c1 = candles[-1][0], candles[-1][3]
+    candles.append((c1 - 0.2, o1 + 0.4, c1 - 0.4, o1 + 0.2))
+    assert _found(_frame(candles)).get("Bullish Engulfing") == BULLISH
+
+
+def test_bearish_engulfing_after_an_uptrend():
+    candles = _trend(10, 50, 1)
+    o1, c1 = candles[-1][0], candles[-1][3]
+    candles.append((c1 + 0.2, c1 + 0.4, o1 - 0.4, o1 - 0.2))
+    assert _found(_frame(candles)).get("Bearish Engulfing") == BEARISH
+
+
+def test_doji():
+    candles = _trend(10, 50, 1) + [(60.0, 60.5, 59.5, 60.01)]
+    found = _found(_frame(candles))
+    assert found.get("Doji") == NEUTRAL
+    assert "Hammer" not in found and "Shooting Star" not in found
+
+
+def test_hammer_after_a_downtrend_and_hanging_man_after_an_uptrend():
+    hammer = (40.0, 40.35, 39.0, 40.3)
+    after_fall = _found(_frame(_trend(10, 50, -1) + [hammer]))
+    assert after_fall.get("Hammer") == BULLISH and "Hanging Man" not in after_fall
+
+    hanging = (60.0, 60.35, 59.0, 60.3)
+    after_rise = _found(_frame(_trend(10, 50, 1) + [hanging]))
+    assert after_rise.get("Hanging Man") == BEARISH and "Hammer" not in after_rise
+
+
+def test_plain_trend_has_no_patterns():
+    assert detect_patterns(_frame(_trend(30, 50, 1))).empty
+    assert detect_patterns(_frame(_trend(2, 50, 1))).empty
+
+
+def test_significant_patterns_drop_neutral_and_weak_ones():
+    candles = _trend(10, 50, -1)
+    o1, c1 = candles[-1][0], candles[-1][3]
+    candles.append((c1 - 0.2, o1 + 0.4, c1 - 0.4, o1 + 0.2))
+    candles.append((42.0, 42.5, 41.5, 42.01))  # Doji
+    df = _frame(candles)
+    patterns = detect_patterns(df)
+    assert set(patterns["pattern"]) >= {"Bullish Engulfing", "Doji"}
+    significant = significant_patterns(patterns, min_strength=0.0)
+    assert NEUTRAL not in set(significant["direction"])
+    assert significant_patterns(patterns, min_strength=1.01).empty
+    recent = significant_patterns(patterns, lookback_dates=df.index[-1:], min_strength=0.0)
+    assert recent.empty  # The engulfing bar is one bar before the window
+
+
+def test_prescreen_skips_the_model_when_nothing_is_found():
+    df = _frame(_trend(60, 50, 1))
+    client = FakeLLMClient()
+    result = analyze_candlestick_patterns(client, df, "1y", cache=False, shared=False)
+    assert result == NO_PATTERNS_MESSAGE.format(bars=10)
+    assert client.calls == 0
+
+    analyze_candlestick_patterns(client, df, "1y", cache=False, shared=False, prescreen=False)
+    assert client.calls == 1
+
+
+def test_prescreen_sends_the_detected_patterns():
+    candles = _trend(60, 100, -1)
+    o1, c1 = candles[-1][0], candles[-1][3]
+    candles.append((c1 - 0.2, o1 + 0.4, c1 - 0.4, o1 + 0.2))
+    df = _frame(candles)
+    df.loc[df.index[-1], "Volume"] = 5_000_000.0  # Volume confirmation lifts it over the threshold
+    client = FakeLLMClient()
+    analyze_candlestick_patterns(client, df, "1y", cache=False, shared=False)
+    assert client.calls == 1
+    assert "Bullish Engulfing" in client.last_messages[-1]["content"]
@@ -0,0 +1,46 @@
+# tests/test_pdf_stream.py
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from utils.pdf_stream import PDFStreamWriter, image_xobject
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def _png(mode, size=(37, 23)):
+    rng = np.random.default_rng(0)
+    channels = {"L": 1, "RGB": 3, "RGBA": 4}[mode]
+    pixels = rng.integers(0, 256, (size[1], size[0], channels), dtype=np.uint8)
+    pixels[:, :8] = 40  # Flat areas so the encoder picks different row filters
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.squeeze()).save(buffer, "png")
+    return buffer.getvalue()
+
+
+def _embedded(data):
+    buffer = io.BytesIO()
+    pdf = PDFStreamWriter(buffer)
+    pdf.add_page()
+    pdf.image(data, 100)
+    pdf.close()
+    page = pypdf.PdfReader(io.BytesIO(buffer.getvalue())).pages[0]
+    return page.images[0].image
+
+
+@pytest.mark.parametrize("mode, colors", [("RGB", 3), ("L", 1)])
+def test_png_data_is_embedded_without_decoding(mode, colors):
+    data = _png(mode)
+    width, height, _, encoding, parameters, stream = image_xobject(data)
+    assert (width, height, encoding) == (37, 23, "FlateDecode")
+    assert f"/Predictor 15 /Colors {colors}" in parameters
+    assert stream in data  # The IDAT data as the PNG holds it
+    embedded = _embedded(data)
+    assert np.array_equal(np.asarray(embedded), np.asarray(Image.open(io.BytesIO(data))))
+
+
+def test_png_with_alpha_is_converted():
+    data = _png("RGBA")
+    assert image_xobject(data)[4] is None
+    embedded = _embedded(data)
+    assert np.array_equal(np.asarray(embedded), np.asarray(Image.open(io.BytesIO(data)).convert("RGB")))
@@ -0,0 +1,52 @@
+# tests/test_pipeline.py
+from benchmarks.synthetic import make_intraday, make_ohlcv
+from utils.indicators import calculate_technical_indicators
+from utils.pipeline import build_snapshot
+from utils.report_generator import write_report
+
+
+class RecordingWriter:
+    """Collects the text a report writes instead of laying out a PDF"""
+
+    def __init__(self):
+        self.lines = []
+
+    def add_page(self):
+        pass
+
+    def cell(self, width, height, text, align="L"):
+        self.lines.append(text)
+
+    def multi_cell(self, width, height, text):
+        self.lines.append(text)
+
+    def ln(self, height=None):
+        pass
+
+    def image(self, data, width):
+        pass
+
+
+def _report_lines(snapshot):
+    writer = RecordingWriter()
+    write_report(writer, snapshot, "analysis")
+    return writer.lines
+
+
+def test_daily_snapshot_reports_moving_averages():
+    df = calculate_technical_indicators(make_ohlcv(300), cache=False)
+    snapshot = build_snapshot("TEST", df)
+    assert set(snapshot["technical_indicators"]) == {"ma20", "ma50", "rsi"}
+    assert snapshot["technical_indicators"]["ma50"] == df["MA50"].iat[-1]
+    assert any(line.startswith("50-hour MA:") for line in _report_lines(snapshot))
+
+
+def test_intraday_snapshot_labels_emas_as_emas():
+    df = calculate_technical_indicators(make_intraday(5, "5min"), cache=False)
+    snapshot = build_snapshot("TEST", df)
+    indicators = snapshot["technical_indicators"]
+    assert "ma50" not in indicators
+    assert indicators["ema26"] == df["EMA26"].iat[-1]
+    lines = _report_lines(snapshot)
+    assert not any("50-hour MA" in line for line in lines)
+    assert any(line.startswith("26-bar EMA:") for line in lines)
@@ -0,0 +1,38 @@
+# tests/test_profiling.py
+import json
+import logging
+import pytest
+from utils import profiling
+from utils.profiling import annotate, span
+
+
+@pytest.fixture
+def timing_log(tmp_path, monkeypatch):
+    path = tmp_path / "timings.jsonl"
+    monkeypatch.setenv(profiling.TIMING_LOG_ENV, str(path))
+    monkeypatch.setattr(profiling, "_log_handler", None)
+    level, propagate = profiling.logger.level, profiling.logger.propagate
+    yield path
+    if profiling._log_handler is not None:
+        profiling.logger.removeHandler(profiling._log_handler)
+        profiling._log_handler.close()
+    profiling.logger.setLevel(level)
+    profiling.logger.propagate = propagate
+
+
+def test_spans_are_written_as_json_lines_when_enabled(timing_log):
+    assert profiling.enable_timing_log_from_env() is not None
+    assert profiling.enable_timing_log_from_env() is profiling._log_handler  # Installed once
+    with span("fetch", ticker="TEST"):
+        annotate(rows=10)
+    lines = timing_log.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert (record["name"], record["ticker"], record["rows"]) == ("fetch", "TEST", 10)
+
+
+def test_nothing_is_logged_without_the_switch(monkeypatch):
+    monkeypatch.delenv(profiling.TIMING_LOG_ENV, raising=False)
+    monkeypatch.setattr(profiling, "_log_handler", None)
+    assert profiling.enable_timing_log_from_env() is None
+    assert not profiling.logger.isEnabledFor(logging.INFO) or profiling.logger.handlers
@@ -0,0 +1,51 @@
+# tests/test_prompt_encoding.py
+import pytest
+from benchmarks.fakes import FakeLLMClient
+from benchmarks.synthetic import make_intraday, make_ohlcv
+from utils.analysis import analyze_candlestick_patterns, build_pattern_description
+from utils.indicators import calculate_technical_indicators
+from utils.prompt_encoding import FORMATS, _timestamps, build_candle_payload, estimate_tokens
+
+
+def _rows(payload):
+    """Encoded candle rows, without the summary, header and base lines"""
+    lines = payload.text.splitlines()
+    return lines[-payload.bars:]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+@pytest.mark.parametrize("budget", [300, 800, 1500])
+@pytest.mark.parametrize("intraday", [False, True])
+def test_payload_fits_the_budget_and_keeps_the_newest_bars(fmt, budget, intraday):
+    df = make_intraday(7, "5min") if intraday else make_ohlcv(1000)
+    df = calculate_technical_indicators(df, cache=False)
+    payload = build_candle_payload(df, fmt=fmt, token_budget=budget)
+    assert payload.tokens == estimate_tokens(payload.text) <= budget
+    assert 5 < payload.bars < len(df)
+
+    dates = _timestamps(df.index)
+    rows = _rows(payload)
+    assert rows[-1].startswith(dates[-1])
+    assert rows[0].startswith(dates[-payload.bars])
+
+
+def test_bigger_budgets_fit_more_bars():
+    df = make_ohlcv(1000)
+    bars = [build_candle_payload(df, token_budget=budget).bars for budget in (300, 800, 1500)]
+    assert bars == sorted(bars) and len(set(bars)) == 3
+
+
+def test_short_histories_are_sent_whole():
+    df = make_ohlcv(30)
+    assert build_candle_payload(df, token_budget=1500).bars == 30
+
+
+def test_token_budget_reaches_the_prompt():
+    df = calculate_technical_indicators(make_ohlcv(500), cache=False)
+    small = build_pattern_description(df, "5y", token_budget=300)
+    large = build_pattern_description(df, "5y", token_budget=1500)
+    assert estimate_tokens(small) < estimate_tokens(large)
+
+    client = FakeLLMClient()
+    analyze_candlestick_patterns(client, df, "5y", cache=False, prescreen=False, shared=False, token_budget=300)
+    assert client.last_messages[-1]["content"] == small
@@ -0,0 +1,41 @@
+# tests/test_resample.py
+import pandas as pd
+from benchmarks.synthetic import make_intraday
+from utils.fetch_scheduler import FetchRecorder
+from utils.resample import resample_bars
+
+
+def _times(index):
+    return sorted({f"{ts:%H:%M}" for ts in index})
+
+
+def test_window_starting_mid_session_keeps_session_bins():
+    bars = make_intraday(3, "5min")
+    window = bars[bars.index >= bars.index[19]]  # Starts at 11:05 on the first day
+    assert f"{window.index[0]:%H:%M}" == "11:05"
+
+    quarter = resample_bars(window, "15m", "5m")
+    assert _times(quarter.index)[:2] == ["09:30", "09:45"]
+    assert all(ts.minute in (0, 15, 30, 45) for ts in quarter.index)
+    hourly = resample_bars(window, "60m", "5m")
+    assert _times(hourly.index)[:2] == ["09:30", "10:30"]
+    assert all(ts.minute == 30 for ts in hourly.index)
+    # The mid-session bins match those of the full window
+    full = resample_bars(bars, "60m", "5m")
+    assert full.loc[hourly.index[1]:].equals(hourly.loc[hourly.index[1]:])
+
+
+def test_partial_session_uses_the_given_open():
+    bars = make_intraday(1, "5min")
+    tail = bars[bars.index >= bars.index[19]]
+    hourly = resample_bars(tail, "60m", "5m", open_time=pd.Timedelta(hours=9, minutes=30))
+    assert f"{hourly.index[0]:%H:%M}" == "10:30"  # The 10:30 bin, partially covered
+    assert hourly.index[1:].equals(resample_bars(bars, "60m", "5m").index[2:])
+
+
+def test_replay_resamples_on_session_bins(tmp_path):
+    bars = make_intraday(3, "5min")
+    recorder = FetchRecorder(str(tmp_path))
+    recorder.record("TEST", "5m", bars[bars.index >= bars.index[19]], start=bars.index[19])
+    replayed = recorder.replay("TEST", "15m", period="5d")
+    assert all(ts.minute in (0, 15, 30, 45) for ts in replayed.index)
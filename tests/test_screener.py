@@ -0,0 +1,100 @@
+# tests/test_screener.py
+import numpy as np
+import pytest
+from benchmarks.synthetic import make_intraday, make_ohlcv, make_panel
+from utils import screener as screener_module
+from utils.indicators import calculate_technical_indicators
+from utils.screener import Screener
+
+
+def _assert_rows_match_indicators(screener, frames):
+    for ticker, df in frames.items():
+        expected = calculate_technical_indicators(df).iloc[-1]
+        row = screener.table.loc[ticker]
+        for column in (*screener.indicators, "Close"):
+            assert row[column] == pytest.approx(expected[column], rel=1e-9), (ticker, column)
+        assert not row["Stale"]
+
+
+def test_daily_rows_match_calculate_technical_indicators():
+    frames = make_panel(5, 300)
+    screener = Screener("1y")
+    assert screener.update(frames) == list(frames)
+    _assert_rows_match_indicators(screener, frames)
+
+
+def test_intraday_rows_match_calculate_technical_indicators():
+    frames = {f"T{i}": make_intraday(7, seed=i) for i in range(3)}
+    screener = Screener("1d")
+    screener.update(frames)
+    assert screener.fast == "EMA12"
+    _assert_rows_match_indicators(screener, frames)
+
+
+def test_only_changed_tickers_are_recomputed():
+    frames = make_panel(3, 300)
+    screener = Screener("1y")
+    screener.update(frames)
+    assert screener.update(frames) == []
+    frames["T0001"] = make_ohlcv(301, seed=1)
+    assert screener.update(frames) == ["T0001"]
+
+
+def _frame_ending_in_a_cross(direction):
+    df = make_ohlcv(2000, seed=3)
+    indicators = calculate_technical_indicators(df)
+    above = (indicators["MA20"] > indicators["MA50"]).to_numpy()
+    crossed = np.flatnonzero(above[1:] != above[:-1]) + 1
+    last = next(i for i in crossed if i > 100 and above[i] == (direction > 0))
+    return df.iloc[:last + 1]
+
+
+def test_crosses_on_the_last_bar_are_detected():
+    frames = {"UP": _frame_ending_in_a_cross(+1), "DOWN": _frame_ending_in_a_cross(-1), "FLAT": make_ohlcv(300)}
+    screener = Screener("1y")
+    screener.update(frames)
+    assert screener.table.loc["UP", "Cross"] == 1 and screener.table.loc["DOWN", "Cross"] == -1
+    assert list(screener.screen("golden-cross").index) == ["UP"]
+    assert list(screener.screen("death-cross").index) == ["DOWN"]
+
+
+def test_query_filters_ranks_and_limits():
+    screener = Screener("1y")
+    screener.update(make_panel(20, 300))
+    table = screener.table
+    matches = screener.query("RSI < 60", rank_by="RSI", limit=5)
+    assert len(matches) <= 5 and (matches["RSI"] < 60).all()
+    assert list(matches["RSI"]) == sorted(matches["RSI"])
+    assert list(matches.index) == list(table[table["RSI"] < 60].sort_values("RSI").index[:5])
+    assert set(screener.query(tickers=["t0001", "T0002"]).index) == {"T0001", "T0002"}
+    with pytest.raises(ValueError, match="Unknown screen"):
+        screener.screen("sideways")
+
+
+def test_table_survives_a_restart(tmp_path):
+    frames = make_panel(4, 300)
+    screener = Screener("1y", root=str(tmp_path))
+    screener.update(frames)
+    reloaded = Screener("1y", root=str(tmp_path))
+    assert reloaded.table.equals(screener.table)
+    assert reloaded.update(frames) == []
+
+
+def test_failed_refresh_flags_rows_stale_until_they_update(tmp_path, monkeypatch):
+    frames = make_panel(3, 300)
+    screener = Screener("1y", root=str(tmp_path))
+    screener.update(frames)
+
+    monkeypatch.setattr(
+        screener_module, "fetch_batch",
+        lambda tickers, period, **options: ({t: frames[t] for t in tickers if t != "T0001"}, {"T0001": "No data"}),
+    )
+    updated, errors = screener.refresh(list(frames))
+    assert updated == [] and errors == {"T0001": "No data"}
+    assert "T0001" not in screener.query().index
+    assert "T0001" in screener.query(include_stale=True).index
+    assert Screener("1y", root=str(tmp_path)).table.loc["T0001", "Stale"]
+
+    monkeypatch.setattr(screener_module, "fetch_batch", lambda tickers, period, **options: (frames, {}))
+    screener.refresh(list(frames))
+    assert "T0001" in screener.query().index
@@ -0,0 +1,155 @@
+# tests/test_shared_cache.py
+import threading
+import time
+import pytest
+from utils import shared_cache
+from utils.shared_cache import SharedCache, SingleFlight, SQLiteBackend, _storage_key
+
+
+def _run_concurrently(func, count):
+    barrier = threading.Barrier(count)
+    results, errors = [], []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(func())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_single_flight_runs_once_and_shares_the_result():
+    flights = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results, errors = _run_concurrently(lambda: flights.do("key", compute), 10)
+    assert results == ["value"] * 10 and not errors
+    assert len(calls) == 1
+
+
+def test_single_flight_shares_exceptions_and_forgets_the_call():
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise KeyError("boom")
+
+    results, errors = _run_concurrently(lambda: flights.do("key", fail), 5)
+    assert not results and len(errors) == 5
+    assert flights.do("key", lambda: "retried") == "retried"
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+    cache = SharedCache()
+    cache.set(("bars", "A"), "value", ttl=60)
+    now[0] += 59
+    assert cache.get(("bars", "A")) == "value"
+    now[0] += 2
+    assert cache.get(("bars", "A")) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SharedCache(max_entries=2)
+    cache.set("a", "a", ttl=60)
+    cache.set("b", "b", ttl=60)
+    cache.get("a")
+    cache.set("c", "c", ttl=60)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("a", None, "c")
+
+    cache = SharedCache(max_bytes=25)
+    for key in "abc":
+        cache.set(key, key * 10, ttl=60)
+    assert cache.stats()["bytes"] <= 25 and cache.get("a") is None
+    cache.set("big", "x" * 30, ttl=60)  # Larger than the whole budget: not kept
+    assert cache.get("big") is None and cache.get("c") == "c" * 10
+
+
+def test_get_or_compute_counts_and_coalesces():
+    cache = SharedCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results, _ = _run_concurrently(lambda: cache.get_or_compute(("stage", 1), compute, 60), 8)
+    assert results == ["value"] * 8 and len(calls) == 1
+    assert cache.get_or_compute(("stage", 1), compute, 60) == "value"
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 9 and stats["hits"] >= 1
+
+
+@pytest.fixture
+def backend_path(tmp_path):
+    return str(tmp_path / "shared.sqlite3")
+
+
+def test_values_reach_other_processes_through_the_backend(backend_path):
+    SharedCache(backend=SQLiteBackend(backend_path)).set(("bars", "A"), {"rows": 3}, ttl=60)
+    assert SharedCache(backend=SQLiteBackend(backend_path)).get(("bars", "A")) == {"rows": 3}
+
+
+def _hold_lease(backend_path, key, lease_seconds=60):
+    backend = SQLiteBackend(backend_path)
+    assert backend.acquire(_storage_key(key), "other-process", lease_seconds)
+    return backend
+
+
+def test_waits_for_the_process_holding_the_lease(backend_path):
+    key = ("analysis", "k")
+    other = _hold_lease(backend_path, key)
+    cache = SharedCache(backend=SQLiteBackend(backend_path), poll_interval=0.01)
+    computed, results = [], []
+    waiter = threading.Thread(target=lambda: results.append(cache.get_or_compute(key, lambda: computed.append(1), 60)))
+    waiter.start()
+    time.sleep(0.1)
+    SharedCache(backend=other).set(key, "from the other process", ttl=60)
+    other.release(_storage_key(key), "other-process")
+    waiter.join()
+    assert results == ["from the other process"] and not computed
+
+
+def test_takes_over_when_the_lease_is_released_without_a_value(backend_path):
+    key = ("analysis", "k")
+    other = _hold_lease(backend_path, key)
+    cache = SharedCache(backend=SQLiteBackend(backend_path), poll_interval=0.01)
+    threading.Timer(0.1, other.release, (_storage_key(key), "other-process")).start()
+    assert cache.get_or_compute(key, lambda: "computed here", 60) == "computed here"
+
+
+def test_takes_over_a_lapsed_lease(backend_path):
+    key = ("analysis", "k")
+    _hold_lease(backend_path, key, lease_seconds=0.1)  # Its holder crashed
+    cache = SharedCache(backend=SQLiteBackend(backend_path), poll_interval=0.01)
+    started = time.monotonic()
+    assert cache.get_or_compute(key, lambda: "computed here", 60) == "computed here"
+    assert time.monotonic() - started >= 0.05
+    # The lease was released, so the next process can take it at once
+    assert SQLiteBackend(backend_path).acquire(_storage_key(key), "next", 60)
+
+
+def test_backend_evicts_least_recently_used_rows(backend_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+    backend = SQLiteBackend(backend_path, max_entries=2)
+    for key in ("a", "b", "c"):
+        now[0] += 1
+        backend.set(key, key, expires_at=now[0] + 60)
+    assert backend.get("a") is None
+    assert backend.get("c") == ("c", now[0] + 60)
@@ -0,0 +1,34 @@
+# tests/test_streaming_indicators.py
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_intraday, make_ohlcv
+from utils.indicators import calculate_technical_indicators
+from utils.streaming_indicators import IndicatorState
+
+
+@pytest.mark.parametrize("intraday", [False, True])
+def test_bar_by_bar_matches_batch(intraday):
+    df = make_intraday(5, "5min") if intraday else make_ohlcv(400)
+    expected = calculate_technical_indicators(df, cache=False)
+    state = IndicatorState(intraday=intraday)
+    rows = pd.DataFrame([state.update(close) for close in df["Close"]], index=df.index)
+    pd.testing.assert_frame_equal(rows, expected[rows.columns], rtol=1e-9, atol=1e-9)
+
+
+def test_from_frame_continues_where_the_frame_ends():
+    df = make_ohlcv(300, seed=3)
+    expected = calculate_technical_indicators(df, cache=False)
+    state = IndicatorState.from_frame(df.iloc[:-1])
+    row = state.update(float(df["Close"].iat[-1]))
+    for column, value in row.items():
+        assert value == pytest.approx(expected[column].iat[-1], rel=1e-9)
+
+
+def test_flat_window_has_zero_spread():
+    state = IndicatorState()
+    for _ in range(30):
+        row = state.update(100.0)
+    assert row["Std Dev"] == 0.0
+    assert row["Upper Band"] == row["Lower Band"] == 100.0
+    assert np.isnan(row["RSI"])  # No gains and no losses
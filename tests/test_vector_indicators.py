@@ -0,0 +1,39 @@
+# tests/test_vector_indicators.py
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_intraday, make_ohlcv, make_panel
+from utils.indicators import calculate_technical_indicators
+from utils.vector_indicators import DAILY_COLUMNS, INTRADAY_COLUMNS, indicator_frames
+
+
+def _reference(df):
+    return calculate_technical_indicators(df, cache=False)
+
+
+@pytest.mark.parametrize("intraday", [False, True])
+def test_matches_calculate_technical_indicators(intraday):
+    if intraday:
+        frames = {f"T{i}": make_intraday(5, "5min", seed=i) for i in range(5)}
+    else:
+        frames = make_panel(5, 300)
+    columns = INTRADAY_COLUMNS if intraday else DAILY_COLUMNS
+    result = indicator_frames(frames, intraday=intraday)
+    for ticker, df in frames.items():
+        expected = _reference(df)[columns]
+        pd.testing.assert_frame_equal(result[ticker][columns], expected, rtol=1e-9, atol=1e-9)
+
+
+def test_shorter_histories_are_left_padded():
+    frames = {"LONG": make_ohlcv(300, seed=1), "SHORT": make_ohlcv(60, seed=2)}
+    result = indicator_frames(frames)
+    assert len(result["SHORT"]) == 60
+    expected = _reference(frames["SHORT"])[DAILY_COLUMNS]
+    pd.testing.assert_frame_equal(result["SHORT"], expected, rtol=1e-9, atol=1e-9)
+
+
+def test_float32_output_stays_close():
+    frames = make_panel(3, 200)
+    result = indicator_frames(frames, dtype=np.float32)
+    expected = _reference(frames["T0001"])["MA50"].to_numpy()
+    np.testing.assert_allclose(result["T0001"]["MA50"].to_numpy(), expected, rtol=1e-5)
@@ -0,0 +1,33 @@
+# tests/test_visualization.py
+import utils.visualization as visualization_module
+from benchmarks.synthetic import make_ohlcv
+from utils.indicators import calculate_technical_indicators
+from utils.shared_cache import SharedCache
+from utils.visualization import render_charts
+
+
+def _prediction(**overrides):
+    prediction = {"ticker": "TEST", "prediction_date": "2024-06-03 00:00", "predicted_price": 101.5}
+    prediction.update(overrides)
+    return prediction
+
+
+def test_chart_cache_key_covers_the_drawn_prediction_fields(monkeypatch):
+    renders = []
+
+    def fake_render(data, prediction, dpi, fmt):
+        renders.append(dict(prediction))
+        return (f"{prediction['prediction_date']} {prediction['predicted_price']}".encode(), b"rsi")
+
+    monkeypatch.setattr(visualization_module, "_render", fake_render)
+    df = calculate_technical_indicators(make_ohlcv(200), cache=False)
+    cache = SharedCache()
+
+    first = render_charts(df, _prediction(), "1y", cache=cache)
+    assert render_charts(df, _prediction(), "1y", cache=cache) == first
+    assert len(renders) == 1
+
+    moved = render_charts(df, _prediction(prediction_date="2024-06-04 00:00"), "1y", cache=cache)
+    repriced = render_charts(df, _prediction(predicted_price=99.0), "1y", cache=cache)
+    assert len(renders) == 3
+    assert moved[0] == b"2024-06-04 00:00 101.5" and repriced[0] == b"2024-06-03 00:00 99.0"
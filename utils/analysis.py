@@ -1,57 +1,18 @@
 # utils/analysis.py
 import pandas as pd
 import numpy as np
-import streamlit as st
+from utils import notify
+from utils.profiling import annotate, timed
+from utils.data_fetcher import get_interval_and_period
+from utils.llm_cache import get_default_cache, make_key, ttl_for_interval
+from utils.prompt_encoding import DEFAULT_TOKEN_BUDGET, build_candle_payload
+from utils.shared_cache import get_default_cache as get_shared_cache
+from utils.patterns import detect_patterns, significant_patterns, describe_patterns
 
-def analyze_candlestick_patterns(client, stock_data, period):
-    """Analyze candlestick patterns using OpenAI"""
-    try:
-        if stock_data is None or len(stock_data) < 50:
-            return "Insufficient data for analysis"
+MODEL = "deepseek-chat"
+TEMPERATURE = 0.3
 
-        # Extract the latest 50 rows
-        latest_50 = stock_data.iloc[-50:]
-
-        # Convert to candlestick format
-        candles = []
-        for idx, row in latest_50.iterrows():
-            candles.append({
-                "date": idx.strftime("%Y-%m-%d"),  # Format date
-                "open": row["Open"],
-                "high": row["High"],
-                "low": row["Low"],
-                "close": row["Close"],
-                "volume": row["Volume"]
-            })
-
-        # Build description using the candles list
-        description = (
-            f"The stock data for the selected period ({period}) shows the following candlestick patterns:\n"
-            f"Last 5 candlesticks as examples:\n"
-        )
-
-        # Add formatted candlestick details
-        description += "\n".join(
-            [f"{c['date']}: Open={c['open']:.2f}, High={c['high']:.2f}, Low={c['low']:.2f}, Close={c['close']:.2f}, Volume={c['volume']}"
-             for c in candles[-5:]]  # Use the last 5 candles for context
-        )
-
-        # Add analysis instructions
-        description += (
-            "\n\nPlease analyze 5 significant candlestick patterns and provide insights considering: "
-            "\n1. Pattern strength and confirmation"
-            "\n2. Confluence with RSI/MA/Volume"
-            "\n3. Recent price action context"
-            "\nEach candlestick represents a specific time interval (e.g., 1 hour or 1 day). "            
-        )
-
-        # Send the description to OpenAI for analysis
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a Chartered Market Technician (CMT) with 20 years experience. Analyze strictly the following rules:
+SYSTEM_PROMPT = """You are a Chartered Market Technician (CMT) with 20 years experience. Analyze strictly the following rules:
                     
                     1. Pattern Analysis:
                     - Identify AT MOST 5 significant patterns in the whole trend
@@ -79,15 +40,130 @@ def analyze_candlestick_patterns(client, stock_data, period):
                     - Avoid speculation
                     - Highlight key support/resistance
                     - Mention any divergence patterns"""
-                },
-                {"role": "user", "content": description},
-            ],
-            temperature=0.3,
-        )
-
-        # Extract the analysis result
-        analysis = response.choices[0].message.content.strip()
+
+NO_PATTERNS_MESSAGE = (
+    "No significant candlestick patterns were detected in the last {bars} bars, "
+    "so no AI analysis was requested."
+)
+
+def prescreen_patterns(stock_data, recent_bars=10, min_strength=0.6):
+    """Significant locally detected patterns within the last `recent_bars` bars"""
+    patterns = detect_patterns(stock_data)
+    return significant_patterns(patterns, stock_data.index[-recent_bars:], min_strength)
+
+def build_pattern_description(stock_data, period, fmt="csv", precision=2, token_budget=DEFAULT_TOKEN_BUDGET, patterns=None):
+    """Build the user prompt describing the latest candles for `period`
+
+    As many recent bars as fit in `token_budget` are encoded in a compact
+    format (see `prompt_encoding`), preceded by a summary of the latest
+    RSI, moving averages and Bollinger band position. Patterns found by the
+    local detector are listed so the model can confirm or reject them.
+    """
+    payload = build_candle_payload(stock_data, fmt=fmt, precision=precision, token_budget=token_budget)
+    annotate(
+        prompt_format=payload.fmt,
+        prompt_bars=payload.bars,
+        payload_tokens=payload.tokens,
+        payload_build_ms=round(payload.build_seconds * 1000, 3),
+    )
+
+    # Build description using the encoded candles
+    description = (
+        f"The stock data for the selected period ({period}) shows the following candlestick patterns:\n"
+        f"Last {payload.bars} candlesticks ({payload.fmt}, oldest first):\n"
+    )
+    description += payload.text
+
+    if patterns is not None and not patterns.empty:
+        description += "\n\nPatterns flagged by a rule-based scan (confirm or reject each):\n"
+        description += describe_patterns(patterns)
+
+    # Add analysis instructions
+    description += (
+        "\n\nPlease analyze 5 significant candlestick patterns and provide insights considering: "
+        "\n1. Pattern strength and confirmation"
+        "\n2. Confluence with RSI/MA/Volume"
+        "\n3. Recent price action context"
+        "\nEach candlestick represents a specific time interval (e.g., 1 hour or 1 day). "
+    )
+    return description
+
+def build_messages(description):
+    """Chat messages for a candlestick analysis request"""
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {"role": "user", "content": description},
+    ]
+
+def _complete(client, description):
+    """One model call for `description`, recording token usage on the current span"""
+    # Send the description to OpenAI for analysis
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=build_messages(description),
+        temperature=TEMPERATURE,
+    )
+
+    # Extract the analysis result
+    analysis = response.choices[0].message.content.strip()
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        annotate(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+    return analysis
+
+@timed("analyze_candlestick_patterns")
+def analyze_candlestick_patterns(client, stock_data, period, cache=None, prescreen=True, recent_bars=10, min_strength=0.6, shared=None, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Analyze candlestick patterns using OpenAI
+
+    With `prescreen`, a local rule-based detector scans the candles first and
+    the model is only called when it finds a significant pattern in the last
+    `recent_bars` bars; the detected patterns are sent along as structured
+    input. `token_budget` caps the prompt tokens spent on the candles and
+    indicator summary. Responses are cached by a hash of the full request
+    (the shared default `LLMResponseCache` unless `cache` is given) for one
+    bar of the period's interval. Pass `cache=False` to always call the model.
+    Identical requests from concurrent sessions share one model call through
+    the process-wide `SharedCache` (or `shared`); `shared=False` disables that.
+    """
+    try:
+        if stock_data is None or len(stock_data) < 50:
+            return "Insufficient data for analysis"
+
+        patterns = None
+        if prescreen:
+            patterns = prescreen_patterns(stock_data, recent_bars, min_strength)
+            annotate(patterns=len(patterns))
+            if patterns.empty:
+                return NO_PATTERNS_MESSAGE.format(bars=recent_bars)
+
+        description = build_pattern_description(stock_data, period, token_budget=token_budget, patterns=patterns)
+
+        if cache is None:
+            cache = get_default_cache()
+        key = make_key(MODEL, TEMPERATURE, SYSTEM_PROMPT, description)
+        if cache:
+            cached = cache.get(key)
+            annotate(llm_cache="hit" if cached is not None else "miss")
+            if cached is not None:
+                return cached
+
+        interval, _ = get_interval_and_period(period)
+        if shared is None:
+            shared = get_shared_cache()
+        if shared:
+            analysis = shared.get_or_compute(
+                ("analysis", key),
+                lambda: _complete(client, description),
+                ttl_for_interval(interval),
+            )
+        else:
+            analysis = _complete(client, description)
+        if cache:
+            cache.set(key, analysis, ttl_for_interval(interval))
         return analysis
     except Exception as e:
-        st.error(f"Error in candlestick pattern analysis: {str(e)}")
+        notify.error(f"Error in candlestick pattern analysis: {str(e)}")
         return "Unable to analyze candlestick patterns."
@@ -0,0 +1,139 @@
+# utils/bar_cache.py
+import os
+import pandas as pd
+from utils.data_fetcher import scheduled_source
+from utils.files import atomic_path, safe_name
+from utils.profiling import annotate
+from utils.resample import period_to_offset, resample_bars
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "bars")
+
+# How long a stored series is served without asking the source for new bars
+INTERVAL_DURATIONS = {
+    "1m": pd.Timedelta(minutes=1),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "60m": pd.Timedelta(hours=1),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+}
+
+
+class BarCache:
+    """On-disk Parquet store of OHLCV bars keyed by (ticker, interval)
+
+    A repeat request only asks the source for bars after the last stored
+    timestamp and merges them in. Stored series are trimmed to the longest
+    lookback requested for the interval (see `get_interval_and_period`), so
+    files never grow past what the interval serves.
+    The source is any callable with the signature of
+    `data_fetcher.yfinance_source`, so a fake source can be plugged in offline;
+    the default goes through the rate-limited `FetchScheduler`.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, source=None, max_staleness=pd.Timedelta(hours=1)):
+        self.root = root
+        self.source = source or scheduled_source
+        self.max_staleness = max_staleness
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, ticker, interval):
+        return os.path.join(self.root, f"{safe_name(ticker)}__{interval}.parquet")
+
+    def load(self, ticker, interval):
+        """Return the stored bars for (ticker, interval), or None if not cached"""
+        path = self.path(ticker, interval)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # A truncated or corrupt file is treated as a miss and rebuilt
+            return None
+
+    def save(self, ticker, interval, df):
+        with atomic_path(self.path(ticker, interval)) as tmp_path:
+            df.to_parquet(tmp_path)
+
+    def invalidate(self, ticker, interval):
+        path = self.path(ticker, interval)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _is_fresh(self, stored, interval, now):
+        fetched_at = stored.attrs.get("fetched_at")
+        if fetched_at is None:
+            return False
+        ttl = min(INTERVAL_DURATIONS.get(interval, self.max_staleness), self.max_staleness)
+        return now - pd.Timestamp(fetched_at) < ttl
+
+    def get(self, ticker, interval, lookback):
+        """Return bars covering `lookback` (e.g. "7d"), fetching only what is missing"""
+        now = pd.Timestamp.now(tz="UTC")
+        window_start = now - period_to_offset(lookback)
+        stored = self.load(ticker, interval)
+
+        # The store keeps the longest window requested for this interval, so a
+        # short request (1y) never truncates history a long one (5y) paid for
+        keep_lookback = lookback
+        if stored is not None and stored.attrs.get("lookback"):
+            if now - period_to_offset(stored.attrs["lookback"]) < window_start:
+                keep_lookback = stored.attrs["lookback"]
+        store_start = now - period_to_offset(keep_lookback)
+
+        covered_from = stored.attrs.get("covered_from") if stored is not None else None
+        if stored is None or stored.empty or covered_from is None or pd.Timestamp(covered_from) > window_start:
+            # Cold cache, or the stored series does not reach back far enough
+            annotate(bar_cache="miss")
+            df = self.source(ticker, interval, period=lookback)
+            covered_from = window_start
+        elif self._is_fresh(stored, interval, now):
+            annotate(bar_cache="hit")
+            return self._trim(stored, window_start)
+        else:
+            # Refetch from the last stored bar inclusive, since that bar may still have been forming
+            new_bars = self.source(ticker, interval, start=stored.index[-1])
+            annotate(bar_cache="incremental", new_bars=0 if new_bars is None else len(new_bars))
+            df = pd.concat([stored, new_bars]) if new_bars is not None and len(new_bars) else stored
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+            covered_from = pd.Timestamp(covered_from)
+
+        if df is None or df.empty:
+            return df
+
+        df = self._trim(df, store_start)
+        df.attrs["covered_from"] = max(covered_from, store_start).isoformat()
+        df.attrs["lookback"] = keep_lookback
+        df.attrs["fetched_at"] = now.isoformat()
+        self.save(ticker, interval, df)
+        return self._trim(df, window_start)
+
+    def get_resampled(self, ticker, interval, lookback, base_interval):
+        """Return `interval` bars built from the stored `base_interval` series
+
+        Lets one fine-grained download (e.g. 5m) serve every coarser interval
+        that divides evenly into it, instead of storing a series per interval.
+        """
+        base = self.get(ticker, base_interval, lookback)
+        annotate(resampled_from=base_interval)
+        if base is None or base.empty:
+            return base
+        return resample_bars(base, interval, base_interval)
+
+    @staticmethod
+    def _trim(df, window_start):
+        if df.index.tz is None:
+            window_start = window_start.tz_localize(None)
+        return df[df.index >= window_start]
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Return the process-wide cache used by `fetch_stock_data`"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BarCache(os.environ.get("CMA_BAR_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _default_cache
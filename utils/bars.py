@@ -0,0 +1,165 @@
+# utils/bars.py
+import json
+import mmap
+import os
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from utils.files import atomic_path
+
+# The only columns the pipeline reads (indicators, patterns, prompts, mplfinance)
+BAR_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+
+MAGIC = b"CMABARS1"
+ALIGNMENT = 64  # Column blocks start on cache-line boundaries
+
+DEFAULT_SHARED_BARS_DIR = os.path.join(".cache", "shared_bars")
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class Bars:
+    """Slim columnar OHLCV container
+
+    Timestamps are int64 nanoseconds since the epoch (UTC) with the timezone
+    kept once, prices are float32 by default and only `BAR_COLUMNS` are kept,
+    which is under half the memory of a yfinance frame. Slicing returns views,
+    and `open` maps a file written by `save` without reading it into memory;
+    mapped bars are read-only and pickle as a reference to their file.
+    """
+
+    __slots__ = ("timestamps", "columns", "tz", "attrs", "path", "_buffer")
+
+    def __init__(self, timestamps, columns, tz=None, attrs=None, path=None, _buffer=None):
+        self.timestamps = timestamps
+        self.columns = columns
+        self.tz = tz
+        self.attrs = dict(attrs or {})
+        self.path = path  # File the bars are mapped from, if all of it
+        self._buffer = _buffer  # Keeps a backing mmap alive while views exist
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float32, volume_dtype=np.int64):
+        """Build from a pandas frame, keeping only the OHLCV columns"""
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        timestamps = (index.tz_convert("UTC").tz_localize(None) if tz else index).asi8.astype(np.int64)
+        columns = {}
+        for column in BAR_COLUMNS:
+            if column not in df:
+                continue
+            column_dtype = dtype if column in PRICE_COLUMNS else volume_dtype
+            columns[column] = df[column].to_numpy(dtype=column_dtype)
+        return cls(timestamps, columns, tz=tz, attrs=df.attrs)
+
+    def to_frame(self, dtype=None):
+        """Pandas frame for `calculate_technical_indicators` and mplfinance
+
+        Columns are handed to pandas without copying unless `dtype` asks for
+        a wider price type (e.g. np.float64 for exact parity with yfinance).
+        """
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"))
+        if self.tz:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        data = {
+            column: values.astype(dtype) if dtype is not None and column in PRICE_COLUMNS else values
+            for column, values in self.columns.items()
+        }
+        df = pd.DataFrame(data, index=index, copy=False)
+        df.attrs = dict(self.attrs)
+        return df
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __reduce__(self):
+        if self.path is not None:
+            return Bars.open, (self.path,)  # Other processes map the same file
+        return Bars, (self.timestamps, self.columns, self.tz, self.attrs)
+
+    def __getitem__(self, item):
+        """Row slice as a view sharing the same buffers"""
+        if not isinstance(item, slice):
+            raise TypeError("Bars only supports slicing rows, e.g. bars[-70:]")
+        return Bars(
+            self.timestamps[item],
+            {column: values[item] for column, values in self.columns.items()},
+            tz=self.tz,
+            attrs=self.attrs,
+            _buffer=self._buffer,
+        )
+
+    def tail(self, n):
+        return self[-n:] if n else self[len(self):]
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def save(self, path):
+        """Write a file `open` can memory-map: magic, header length, JSON header, aligned columns"""
+        arrays = {"timestamps": self.timestamps, **self.columns}
+        layout = {}
+        offset = 0  # Relative to the first column block, so the header never sizes itself
+        for name, values in arrays.items():
+            layout[name] = {"dtype": values.dtype.str, "offset": offset}
+            offset = _aligned(offset + values.nbytes)
+        header = {"rows": len(self), "tz": self.tz, "attrs": self.attrs, "columns": layout}
+        header_bytes = json.dumps(header, default=str).encode("utf-8")
+        data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+        with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header_bytes).to_bytes(8, "little"))
+            f.write(header_bytes)
+            for name, values in arrays.items():
+                f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+                f.write(np.ascontiguousarray(values).tobytes())
+
+    @classmethod
+    def open(cls, path):
+        """Map a file written by `save`; columns are read-only views into the mapping"""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"{path} is empty")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a bar file")
+        header_length = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 8], "little")
+        header_start = len(MAGIC) + 8
+        header = json.loads(buffer[header_start:header_start + header_length])
+        data_start = _aligned(header_start + header_length)
+        rows = header["rows"]
+        arrays = {
+            name: np.frombuffer(buffer, dtype=np.dtype(spec["dtype"]), count=rows, offset=data_start + spec["offset"])
+            for name, spec in header["columns"].items()
+        }
+        timestamps = arrays.pop("timestamps")
+        return cls(timestamps, arrays, tz=header["tz"], attrs=header["attrs"], path=path, _buffer=buffer)
+
+
+def map_shared(bars, name, root=None, max_age=3600):
+    """Write `bars` to a new file under `root` and return them memory-mapped
+
+    Processes handed the mapped bars (e.g. through the shared cache's SQLite
+    backend) map the same file, so they share its pages instead of each
+    holding a copy, and nobody can modify them in place. Files older than
+    `max_age` seconds, which no cache entry refers to any more, are removed.
+    `root` defaults to `DEFAULT_SHARED_BARS_DIR`.
+    """
+    root = root or DEFAULT_SHARED_BARS_DIR
+    os.makedirs(root, exist_ok=True)
+    cutoff = time.time() - max_age
+    for entry in os.scandir(root):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Removed by another process, or still mapped on Windows
+    path = os.path.join(root, f"{name}__{uuid.uuid4().hex}.bars")
+    bars.save(path)
+    return Bars.open(path)
@@ -0,0 +1,109 @@
+# utils/batch.py
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from utils.data_fetcher import load_stock_data, InsufficientDataError
+from utils.fetch_scheduler import BATCH, RateLimiter, fetch_priority
+from utils.indicators import is_intraday
+from utils.vector_indicators import indicator_frames
+
+
+@dataclass
+class BatchResult:
+    """Per-ticker frames and errors from a batch run, with timing for pool sizing"""
+
+    frames: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    fetch_seconds: float = 0.0
+    indicator_seconds: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self):
+        """Tickers processed (successfully or not) per second of wall time"""
+        total = len(self.frames) + len(self.errors)
+        return total / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def panel(self):
+        """All frames stacked into one frame with a (ticker, date) MultiIndex"""
+        if not self.frames:
+            return pd.DataFrame()
+        return pd.concat(self.frames, names=["Ticker", "Date"])
+
+
+def _fetch_with_retry(ticker, period, limiter, retries, backoff, cache):
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire(BATCH)
+        try:
+            # Interactive requests are served ahead of the batch by the fetch scheduler
+            with fetch_priority(BATCH):
+                return load_stock_data(ticker, period, cache=cache)
+        except InsufficientDataError as e:
+            # A short but non-empty history is a property of the symbol, not throttling
+            if e.rows > 0 or attempt == retries:
+                raise
+        except Exception:
+            if attempt == retries:
+                raise
+        # Exponential backoff with full jitter so retries from the pool don't synchronize
+        time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+
+def fetch_batch(tickers, period="1y", max_workers=8, rate_limit=None, retries=0, backoff=1.0, cache=None):
+    """Fetch many tickers concurrently, isolating failures per ticker
+
+    Returns `(frames, errors)`, two dicts keyed by ticker. A failing symbol is
+    recorded in `errors` and never aborts the rest of the batch. Downloads
+    are rate limited and retried by the `FetchScheduler` at batch priority;
+    `rate_limit` and `retries` add a tighter limit or whole-ticker retries.
+    """
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    frames, errors = {}, {}
+    tickers = list(dict.fromkeys(tickers))  # Drop duplicates, keep order
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_fetch_with_retry, ticker, period, limiter, retries, backoff, cache): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                frames[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = str(e)
+    # Keep the caller's ticker order regardless of completion order
+    frames = {ticker: frames[ticker] for ticker in tickers if ticker in frames}
+    return frames, errors
+
+
+def analyze_batch(tickers, period="1y", dtype=np.float64, **fetch_options):
+    """Fetch a watchlist concurrently and calculate indicators for every ticker
+
+    Indicators for the whole watchlist are computed in one stacked pass by
+    `vector_indicators`, with the same columns as `calculate_technical_indicators`.
+    """
+    start = time.perf_counter()
+    frames, errors = fetch_batch(tickers, period, **fetch_options)
+    fetched = time.perf_counter()
+
+    result = BatchResult(errors=errors, fetch_seconds=fetched - start)
+    if frames:
+        try:
+            # Every ticker in the batch shares the interval picked for `period`
+            intraday = is_intraday(next(iter(frames.values())))
+            columns = indicator_frames(frames, intraday=intraday, dtype=dtype)
+            for ticker, df in frames.items():
+                result.frames[ticker] = pd.concat([df, columns[ticker]], axis=1)
+        except Exception as e:
+            for ticker in frames:
+                result.errors[ticker] = f"Indicator calculation failed: {e}"
+
+    end = time.perf_counter()
+    result.indicator_seconds = end - fetched
+    result.elapsed = end - start
+    return result
@@ -1,7 +1,20 @@
 # utils/data_fetcher.py
-import yfinance as yf
+import numpy as np
 import pandas as pd
-import streamlit as st
+from utils import notify
+from utils.bars import Bars, map_shared
+from utils.files import safe_name
+from utils.profiling import annotate, timed
+from utils.resample import interval_to_timedelta, trim_to_period
+from utils.shared_cache import get_default_cache as get_shared_cache
+
+# Intervals built from a finer cached series instead of downloaded separately,
+# so the 1d and 5d periods share one 5m download. Yahoo only serves 5m bars for
+# the last 60 days, which rules out deriving 60m (3mo) from them.
+DERIVED_INTERVALS = {"15m": "5m"}
+
+# Longest time concurrent sessions share one fetched frame (shorter for 5m bars)
+SHARED_BARS_TTL = 5 * 60
 
 def get_interval_and_period(period):
     """Dynamically determine interval based on requested period"""
@@ -15,29 +28,100 @@ def get_interval_and_period(period):
     }
     return interval_rules.get(period, ("1d", "1y"))  # Default fallback
 
-def fetch_stock_data(ticker, period="1y"):
-    """Fetch historical stock data with adaptive intervals"""
+def yfinance_source(ticker, interval, period=None, start=None):
+    """Download bars from Yahoo Finance, either a whole period or everything after `start`"""
+    import yfinance as yf  # Deferred: importing yfinance costs about half a second
+    stock = yf.Ticker(ticker)
+    if start is not None:
+        return stock.history(start=start, interval=interval)
+    return stock.history(period=period, interval=interval)
+
+def scheduled_source(ticker, interval, period=None, start=None):
+    """`yfinance_source` through the process-wide `FetchScheduler` (rate limit, retries, dedup, record/replay)"""
+    from utils.fetch_scheduler import get_default_scheduler
+    return get_default_scheduler().fetch(ticker, interval, period=period, start=start)
+
+class InsufficientDataError(ValueError):
+    """Raised when the source returns fewer bars than the analysis needs"""
+
+    def __init__(self, rows):
+        super().__init__(f"Insufficient data ({rows} points). Try a longer period.")
+        self.rows = rows
+
+def load_stock_data(ticker, period="1y", cache=None):
+    """Load bars for `ticker`, raising instead of reporting to the UI
+
+    Bars are served from the local `BarCache` (the shared default one unless
+    `cache` is given) and only bars after the last stored timestamp are
+    downloaded. Pass `cache=False` to always download the whole window.
+    Downloads go through the `FetchScheduler`; in replay mode the bar cache
+    is skipped.
+    """
+    # Get interval dynamically from period
+    interval, adjusted_period = get_interval_and_period(period)
+    if cache is None:
+        from utils.fetch_scheduler import get_default_scheduler
+        if get_default_scheduler().replaying:
+            cache = False  # Recorded bars are served as recorded, not windowed to today by the bar cache
+    if cache is False:
+        df = scheduled_source(ticker, interval, period=adjusted_period)  # Uses dynamic interval
+    else:
+        if cache is None:
+            from utils.bar_cache import get_default_cache
+            cache = get_default_cache()
+        base_interval = DERIVED_INTERVALS.get(interval)
+        if base_interval is not None:
+            df = cache.get_resampled(ticker, interval, adjusted_period, base_interval)
+        else:
+            df = cache.get(ticker, interval, adjusted_period)
+
+    if df is None:
+        raise InsufficientDataError(0)
+
+    # Filter to only keep data within the original requested period
+    df = trim_to_period(df, period)
+
+    # Final check for sufficient data
+    if len(df) < 50:
+        raise InsufficientDataError(len(df))
+
+    df.index = pd.to_datetime(df.index)
+    # Interval travels with the bars so consumers never infer it from the index,
+    # and ticker/interval give downstream caches (indicators) a cheap identity
+    df.attrs.update(ticker=ticker, interval=interval, period=period)
+    annotate(ticker=ticker, period=period, rows=len(df), bytes=int(df.memory_usage().sum()))
+    return df
+
+def _shared_bars(ticker, period, cache):
+    bars = Bars.from_frame(load_stock_data(ticker, period, cache=cache), dtype=np.float64, volume_dtype=None)
+    return map_shared(bars, f"{safe_name(ticker)}__{period}")
+
+@timed("fetch_stock_data")
+def fetch_stock_data(ticker, period="1y", cache=None, shared=None):
+    """Fetch historical stock data with adaptive intervals
+
+    Sessions asking for the same ticker and period share one fetch through
+    the process-wide `SharedCache` (or `shared`); pass `shared=False` to skip it.
+    The shared entry is slim `Bars` (OHLCV only, float64 prices so values are
+    unchanged) memory-mapped from a file, and each caller gets its own frame
+    over the same read-only columns: modifying them in place raises.
+    """
     try:
-        # Get interval dynamically from period
-        interval, adjusted_period = get_interval_and_period(period)        
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=adjusted_period, interval=interval)  # Uses dynamic interval
-        
-        # Filter to only keep data within the original requested period
-        if period == "1d":
-            df = df.last("1D")
-        elif period == "5d":
-            df = df.last("5D")
-        # ... similar logic for other periods
-        
-        # Final check for sufficient data
-        if len(df) < 50:
-            st.warning(f"Insufficient data ({len(df)} points). Try a longer period.")
-            return None
-            
-        df.index = pd.to_datetime(df.index)
-        return df
-        
+        if shared is None:
+            shared = get_shared_cache()
+        if not shared:
+            return load_stock_data(ticker, period, cache=cache)
+        interval, _ = get_interval_and_period(period)
+        ttl = min(interval_to_timedelta(interval).total_seconds(), SHARED_BARS_TTL)
+        bars = shared.get_or_compute(
+            ("bars", ticker.upper(), period),
+            lambda: _shared_bars(ticker, period, cache),
+            ttl,
+        )
+        return bars.to_frame()
+    except InsufficientDataError as e:
+        notify.warning(str(e))
+        return None
     except Exception as e:
-        st.error(f"Error fetching data: {e}")
+        notify.error(f"Error fetching data: {e}")
         return None
@@ -0,0 +1,262 @@
+# utils/fetch_scheduler.py
+import contextvars
+import glob
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+from utils.data_fetcher import yfinance_source
+from utils.files import atomic_path, safe_name
+from utils.profiling import annotate
+from utils.resample import can_resample, interval_to_timedelta, resample_bars, trim_to_period
+from utils.shared_cache import SingleFlight
+
+# Lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+_priority = contextvars.ContextVar("fetch_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def fetch_priority(priority):
+    """Run the block's fetches at `priority` (BATCH for watchlist runs, INTERACTIVE otherwise)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts up to `burst`
+
+    Callers waiting for a token are served by `priority`, then arrival, so an
+    interactive request never queues behind a batch backlog.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self._ready = threading.Condition(self.lock)
+        self._waiting = []  # Heap of (priority, arrival)
+        self._arrivals = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=INTERACTIVE):
+        with self._ready:
+            ticket = (priority, next(self._arrivals))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    first = self._waiting[0] == ticket
+                    if first and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    # Only the first in line times its wait; the rest are woken when it leaves
+                    self._ready.wait((1 - self.tokens) / self.rate if first else None)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._ready.notify_all()
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider signals throttling"""
+        with self._ready:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when no recorded response covers a request"""
+
+
+class FetchRecorder:
+    """Raw source responses on disk, one Parquet file per request
+
+    Replay returns the recorded response to the same request when there is
+    one, else serves it from the recordings of its ticker and interval
+    merged together, so incremental (`start=`) requests and periods other
+    than the recorded one are answered too. Coarser intervals are resampled
+    from a finer recording when there is none at the interval itself.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, ticker, interval, period=None, start=None):
+        request = json.dumps([ticker.upper(), interval, period, str(start) if start is not None else None])
+        digest = hashlib.sha256(request.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, f"{safe_name(ticker)}__{interval}__{digest}.parquet")
+
+    def record(self, ticker, interval, df, period=None, start=None):
+        with atomic_path(self.path(ticker, interval, period, start)) as tmp_path:
+            df.to_parquet(tmp_path)
+
+    def _recorded(self, ticker):
+        """Recording paths for `ticker` grouped by interval"""
+        by_interval = {}
+        for path in glob.glob(os.path.join(self.root, f"{glob.escape(safe_name(ticker))}__*__*.parquet")):
+            interval = os.path.basename(path).split("__")[1]
+            by_interval.setdefault(interval, []).append(path)
+        return by_interval
+
+    def _series(self, ticker, interval):
+        recorded = self._recorded(ticker)
+        source_interval = interval
+        if interval not in recorded:
+            finer = [i for i in recorded if can_resample(i, interval)]
+            if not finer:
+                return None
+            source_interval = max(finer, key=interval_to_timedelta)
+        frames = [pd.read_parquet(path) for path in sorted(recorded[source_interval], key=os.path.getmtime)]
+        non_empty = [df for df in frames if len(df)]
+        if not non_empty:
+            return frames[0]  # Only empty responses were recorded; replay one
+        series = pd.concat(non_empty)
+        series = series[~series.index.duplicated(keep="last")].sort_index()
+        if source_interval != interval:
+            series = resample_bars(series, interval, source_interval)
+            series.attrs = {}
+        return series
+
+    def replay(self, ticker, interval, period=None, start=None):
+        """Recorded bars for the request, as the source would have returned them"""
+        path = self.path(ticker, interval, period, start)
+        if os.path.exists(path):
+            return pd.read_parquet(path)  # The same request was recorded
+        series = self._series(ticker, interval)
+        if series is None:
+            raise ReplayMissError(f"No recorded {interval} bars for {ticker} in {self.root}")
+        if start is not None:
+            start = pd.Timestamp(start)
+            if series.index.tz is not None and start.tz is None:
+                start = start.tz_localize(series.index.tz)
+            return series[series.index >= start]
+        return trim_to_period(series, period) if period else series
+
+
+class FetchScheduler:
+    """Every download from the market data source goes through here
+
+    Requests wait for a token from a priority-aware `RateLimiter`, identical
+    requests in flight (same ticker, interval, period and start) share one
+    download, and failures or empty period responses (how throttling shows
+    up) are retried with jittered exponential backoff. Only failures drain
+    the shared bucket; an empty response can also mean a bad symbol, which
+    must not slow down everyone else. With a `recorder`,
+    `mode="record"` saves every raw response and `mode="replay"` answers
+    from the recordings without touching the source.
+    """
+
+    def __init__(self, source=yfinance_source, rate=2.0, burst=None, retries=3, backoff=1.0, max_backoff=30.0,
+                 recorder=None, mode=None):
+        if mode not in (None, "record", "replay"):
+            raise ValueError(f"Unknown fetch mode: {mode}")
+        if mode is not None and recorder is None:
+            raise ValueError(f"The {mode} mode needs a recorder")
+        self.source = source
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.recorder = recorder
+        self.mode = mode
+        self._flights = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "downloads": 0, "retries": 0, "replayed": 0}
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def fetch(self, ticker, interval, period=None, start=None, priority=None):
+        """Bars for one request, with the signature of `yfinance_source`
+
+        `priority` defaults to the one set by `fetch_priority` (INTERACTIVE
+        unless a batch run says otherwise).
+        """
+        self._count("requests")
+        if priority is None:
+            priority = _priority.get()
+        if self.replaying:
+            self._count("replayed")
+            annotate(fetch="replay")
+            return self.recorder.replay(ticker, interval, period=period, start=start)
+        key = (ticker.upper(), interval, period, str(start) if start is not None else None)
+        return self._flights.do(key, lambda: self._download(ticker, interval, period, start, priority))
+
+    def _download(self, ticker, interval, period, start, priority):
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire(priority)
+            self._count("downloads")
+            try:
+                df = self.source(ticker, interval, period=period, start=start)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                if self.limiter is not None:
+                    self.limiter.drain()  # Slow every caller down, not just this one
+            else:
+                # An empty answer for a whole period is usually throttling; after
+                # a `start` it can just mean there are no new bars yet
+                if (df is not None and len(df)) or start is not None or attempt == self.retries:
+                    if self.mode == "record" and df is not None:
+                        self.recorder.record(ticker, interval, df, period=period, start=start)
+                    annotate(fetch_attempts=attempt + 1)
+                    return df
+                # Retry without draining: the empty answer may only mean a bad symbol
+            self._count("retries")
+            # Full jitter so concurrent retries don't synchronize
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """Return the process-wide scheduler every fetch goes through
+
+    `CMA_FETCH_RATE` sets the requests per second (default 2). Setting
+    `CMA_FETCH_RECORD` or `CMA_FETCH_REPLAY` to a directory records raw
+    responses there or serves them back offline.
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            record_dir = os.environ.get("CMA_FETCH_RECORD")
+            replay_dir = os.environ.get("CMA_FETCH_REPLAY")
+            mode, recorder = None, None
+            if replay_dir:
+                mode, recorder = "replay", FetchRecorder(replay_dir)
+            elif record_dir:
+                mode, recorder = "record", FetchRecorder(record_dir)
+            _default_scheduler = FetchScheduler(
+                rate=float(os.environ.get("CMA_FETCH_RATE", 2.0)), recorder=recorder, mode=mode
+            )
+    return _default_scheduler
@@ -0,0 +1,26 @@
+# utils/files.py
+import os
+import re
+import uuid
+from contextlib import contextmanager
+
+
+def safe_name(ticker):
+    """`ticker` upper-cased with anything unsafe in a file name (^, /, =) replaced by _"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", ticker.upper())
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a unique temporary path to write, then move it over `path` in one step
+
+    Concurrent readers never see a partial file and a crash never leaves a
+    half-written one behind; if the block fails the temporary file is removed.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,38 +1,138 @@
 # utils/indicators.py
 import pandas as pd
 import numpy as np
-import streamlit as st
+from utils import notify
+from utils.lru import LRUCache
+from utils.profiling import annotate, timed
+from utils.resample import is_intraday_interval
+from utils.shared_cache import SingleFlight
 
-#Cache the calculate_technical_indicators function
-@st.cache_data
-def calculate_technical_indicators(df):
-    """Calculate technical indicators including Bollinger Bands"""
+MAX_CACHED_INDICATORS = 128
+MAX_CACHED_INDICATOR_BYTES = 64 * 1024 * 1024
+INTERVAL_SAMPLE_BARS = 20  # Bars inspected to guess the interval of untagged frames
+
+
+def _columns_nbytes(columns):
+    return int(columns.memory_usage(index=False).sum())
+
+
+class IndicatorCache(LRUCache):
+    """Bounded LRU of computed indicator columns, keyed by `indicator_cache_key`"""
+
+    def __init__(self, max_entries=MAX_CACHED_INDICATORS, max_bytes=MAX_CACHED_INDICATOR_BYTES):
+        super().__init__(max_entries, max_bytes, sizeof=_columns_nbytes)
+
+
+indicator_cache = IndicatorCache()
+_indicator_flights = SingleFlight()
+
+
+def indicator_cache_key(df):
+    """Cheap identity of a bar series, or None when it can't be identified
+
+    Built from the `ticker`/`interval` attrs the fetch layer sets, the first and
+    last bar, the row count, the last close (which changes while the last bar
+    is still forming) and the bar cache's `fetched_at` version.
+    """
+    ticker = df.attrs.get("ticker")
+    interval = df.attrs.get("interval")
+    if ticker is None or interval is None or df.empty:
+        return None
+    return (
+        ticker,
+        interval,
+        df.index[0],
+        df.index[-1],
+        len(df),
+        float(df["Close"].iat[-1]),
+        df.attrs.get("fetched_at"),
+    )
+
+
+def is_intraday(df):
+    """Whether the bars in `df` are intraday (5min, 15min or 1hr)
+
+    Uses the `interval` attr set by the fetch layer. Frames without it fall
+    back to the smallest spacing among the first bars, which (unlike
+    `pd.infer_freq`) is not thrown off by overnight and weekend gaps.
+    """
+    interval = df.attrs.get("interval")
+    if interval is not None:
+        return is_intraday_interval(interval)
+    if len(df) < 2:
+        return False
+    spacing = np.diff(df.index[:INTERVAL_SAMPLE_BARS].values).min()
+    return pd.Timedelta(spacing) < pd.Timedelta(days=1)
+
+
+def _indicator_columns(df):
+    """Indicator columns for `df` as a new frame sharing its index"""
+    close = pd.to_numeric(df["Close"])
+    columns = {}
+    sma20 = close.rolling(window=20).mean()  # Shared by MA20 and the Middle Band
+
+    # For intraday data (high frequency)
+    if is_intraday(df):  # 5min, 15min, 1hr
+        columns["EMA12"] = close.ewm(span=12, adjust=False).mean()
+        columns["EMA26"] = close.ewm(span=26, adjust=False).mean()
+    # For daily data
+    else:
+        columns["MA20"] = sma20
+        columns["MA50"] = close.rolling(window=50).mean()
+
+    # RSI calculation
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    columns["RSI"] = 100 - (100 / (1 + rs))
+
+    # Bollinger Bands
+    std = close.rolling(window=20).std()
+    columns["Middle Band"] = sma20  # SMA 20
+    columns["Std Dev"] = std  # Standard Deviation
+    columns["Upper Band"] = sma20 + (2 * std)  # Upper Band
+    columns["Lower Band"] = sma20 - (2 * std)  # Lower Band
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _compute_and_store(df, key, cache):
+    columns = cache.get(key)  # Another session may have just stored it
+    if columns is None:
+        columns = _indicator_columns(df)
+        cache.set(key, columns)
+    return columns
+
+
+# Timed outside the cache so hits are measured too
+@timed("calculate_technical_indicators")
+def calculate_technical_indicators(df, cache=None):
+    """Calculate technical indicators including Bollinger Bands
+
+    Returns a new frame with the indicator columns appended; `df` itself is
+    never modified. Results are cached in `indicator_cache` (or `cache`) by
+    `indicator_cache_key`, so frames from the fetch layer are never hashed,
+    and concurrent calls for the same key share one computation.
+    Pass `cache=False` to always compute.
+    """
     try:
-        df["Close"] = pd.to_numeric(df["Close"])
-        
-        # For intraday data (high frequency)
-        if pd.infer_freq(df.index) in ['5T', '15T', '60T']:  # 5min, 15min, 1hr
-            df["EMA12"] = df["Close"].ewm(span=12, adjust=False).mean()
-            df["EMA26"] = df["Close"].ewm(span=26, adjust=False).mean()
-        # For daily data
-        else:
-            df["MA20"] = df["Close"].rolling(window=20).mean()
-            df["MA50"] = df["Close"].rolling(window=50).mean()
-
-        # RSI calculation
-        delta = df["Close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df["RSI"] = 100 - (100 / (1 + rs))
-
-        # Bollinger Bands
-        df["Middle Band"] = df["Close"].rolling(window=20).mean()  # SMA 20
-        df["Std Dev"] = df["Close"].rolling(window=20).std()       # Standard Deviation
-        df["Upper Band"] = df["Middle Band"] + (2 * df["Std Dev"])  # Upper Band
-        df["Lower Band"] = df["Middle Band"] - (2 * df["Std Dev"])  # Lower Band
-        
-        return df
+        if cache is None:
+            cache = indicator_cache
+        key = indicator_cache_key(df) if cache else None
+        columns = cache.get(key) if key is not None else None
+        annotate(rows=len(df), indicator_cache="hit" if columns is not None else "miss")
+        if columns is None and key is None:
+            columns = _indicator_columns(df)
+        elif columns is None:
+            # Concurrent sessions asking for the same bars wait for one computation
+            columns = _indicator_flights.do(key, lambda: _compute_and_store(df, key, cache))
+
+        # Recomputing on a frame that already has indicators replaces them
+        existing = columns.columns.intersection(df.columns)
+        base = df.drop(columns=existing) if len(existing) else df
+        result = pd.concat([base, columns], axis=1, copy=False)
+        result.attrs = dict(df.attrs)
+        return result
     except Exception as e:
-        st.error(f"Indicator calculation failed: {e}")
+        notify.error(f"Indicator calculation failed: {e}")
         return df
@@ -0,0 +1,167 @@
+# utils/live.py
+import copy
+import time
+from dataclasses import dataclass, field
+import pandas as pd
+from utils.analysis import analyze_candlestick_patterns, prescreen_patterns
+from utils.data_fetcher import DERIVED_INTERVALS, get_interval_and_period, load_stock_data, scheduled_source
+from utils.indicators import calculate_technical_indicators, is_intraday
+from utils.profiling import annotate, timed
+from utils.resample import interval_to_timedelta, resample_bars, session_open, trim_to_period
+from utils.streaming_indicators import IndicatorState
+from utils.visualization import LiveChart, SCREEN_DPI
+
+LIVE_PERIODS = ("1d", "5d")
+PATTERN_BARS = 60  # Bars scanned for new patterns after each poll
+
+
+@dataclass
+class LiveUpdate:
+    """What one `LiveSession.poll` changed"""
+
+    new_bars: int = 0
+    replaced_bars: int = 0
+    triggers: list = field(default_factory=list)
+    analysis_updated: bool = False
+    seconds: float = 0.0
+
+
+class LiveSession:
+    """Keeps one ticker's intraday series current between polls
+
+    Each `poll` downloads only the bars from the last stored one onward
+    (that bar may still have been forming), at the same base interval the
+    window was built from and resampled the same way (15m from 5m), so they
+    line up with the stored bars, replaces or appends them, and
+    advances a streaming `IndicatorState` over just those bars. The model is
+    asked again only when a completed bar triggers: a new significant
+    pattern or RSI crossing one of `rsi_levels`.
+    """
+
+    def __init__(self, ticker, period="1d", client=None, source=scheduled_source, rsi_levels=(30, 70), min_strength=0.6):
+        if period not in LIVE_PERIODS:
+            raise ValueError(f"Live mode supports the {', '.join(LIVE_PERIODS)} periods, not {period}")
+        self.ticker = ticker
+        self.period = period
+        self.client = client
+        self.source = source
+        self.rsi_levels = rsi_levels
+        self.min_strength = min_strength
+        self.interval, _ = get_interval_and_period(period)
+        self.base_interval = DERIVED_INTERVALS.get(self.interval, self.interval)
+        self.chart = LiveChart(f"{ticker} Live - {self.interval} bars")
+        self.analysis = None
+        self.frame = None
+        self._state = None
+        self._before_last = None  # Indicator state before the last (possibly forming) bar
+        self._seen_patterns = set()
+        self._open_time = None  # Session open the window's bins are anchored to
+
+    @property
+    def poll_seconds(self):
+        """Polling cadence: one bar of the period's interval"""
+        return interval_to_timedelta(self.interval).total_seconds()
+
+    def start(self, stock_data=None, analysis=None):
+        """Load the full window once, through the bar cache, and analyze it
+
+        A frame and analysis the page already has can be passed in instead.
+        """
+        if stock_data is None:
+            stock_data = load_stock_data(self.ticker, self.period)
+        df = calculate_technical_indicators(stock_data)
+        self._state = IndicatorState.from_frame(df.iloc[:-1], intraday=is_intraday(df))
+        self._before_last = copy.deepcopy(self._state)
+        self._state.update(float(df["Close"].iat[-1]))
+        self.frame = df
+        self._open_time = session_open(df.index)
+        self._seen_patterns = set(self._patterns(df))
+        if analysis is None:
+            self._analyze()
+        else:
+            self.analysis = analysis
+        return self
+
+    @timed("live_poll")
+    def poll(self):
+        """Fetch and apply the newest bars; returns a `LiveUpdate`"""
+        started = time.perf_counter()
+        update = LiveUpdate()
+        new_bars = self.source(self.ticker, self.base_interval, start=self.frame.index[-1])
+        if new_bars is not None and len(new_bars):
+            new_bars.index = pd.to_datetime(new_bars.index)
+            new_bars = new_bars[~new_bars.index.duplicated(keep="last")].sort_index()
+            if self.base_interval != self.interval:
+                new_bars = resample_bars(new_bars, self.interval, self.base_interval, open_time=self._open_time)
+            update.replaced_bars, update.new_bars = self._apply(new_bars)
+            update.triggers = self._triggers(update.new_bars)
+            if update.triggers:
+                self._analyze()
+                update.analysis_updated = True
+        update.seconds = time.perf_counter() - started
+        annotate(new_bars=update.new_bars, triggers=len(update.triggers))
+        return update
+
+    def _apply(self, new_bars):
+        """Merge `new_bars` into the series, updating indicators only for those rows"""
+        # Bars up to the last stored one must revise exactly the stored bars they
+        # overlap; anything else means they are on another grid or interval
+        overlapped = self.frame.index[self.frame.index >= new_bars.index[0]]
+        if not new_bars.index[:len(overlapped)].equals(overlapped):
+            raise ValueError(f"{self.ticker} bars from {new_bars.index[0]} do not line up with the stored {self.interval} bars")
+        replaced = len(overlapped)
+        if replaced == 1:
+            self._state = self._before_last  # Undo the last bar, which was still forming
+        elif replaced > 1:
+            # Revised history beyond the forming bar; rebuild the state from what is kept
+            kept = self.frame.iloc[:-replaced]
+            self._state = IndicatorState.from_frame(kept, intraday=self._state.intraday)
+
+        rows = []
+        closes = new_bars["Close"].to_numpy(dtype=float)
+        for i, close in enumerate(closes):
+            if i == len(closes) - 1:
+                self._before_last = copy.deepcopy(self._state)
+            rows.append(self._state.update(close))
+        columns = pd.DataFrame(rows, index=new_bars.index)
+        appended = pd.concat([new_bars[self.frame.columns.intersection(new_bars.columns)], columns], axis=1)
+
+        frame = pd.concat([self.frame.iloc[:len(self.frame) - replaced], appended])
+        frame.attrs = dict(self.frame.attrs)
+        self.frame = trim_to_period(frame, self.period)  # Memory stays bounded while running all day
+        return replaced, len(new_bars) - replaced
+
+    def _patterns(self, df):
+        # The last bar may still be forming, so only completed bars can trigger
+        patterns = prescreen_patterns(df.iloc[:-1].tail(PATTERN_BARS), recent_bars=PATTERN_BARS, min_strength=self.min_strength)
+        return [(row.date, row.pattern) for row in patterns.itertuples()]
+
+    def _triggers(self, completed):
+        """Reasons to re-run the analysis, from the `completed` bars this poll closed
+
+        Every appended bar closes the one before it, so a poll that only
+        revised the forming bar completes nothing and never triggers.
+        """
+        triggers = []
+        if completed <= 0:
+            return triggers
+
+        for pattern in self._patterns(self.frame):
+            if pattern not in self._seen_patterns:
+                self._seen_patterns.add(pattern)
+                triggers.append(f"{pattern[1]} at {pattern[0]:%H:%M}")
+
+        rsi = self.frame["RSI"].iloc[-(completed + 2):-1].to_numpy()
+        for previous, current in zip(rsi[:-1], rsi[1:]):
+            for level in self.rsi_levels:
+                if min(previous, current) < level <= max(previous, current):
+                    triggers.append(f"RSI crossed {level} ({previous:.1f} -> {current:.1f})")
+        return triggers
+
+    def _analyze(self):
+        if self.client is not None:
+            self.analysis = analyze_candlestick_patterns(self.client, self.frame, self.period)
+
+    def render(self, dpi=SCREEN_DPI, fmt="png"):
+        """Candlestick and RSI image bytes, redrawn on the session's existing figures"""
+        return self.chart.render(self.frame, dpi=dpi, fmt=fmt)
@@ -0,0 +1,98 @@
+# utils/llm_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from utils.sqlite_store import connect, create_lru_table, evict, make_parent_dirs
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+
+# A cached answer is reused for at most one bar of the interval it describes
+INTERVAL_TTLS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "60m": 60 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+
+def ttl_for_interval(interval):
+    """Seconds a response about bars of `interval` stays valid"""
+    return INTERVAL_TTLS.get(interval, 24 * 60 * 60)
+
+
+def make_key(model, temperature, system_prompt, user_prompt):
+    """Content address of a completion request"""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "system": system_prompt, "user": user_prompt},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Persistent SQLite cache of LLM completions keyed by request content
+
+    Entries expire after a per-entry TTL and the least recently used entries
+    are evicted once the cache exceeds `max_entries` or `max_bytes`. Hit and
+    miss counters are kept per process.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=1000, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        make_parent_dirs(path)
+        with connect(path) as conn:
+            create_lru_table(conn, "responses", "TEXT")
+
+    def get(self, key):
+        """Return the cached response for `key`, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + ttl, now),
+            )
+            evict(conn, "responses", now, self.max_entries, self.max_bytes)
+
+    def clear(self):
+        with self._lock, connect(self.path) as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock, connect(self.path) as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "bytes": total}
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Return the process-wide cache used by `analyze_candlestick_patterns`"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache(os.environ.get("CMA_LLM_CACHE_PATH", DEFAULT_CACHE_PATH))
+    return _default_cache
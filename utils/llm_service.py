@@ -0,0 +1,273 @@
+# utils/llm_service.py
+import asyncio
+import inspect
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils import notify
+from utils.analysis import (
+    MODEL, TEMPERATURE, SYSTEM_PROMPT, NO_PATTERNS_MESSAGE,
+    build_pattern_description, build_messages, prescreen_patterns,
+)
+from utils.data_fetcher import get_interval_and_period
+from utils.llm_cache import make_key, ttl_for_interval
+from utils.prompt_encoding import DEFAULT_TOKEN_BUDGET, estimate_tokens
+from utils.shared_cache import get_default_cache as get_shared_cache
+
+
+class AsyncTokenBucket:
+    """Budget of `capacity` units refilled continuously at `rate` units per second
+
+    Callers may reserve more than is left; the deficit is paid back before
+    anyone else is admitted, so a large request delays later ones instead of
+    being rejected.
+    """
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        async with self._lock:
+            self._refill()
+            if self.level <= 0:
+                await asyncio.sleep(-self.level / self.rate + 1e-3)
+                self._refill()
+            self.level -= amount
+
+    def adjust(self, delta):
+        """Charge (positive) or refund (negative) the difference once the real cost is known"""
+        self._refill()
+        self.level -= delta
+
+
+class AnalysisService:
+    """Async front end to an OpenAI-compatible client for candlestick analysis
+
+    At most `max_concurrency` completions run at once. Requests that share a
+    prompt while one is in flight are coalesced onto the same task, so the
+    model is asked once and every caller gets the answer. Requests per minute
+    and tokens per minute are budgeted with token buckets, each attempt is
+    bounded by `timeout`, and failures are retried with jittered exponential
+    backoff. `on_token` receives partial text as it streams in, starting
+    with whatever had streamed before the caller joined; once any has
+    been sent a failure is not retried, and neither is a timed-out call on a
+    sync client, whose worker thread can't be stopped.
+
+    Requests with a TTL also go through the process-wide `SharedCache` (or
+    `shared`; `shared=False` skips it) under the same keys as
+    `analyze_candlestick_patterns`, so with a SQLite backend one process
+    computes an analysis and the others wait for it. Callers in a waiting
+    process get the whole answer at the end rather than streamed.
+
+    Works with both async clients (`openai.AsyncOpenAI`) and sync clients,
+    whose blocking calls are moved to a worker thread.
+    """
+
+    def __init__(self, client, max_concurrency=4, requests_per_minute=60, tokens_per_minute=100_000,
+                 timeout=60, retries=2, backoff=1.0, completion_tokens=1000, cache=None, shared=None):
+        self.client = client
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.completion_tokens = completion_tokens
+        self.cache = cache
+        self.shared = get_shared_cache() if shared is None else shared
+        # Shared-cache lookups and lease waits block, so they get their own
+        # threads rather than the default pool the sync client calls run in
+        self._shared_pool = ThreadPoolExecutor(max_concurrency * 4, thread_name_prefix="shared-analysis") if self.shared else None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = AsyncTokenBucket(requests_per_minute, requests_per_minute / 60)
+        self._tokens = AsyncTokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self._in_flight = {}
+        self._subscribers = {}
+        self._partial = {}  # Key -> text streamed so far, replayed to late subscribers
+        self._stream_lock = threading.Lock()  # Sync streams emit from a worker thread
+        self.coalesced = 0
+
+    async def analyze(self, stock_data, period, on_token=None, prescreen=True, recent_bars=10, min_strength=0.6, token_budget=DEFAULT_TOKEN_BUDGET):
+        """Analyze the latest candles of `stock_data` for `period`, prescreened like `analyze_candlestick_patterns`"""
+        if stock_data is None or len(stock_data) < 50:
+            return "Insufficient data for analysis"
+        patterns = None
+        if prescreen:
+            patterns = prescreen_patterns(stock_data, recent_bars, min_strength)
+            if patterns.empty:
+                return NO_PATTERNS_MESSAGE.format(bars=recent_bars)
+        description = build_pattern_description(stock_data, period, token_budget=token_budget, patterns=patterns)
+        interval, _ = get_interval_and_period(period)
+        return await self.complete(description, on_token=on_token, ttl=ttl_for_interval(interval))
+
+    async def complete(self, description, on_token=None, ttl=None):
+        """Return the model's analysis of `description`, sharing work with identical in-flight requests"""
+        key = make_key(MODEL, TEMPERATURE, SYSTEM_PROMPT, description)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+
+        with self._stream_lock:
+            subscribers = self._subscribers.setdefault(key, [])
+            if on_token is not None:
+                for text in self._partial.get(key, ()):
+                    on_token(text)
+                subscribers.append(on_token)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_shared(key, description, ttl))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._release(key))
+        else:
+            self.coalesced += 1
+        # Shield so one caller cancelling doesn't cancel the shared request for the others
+        return await asyncio.shield(task)
+
+    def _release(self, key):
+        self._in_flight.pop(key, None)
+        with self._stream_lock:
+            self._subscribers.pop(key, None)
+            self._partial.pop(key, None)
+
+    def _emit(self, key, text):
+        with self._stream_lock:
+            self._partial.setdefault(key, []).append(text)
+            for callback in list(self._subscribers.get(key, ())):
+                callback(text)
+
+    async def _run_shared(self, key, description, ttl):
+        """`_run`, computed once across sessions and processes sharing the cache"""
+        if not self.shared or not ttl:
+            return await self._run(key, description, ttl)
+        loop = asyncio.get_running_loop()
+
+        def compute():
+            return asyncio.run_coroutine_threadsafe(self._run(key, description, ttl), loop).result()
+
+        return await loop.run_in_executor(
+            self._shared_pool, self.shared.get_or_compute, ("analysis", key), compute, ttl
+        )
+
+    async def _run(self, key, description, ttl):
+        messages = build_messages(description)
+        reserved = estimate_tokens(SYSTEM_PROMPT + description) + self.completion_tokens
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    await self._requests.acquire()
+                    await self._tokens.acquire(reserved)
+                    analysis, used = await asyncio.wait_for(self._call(key, messages), self.timeout)
+                if used is not None:
+                    self._tokens.adjust(used - reserved)
+                if self.cache and ttl:
+                    self.cache.set(key, analysis, ttl)
+                return analysis
+            except Exception as e:
+                if attempt == self.retries or not self._retryable(key, e):
+                    raise
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _retryable(self, key, error):
+        # Subscribers already showed part of the answer; a second stream would repeat it
+        if key in self._partial:
+            return False
+        # A timed-out sync call keeps running in its worker thread (and keeps being
+        # billed), so starting another one would pay for two completions
+        if isinstance(error, asyncio.TimeoutError) and not inspect.iscoroutinefunction(self.client.chat.completions.create):
+            return False
+        return True
+
+    async def _call(self, key, messages):
+        """One completion; returns (text, total tokens used or None)"""
+        create = self.client.chat.completions.create
+        # The client's own timeout ends a sync call's worker thread, which wait_for can't
+        options = {"model": MODEL, "messages": messages, "temperature": TEMPERATURE, "timeout": self.timeout}
+        if not self._subscribers.get(key):
+            response = await self._invoke(create, **options)
+            usage = getattr(response, "usage", None)
+            return response.choices[0].message.content.strip(), getattr(usage, "total_tokens", None)
+
+        stream = await self._invoke(create, stream=True, **options)
+        parts = []
+        if hasattr(stream, "__aiter__"):
+            async for chunk in stream:
+                self._collect(key, chunk, parts)
+        else:
+            # Sync streams block on every chunk, so drain them off the event loop
+            await asyncio.to_thread(lambda: [self._collect(key, chunk, parts) for chunk in stream])
+        return "".join(parts).strip(), None
+
+    def _collect(self, key, chunk, parts):
+        if not chunk.choices:
+            return
+        text = chunk.choices[0].delta.content
+        if text:
+            parts.append(text)
+            self._emit(key, text)
+
+    @staticmethod
+    async def _invoke(create, **options):
+        if inspect.iscoroutinefunction(create):
+            return await create(**options)
+        result = await asyncio.to_thread(create, **options)
+        return await result if inspect.isawaitable(result) else result
+
+
+async def analyze_many(service, requests):
+    """Run `service.analyze` for (stock_data, period) pairs concurrently, isolating failures"""
+    return await asyncio.gather(
+        *(service.analyze(stock_data, period) for stock_data, period in requests),
+        return_exceptions=True,
+    )
+
+
+_loop = None
+_loop_lock = threading.Lock()
+_DONE = object()
+
+
+def _background_loop():
+    """Event loop on a daemon thread for services used from synchronous code"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="analysis-loop", daemon=True).start()
+    return _loop
+
+
+def stream_analysis(service, stock_data, period, **options):
+    """Yield `service.analyze` text as it streams in, for `st.write_stream` or other sync callers
+
+    The service runs on one shared background event loop, so its
+    concurrency limits and coalescing apply across every caller. Answers
+    that don't stream (no patterns found) are yielded whole at the end.
+    """
+    chunks = queue.Queue()
+    future = asyncio.run_coroutine_threadsafe(
+        service.analyze(stock_data, period, on_token=chunks.put, **options), _background_loop()
+    )
+    future.add_done_callback(lambda _: chunks.put(_DONE))
+    streamed = False
+    while (chunk := chunks.get()) is not _DONE:
+        streamed = True
+        yield chunk
+    try:
+        result = future.result()
+    except Exception as e:
+        notify.error(f"Error in candlestick pattern analysis: {e}")
+        yield ("\n\n" if streamed else "") + "Unable to analyze candlestick patterns."
+        return
+    if not streamed:
+        yield result
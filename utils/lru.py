@@ -0,0 +1,60 @@
+# utils/lru.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU bounded by entry count and total bytes
+
+    `sizeof(value)` gives each entry's size for the byte budget (`max_bytes=None`
+    leaves it unbounded). Entries may carry an absolute `expires_at`; expired
+    entries read as misses and are dropped. Values larger than the whole
+    budget are not stored.
+    """
+
+    def __init__(self, max_entries, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[2] is not None and entry[2] <= time.time():
+                self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, expires_at=None):
+        nbytes = self.sizeof(value) if self.sizeof is not None else 0
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, nbytes, expires_at)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
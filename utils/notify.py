@@ -0,0 +1,44 @@
+# utils/notify.py
+import logging
+
+logger = logging.getLogger("chartered_market_analyst")
+
+_notifier = None
+
+
+def set_notifier(callback):
+    """Route error/warning notices to `callback(level, message)`; None restores the default
+
+    Returns the previous callback so callers can restore it.
+    """
+    global _notifier
+    previous = _notifier
+    _notifier = callback
+    return previous
+
+
+def _streamlit_running():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def notify(level, message):
+    """Show a notice in the Streamlit UI when running there, otherwise log it"""
+    if _notifier is not None:
+        _notifier(level, message)
+    elif _streamlit_running():
+        import streamlit as st
+        getattr(st, level)(message)
+    else:
+        logger.log(logging.ERROR if level == "error" else logging.WARNING, message)
+
+
+def error(message):
+    notify("error", message)
+
+
+def warning(message):
+    notify("warning", message)
@@ -0,0 +1,125 @@
+# utils/patterns.py
+import numpy as np
+import pandas as pd
+
+# Pattern directions
+BULLISH = "bullish"
+BEARISH = "bearish"
+NEUTRAL = "neutral"
+
+
+def _shift(values, n):
+    """values[i - n] aligned at i, NaN where it doesn't exist"""
+    out = np.full_like(values, np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+def detect_patterns(df, doji_ratio=0.1, trend_window=5):
+    """Find classic candlestick patterns in an OHLCV frame with O(n) array ops
+
+    Returns one row per detected pattern with its bar, name, direction and a
+    0-1 strength score. Strength starts from the pattern's body/range geometry
+    and is raised by confirmation: volume above its 20-bar average, RSI in
+    the matching extreme zone, and price on the right side of MA20 (or the
+    Middle Band) for a reversal. Indicator columns from
+    `calculate_technical_indicators` are used when present.
+    """
+    if df is None or len(df) < 3:
+        return pd.DataFrame(columns=["date", "pattern", "direction", "strength", "close"])
+
+    o = df["Open"].to_numpy(dtype=np.float64)
+    h = df["High"].to_numpy(dtype=np.float64)
+    lo = df["Low"].to_numpy(dtype=np.float64)
+    c = df["Close"].to_numpy(dtype=np.float64)
+
+    body = np.abs(c - o)
+    rng = np.maximum(h - lo, 1e-12)
+    upper_wick = h - np.maximum(o, c)
+    lower_wick = np.minimum(o, c) - lo
+    bull = c > o
+    bear = c < o
+    avg_body = pd.Series(body).rolling(14, min_periods=1).mean().to_numpy()
+    long_body = body > avg_body
+    small_body = body < 0.5 * avg_body
+
+    # Short-term trend context: close versus the close `trend_window` bars back
+    past = _shift(c, trend_window)
+    downtrend = c < past
+    uptrend = c > past
+    prior_down = _shift(downtrend.astype(float), 1) == 1
+    prior_up = _shift(uptrend.astype(float), 1) == 1
+
+    o1, c1, body1 = _shift(o, 1), _shift(c, 1), _shift(body, 1)
+    o2, c2 = _shift(o, 2), _shift(c, 2)
+    bull1, bear1 = _shift(bull.astype(float), 1) == 1, _shift(bear.astype(float), 1) == 1
+    bull2, bear2 = _shift(bull.astype(float), 2) == 1, _shift(bear.astype(float), 2) == 1
+    small1 = _shift(small_body.astype(float), 1) == 1
+    long2 = _shift(long_body.astype(float), 2) == 1
+
+    masks = {
+        ("Doji", NEUTRAL): body <= doji_ratio * rng,
+        ("Hammer", BULLISH): (lower_wick >= 2 * body) & (upper_wick <= body) & (body > doji_ratio * rng) & prior_down,
+        ("Hanging Man", BEARISH): (lower_wick >= 2 * body) & (upper_wick <= body) & (body > doji_ratio * rng) & prior_up,
+        ("Shooting Star", BEARISH): (upper_wick >= 2 * body) & (lower_wick <= body) & (body > doji_ratio * rng) & prior_up,
+        ("Inverted Hammer", BULLISH): (upper_wick >= 2 * body) & (lower_wick <= body) & (body > doji_ratio * rng) & prior_down,
+        ("Bullish Engulfing", BULLISH): bear1 & bull & (o <= c1) & (c >= o1) & (body > body1),
+        ("Bearish Engulfing", BEARISH): bull1 & bear & (o >= c1) & (c <= o1) & (body > body1),
+        ("Bullish Harami", BULLISH): bear1 & bull & (np.maximum(o, c) < o1) & (np.minimum(o, c) > c1),
+        ("Bearish Harami", BEARISH): bull1 & bear & (np.maximum(o, c) < c1) & (np.minimum(o, c) > o1),
+        ("Morning Star", BULLISH): bear2 & long2 & small1 & bull & (c > (o2 + c2) / 2),
+        ("Evening Star", BEARISH): bull2 & long2 & small1 & bear & (c < (o2 + c2) / 2),
+        ("Three White Soldiers", BULLISH): bull & bull1 & bull2 & (c > c1) & (c1 > c2) & (o > o1) & (o1 > o2) & long_body,
+        ("Three Black Crows", BEARISH): bear & bear1 & bear2 & (c < c1) & (c1 < c2) & (o < o1) & (o1 < o2) & long_body,
+    }
+
+    # Confirmation inputs shared by every pattern
+    volume = df["Volume"].to_numpy(dtype=np.float64) if "Volume" in df else np.zeros(len(df))
+    avg_volume = pd.Series(volume).rolling(20, min_periods=1).mean().to_numpy()
+    volume_confirmed = volume > 1.2 * avg_volume
+    rsi = df["RSI"].to_numpy(dtype=np.float64) if "RSI" in df else np.full(len(df), np.nan)
+    ma_column = "MA20" if "MA20" in df else "Middle Band" if "Middle Band" in df else None
+    ma = df[ma_column].to_numpy(dtype=np.float64) if ma_column else np.full(len(df), np.nan)
+    geometry = np.clip(body / rng, 0, 1)
+
+    found = []
+    for (name, direction), mask in masks.items():
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            continue
+        strength = 0.4 + 0.2 * (geometry[idx] if name != "Doji" else 1 - geometry[idx])
+        strength = strength + 0.2 * volume_confirmed[idx]
+        if direction == BULLISH:
+            strength = strength + 0.1 * (rsi[idx] < 35) + 0.1 * (c[idx] < ma[idx])
+        elif direction == BEARISH:
+            strength = strength + 0.1 * (rsi[idx] > 65) + 0.1 * (c[idx] > ma[idx])
+        found.append(pd.DataFrame({
+            "date": df.index[idx],
+            "pattern": name,
+            "direction": direction,
+            "strength": np.round(np.clip(strength, 0, 1), 2),
+            "close": c[idx],
+        }))
+
+    if not found:
+        return pd.DataFrame(columns=["date", "pattern", "direction", "strength", "close"])
+    return pd.concat(found, ignore_index=True).sort_values(["date", "strength"], ignore_index=True)
+
+
+def significant_patterns(patterns, lookback_dates=None, min_strength=0.6):
+    """Patterns at or above `min_strength`, optionally only those on the latest dates"""
+    if patterns.empty:
+        return patterns
+    result = patterns[(patterns["strength"] >= min_strength) & (patterns["direction"] != NEUTRAL)]
+    if lookback_dates is not None:
+        result = result[result["date"].isin(lookback_dates)]
+    return result.reset_index(drop=True)
+
+
+def describe_patterns(patterns):
+    """One prompt line per detected pattern, in the order given"""
+    return "\n".join(
+        f"{row.date:%Y-%m-%d %H:%M}: {row.pattern} ({row.direction}, strength {row.strength:.2f}, close {row.close:.2f})"
+        for row in patterns.itertuples()
+    )
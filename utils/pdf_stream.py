@@ -0,0 +1,288 @@
+# utils/pdf_stream.py
+import io
+import struct
+import zlib
+
+# A4 portrait in points; layout arguments are in millimetres like FPDF's defaults
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MM = 72 / 25.4
+CELL_MARGIN = 1.0  # Horizontal padding inside a cell, as FPDF uses
+
+# Symbols with no glyph in the core fonts' WinAnsi (cp1252) encoding, mapped
+# to ASCII in a single str.translate pass. Dashes, curly quotes, bullets,
+# ellipses, the euro and trademark signs are in cp1252 and print as-is.
+PDF_TRANSLATION = str.maketrans({
+    "≈": "~",  # Approximately equal
+    "≠": "!=",  # Not equal
+    "≤": "<=",  # Less than or equal
+    "≥": ">=",  # Greater than or equal
+    "→": "->",  # Right arrow
+    "←": "<-",  # Left arrow
+    "↑": "^",  # Up arrow
+    "↓": "v",  # Down arrow
+    "∞": "inf",  # Infinity
+    "−": "-",  # Minus sign
+    "‐": "-",  # Hyphen
+    "✓": "v",  # Check mark
+    "\u200b": None,  # Zero-width space
+})
+
+
+def sanitize_text(text):
+    """Text as the single-byte string the core fonts show
+
+    Known symbols are translated, anything else left unencodable becomes '?'.
+    Each character of the result is one WinAnsi byte (decoded as latin-1).
+    """
+    return str(text).translate(PDF_TRANSLATION).encode("cp1252", "replace").decode("latin-1")
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1")
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_COLORSPACES = {0: ("DeviceGray", 1), 2: ("DeviceRGB", 3)}  # PNG color type -> (colorspace, colors)
+
+
+def _png_chunks(data):
+    position = len(PNG_SIGNATURE)
+    while position + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        yield kind, data[position + 8:position + 8 + length]
+        if kind == b"IEND":
+            return
+        position += length + 12  # Length, type, data and CRC
+
+
+def _png_passthrough(data):
+    """(width, height, colorspace, colors, IDAT data) for a PNG a PDF reader can decode as-is, else None
+
+    The IDAT data of an 8-bit grayscale or RGB PNG without interlacing is a
+    zlib stream of filtered rows, which FlateDecode with PNG predictors reads
+    directly, so it is embedded without decoding, as FPDF does.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+    header, idat = None, []
+    for kind, chunk in _png_chunks(data):
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"IDAT":
+            idat.append(chunk)
+    if header is None or not idat:
+        return None
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or interlace or color_type not in PNG_COLORSPACES:
+        return None
+    colorspace, colors = PNG_COLORSPACES[color_type]
+    return width, height, colorspace, colors, b"".join(idat)
+
+
+def image_xobject(data):
+    """PDF image dictionary entries and stream for PNG/JPEG bytes
+
+    Returns (width, height, colorspace, filter, decode parameters or None,
+    stream). Grayscale/RGB PNGs and JPEGs are embedded without decoding;
+    other images (alpha, palette, 16-bit) are converted to RGB with PIL.
+    """
+    png = _png_passthrough(data)
+    if png is not None:
+        width, height, colorspace, colors, stream = png
+        parameters = f"<< /Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {width} >>"
+        return width, height, colorspace, "FlateDecode", parameters, stream
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG" and image.mode in ("RGB", "L", "CMYK"):
+        # JPEG data can be embedded as-is
+        colorspace = {"RGB": "DeviceRGB", "L": "DeviceGray", "CMYK": "DeviceCMYK"}[image.mode]
+        return image.width, image.height, colorspace, "DCTDecode", None, data
+    rgb = image.convert("RGB")
+    return rgb.width, rgb.height, "DeviceRGB", "FlateDecode", None, zlib.compress(rgb.tobytes())
+
+
+class PDFStreamWriter:
+    """Minimal PDF writer that flushes every page to `fileobj` as soon as it ends
+
+    Only object offsets and page ids stay in memory, so a document of any
+    length is written with the memory of a single page. Text uses the core
+    Helvetica font (no embedding); images are written once when placed.
+    """
+
+    def __init__(self, fileobj, font_size=12, margin=10, bottom_margin=20):
+        self.fileobj = fileobj
+        self.font_size = font_size
+        self.margin = margin
+        self.bottom_margin = bottom_margin
+        from fpdf.fonts import fpdf_charwidths  # Only the Helvetica metrics table is needed
+        self.widths = fpdf_charwidths["helvetica"]
+        self.x = margin
+        self.y = margin
+        self.pages = []
+        self._offsets = {}
+        self._next_id = 1
+        self._position = 0
+        self._content = None
+        self._page_images = {}
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._pages_id = self._reserve()
+        self._font_id = self._object(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+        )
+
+    # Low-level object output
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self._position += len(data)
+
+    def _reserve(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _object(self, body, object_id=None, stream=None):
+        object_id = object_id or self._reserve()
+        self._offsets[object_id] = self._position
+        self._write(b"%d 0 obj\n" % object_id + body)
+        if stream is not None:
+            self._write(b"\nstream\n" + stream + b"\nendstream")
+        self._write(b"\nendobj\n")
+        return object_id
+
+    # Pages
+
+    @property
+    def page_open(self):
+        return self._content is not None
+
+    def add_page(self):
+        if self.page_open:
+            self.end_page()
+        self._content = [b"BT /F1 %.2f Tf ET" % self.font_size]
+        self._page_images = {}
+        self.x = self.margin
+        self.y = self.margin
+
+    def end_page(self):
+        """Write the current page's content and page object, then drop them from memory"""
+        content = zlib.compress(b"\n".join(self._content))
+        content_id = self._object(b"<< /Length %d /Filter /FlateDecode >>" % len(content), stream=content)
+        xobjects = b"".join(b"/%s %d 0 R " % (name.encode(), object_id) for name, object_id in self._page_images.items())
+        page_id = self._object(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 %d 0 R >> /XObject << %s>> >> >>"
+            % (self._pages_id, PAGE_WIDTH, PAGE_HEIGHT, content_id, self._font_id, xobjects)
+        )
+        self.pages.append(page_id)
+        self._content = None
+
+    def _ensure_room(self, height):
+        if not self.page_open:
+            self.add_page()
+        elif self.y + height > PAGE_HEIGHT / MM - self.bottom_margin and self.y > self.margin:
+            self.add_page()
+
+    # Layout, in millimetres from the top-left corner like FPDF
+
+    def string_width(self, text):
+        return sum(self.widths.get(char, 0) for char in text) * self.font_size / 1000 / MM
+
+    def ln(self, height=None):
+        self.x = self.margin
+        self.y += self.font_size / MM if height is None else height
+
+    def _text(self, text, x, height, word_spacing=0.0):
+        baseline = self.y + 0.5 * height + 0.3 * self.font_size / MM
+        spacing = b"%.3f Tw " % (word_spacing * MM) if word_spacing else b""
+        self._content.append(
+            b"BT %s%.2f %.2f Td (%s) Tj ET%s"
+            % (spacing, x * MM, PAGE_HEIGHT - baseline * MM, _escape(text), b" 0 Tw" if word_spacing else b"")
+        )
+
+    def cell(self, width, height, text, align="L"):
+        """One line of text in a `width` x `height` box, then move to the next line"""
+        self._ensure_room(height)
+        text = sanitize_text(text)
+        if width == 0:
+            width = PAGE_WIDTH / MM - self.margin - self.x
+        if align == "C":
+            x = self.x + (width - self.string_width(text)) / 2
+        elif align == "R":
+            x = self.x + width - CELL_MARGIN - self.string_width(text)
+        else:
+            x = self.x + CELL_MARGIN
+        if text:
+            self._text(text, x, height)
+        self.ln(height)
+
+    def multi_cell(self, width, height, text):
+        """Justified, word-wrapped paragraph; explicit newlines start new lines"""
+        if width == 0:
+            width = PAGE_WIDTH / MM - self.margin - self.x
+        limit = width - 2 * CELL_MARGIN
+        space = self.string_width(" ")
+        for paragraph in sanitize_text(text).replace("\r", "").split("\n"):
+            line, line_width = [], 0.0
+            for word in paragraph.split(" "):
+                word_width = self.string_width(word)
+                if line and line_width + space + word_width > limit:
+                    self._wrapped_line(line, line_width, limit, height, justify=True)
+                    line, line_width = [], 0.0
+                while word_width > limit:
+                    # A single word wider than the line is broken by characters
+                    cut = len(word)
+                    while cut > 1 and self.string_width(word[:cut]) > limit:
+                        cut -= 1
+                    self._wrapped_line([word[:cut]], self.string_width(word[:cut]), limit, height, justify=False)
+                    word = word[cut:]
+                    word_width = self.string_width(word)
+                line_width += (space if line else 0) + word_width
+                line.append(word)
+            self._wrapped_line(line, line_width, limit, height, justify=False)
+
+    def _wrapped_line(self, words, line_width, limit, height, justify):
+        self._ensure_room(height)
+        gaps = len(words) - 1
+        word_spacing = (limit - line_width) / gaps if justify and gaps > 0 else 0.0
+        text = " ".join(words)
+        if text:
+            self._text(text, self.x + CELL_MARGIN, height, word_spacing)
+        self.ln(height)
+
+    def image(self, data, width):
+        """Place PNG/JPEG bytes `width` mm wide at the current position and move below it"""
+        pixel_width, pixel_height, colorspace, encoding, parameters, stream = image_xobject(data)
+        height = width * pixel_height / pixel_width
+        self._ensure_room(height)
+        decode_parms = b" /DecodeParms %s" % parameters.encode() if parameters else b""
+        object_id = self._object(
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /%s"
+            b" /BitsPerComponent 8 /Filter /%s%s /Length %d >>"
+            % (pixel_width, pixel_height, colorspace.encode(), encoding.encode(), decode_parms, len(stream)),
+            stream=stream,
+        )
+        resource = f"I{len(self._page_images) + 1}"
+        self._page_images[resource] = object_id
+        self._content.append(
+            b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q"
+            % (width * MM, height * MM, self.x * MM, PAGE_HEIGHT - (self.y + height) * MM, resource.encode())
+        )
+        self.y += height
+
+    def close(self):
+        """Finish the document: page tree, catalog, cross-reference table and trailer"""
+        if self.page_open:
+            self.end_page()
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.pages)
+        self._object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.pages)), object_id=self._pages_id)
+        catalog_id = self._object(b"<< /Type /Catalog /Pages %d 0 R >>" % self._pages_id)
+
+        xref_offset = self._position
+        count = self._next_id
+        entries = [b"0000000000 65535 f \n"]
+        entries += [b"%010d 00000 n \n" % self._offsets[object_id] for object_id in range(1, count)]
+        self._write(b"xref\n0 %d\n" % count + b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, catalog_id, xref_offset))
@@ -0,0 +1,187 @@
+# utils/pipeline.py
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils import notify
+from utils.data_fetcher import load_stock_data
+from utils.fetch_scheduler import BATCH, fetch_priority
+from utils.files import atomic_path
+from utils.indicators import calculate_technical_indicators
+from utils.profiling import enable_timing_log_from_env
+from utils.analysis import analyze_candlestick_patterns
+from utils.visualization import render_charts, PRINT_DPI
+from utils.report_generator import build_report_bundle, write_combined_report
+
+STAGES = ("fetch", "indicators", "analysis", "charts", "report")
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def make_client(api_key):
+    """OpenAI-compatible DeepSeek client, or None when no key is configured"""
+    if not api_key:
+        return None
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=DEEPSEEK_BASE_URL)
+
+
+def build_snapshot(ticker, df):
+    """Report header for a ticker from its latest indicator values (no price model)"""
+    latest = df.iloc[-1]
+    # Keys follow the indicator columns: intraday frames have EMA12/EMA26 instead of MA50
+    indicators = {"ma20": float(latest.get("MA20", latest["Middle Band"]))}
+    for column in ("MA50", "EMA12", "EMA26"):
+        if column in latest:
+            indicators[column.lower()] = float(latest[column])
+    indicators["rsi"] = float(latest["RSI"])
+    return {
+        "ticker": ticker,
+        "last_close": float(latest["Close"]),
+        "predicted_price": None,
+        "prediction_date": df.index[-1].strftime("%Y-%m-%d %H:%M"),
+        "technical_indicators": indicators,
+    }
+
+
+def run_ticker(ticker, period="1y", client=None, predictor=None, dpi=PRINT_DPI):
+    """Run fetch -> indicators -> LLM analysis -> charts -> report for one ticker
+
+    Returns `(zip_bytes, zip_filename, timings, notices)`. `predictor`, if
+    given, is called as `predictor(ticker, period, df)` and must return a
+    prediction dict in the shape `generate_pdf_report` expects; otherwise the
+    report carries the latest technical snapshot.
+    """
+    timings = {}
+    notices = []
+    previous = notify.set_notifier(lambda level, message: notices.append(f"{level}: {message}"))
+    try:
+        start = time.perf_counter()
+        df = load_stock_data(ticker, period)
+        timings["fetch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = calculate_technical_indicators(df)
+        prediction = predictor(ticker, period, df) if predictor else build_snapshot(ticker, df)
+        timings["indicators"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if client is not None:
+            analysis = analyze_candlestick_patterns(client, df, period)
+        else:
+            analysis = "AI analysis skipped (no API key configured)."
+        timings["analysis"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        candlestick_img, rsi_img = render_charts(df, prediction, period, dpi=dpi)
+        timings["charts"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        zip_bytes, zip_filename = build_report_bundle(prediction, analysis, candlestick_img, rsi_img)
+        timings["report"] = time.perf_counter() - start
+    finally:
+        notify.set_notifier(previous)
+    return zip_bytes, zip_filename, timings, notices
+
+
+def _worker(ticker, period, out_dir, api_key, dpi):
+    """Process-pool entry point: builds its own client and writes the bundle to `out_dir`"""
+    enable_timing_log_from_env()
+    try:
+        with fetch_priority(BATCH):
+            zip_bytes, zip_filename, timings, notices = run_ticker(ticker, period, make_client(api_key), dpi=dpi)
+    except Exception as e:
+        return {"ticker": ticker, "status": "error", "error": str(e)}
+    path = os.path.join(out_dir, zip_filename)
+    with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(zip_bytes)
+    return {"ticker": ticker, "status": "ok", "path": path, "timings": timings, "notices": notices}
+
+
+def read_manifest(out_dir):
+    """Tickers already completed in `out_dir`, from a previous (possibly crashed) run"""
+    done = {}
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from a crash
+            if entry.get("status") == "ok" and os.path.exists(entry.get("path", "")):
+                done[entry["ticker"]] = entry
+    return done
+
+
+def _member(bundle, suffix):
+    names = [name for name in bundle.namelist() if name.endswith(suffix)]
+    return bundle.read(names[0]) if names else None
+
+
+def iter_bundle_reports(out_dir, tickers=None):
+    """Yield `(prediction, analysis, candlestick_img, rsi_img)` from finished bundles, one at a time
+
+    Tickers come in the order given (default: alphabetical); ones without a
+    finished bundle, or bundles written before report data was included, are skipped.
+    """
+    done = read_manifest(out_dir)
+    for ticker in tickers or sorted(done):
+        entry = done.get(ticker.strip().upper())
+        if entry is None:
+            continue
+        with zipfile.ZipFile(entry["path"]) as bundle:
+            data = _member(bundle, "_report.json")
+            if data is None:
+                continue
+            report = json.loads(data)
+            candlestick_img = _member(bundle, "_candlestick_chart.png")
+            rsi_img = _member(bundle, "_rsi_chart.png")
+        yield report["prediction"], report["analysis"], candlestick_img, rsi_img
+
+
+def write_combined_pdf(out_dir, path, tickers=None):
+    """Stream one PDF for every finished ticker in `out_dir` to `path`; returns the ticker count"""
+    with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+        count = write_combined_report(iter_bundle_reports(out_dir, tickers), f)
+    return count
+
+
+def summarize_timings(results):
+    """Total, mean and max seconds per stage over successful results"""
+    summary = {}
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in results if r.get("status") == "ok" and stage in r.get("timings", {})]
+        if values:
+            summary[stage] = {"total": sum(values), "mean": sum(values) / len(values), "max": max(values)}
+    return summary
+
+
+def run_watchlist(tickers, out_dir, period="1y", api_key=None, workers=None, dpi=PRINT_DPI, resume=True, progress=True):
+    """Produce report bundles for every ticker across a process pool
+
+    Each finished ticker is appended to `out_dir/manifest.jsonl`, so a rerun
+    with `resume` skips what a crashed run already completed. Returns the
+    list of per-ticker results for this run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    done = read_manifest(out_dir) if resume else {}
+    pending = [t for t in tickers if t not in done]
+
+    results = []
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(manifest_path, "a", encoding="utf-8") as manifest:
+        futures = [pool.submit(_worker, ticker, period, out_dir, api_key, dpi) for ticker in pending]
+        completed = as_completed(futures)
+        if progress:
+            from tqdm import tqdm
+            completed = tqdm(completed, total=len(futures), initial=0, desc="Reports", unit="ticker")
+        for future in completed:
+            result = future.result()
+            results.append(result)
+            manifest.write(json.dumps(result) + "\n")
+            manifest.flush()
+    return results
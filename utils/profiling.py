@@ -0,0 +1,188 @@
+# utils/profiling.py
+import contextvars
+import functools
+import io
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("chartered_market_analyst.timing")
+
+TIMING_LOG_ENV = "CMA_TIMING_LOG"
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage with free-form attributes (rows, bytes, tokens, cache hits)"""
+
+    def __init__(self, name, parent=None, attrs=None):
+        self.name = name
+        self.parent = parent
+        self.attrs = dict(attrs or {})
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class Trace:
+    """All spans recorded while the trace is active, plus an optional profiler report"""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.profile = None
+        self.duration = None
+
+    def to_dict(self):
+        return {
+            "trace": self.name,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), default=str)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block; attributes can be added inside with `annotate`
+
+    Every finished span is logged as one JSON line on the
+    `chartered_market_analyst.timing` logger (see `enable_timing_log`) and,
+    inside `trace`, collected for the debug panel.
+    """
+    current = Span(name, parent=_current_span.get(), attrs=attrs)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        active = _current_trace.get()
+        if active is not None:
+            active.spans.append(current)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(current.to_dict(), default=str))
+
+
+_log_handler = None
+_log_handler_lock = threading.Lock()
+
+
+def enable_timing_log(destination="stderr"):
+    """Write every finished span as one JSON line to stderr or appended to the file `destination`
+
+    Only the first call in a process installs the handler.
+    """
+    global _log_handler
+    with _log_handler_lock:
+        if _log_handler is None:
+            if destination in ("stderr", "-", "1"):
+                handler = logging.StreamHandler()
+            else:
+                handler = logging.FileHandler(destination, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False  # The lines are JSON; keep them out of the app's own log format
+            _log_handler = handler
+    return _log_handler
+
+
+def enable_timing_log_from_env():
+    """Turn the timing log on when `CMA_TIMING_LOG` is set to "stderr" or a file path"""
+    destination = os.environ.get(TIMING_LOG_ENV)
+    if destination:
+        return enable_timing_log(destination)
+    return None
+
+
+def annotate(**attrs):
+    """Attach attributes to the innermost active span (no-op outside one)"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def timed(name=None):
+    """Decorator wrapping every call of a function in a span"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(name, profiler=None):
+    """Collect the spans of one request; `profiler` is None, "cprofile" or "pyinstrument"
+
+    The profiler report (text) is stored on `Trace.profile`. pyinstrument is
+    optional and falls back to cProfile when it isn't installed.
+    """
+    active = Trace(name)
+    token = _current_trace.set(active)
+    profile = _start_profiler(profiler)
+    started = time.perf_counter()
+    try:
+        with span(name):
+            yield active
+    finally:
+        active.duration = time.perf_counter() - started
+        active.profile = _stop_profiler(profile)
+        _current_trace.reset(token)
+
+
+def _start_profiler(profiler):
+    if profiler is None:
+        return None
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            instance = Profiler()
+            instance.start()
+            return ("pyinstrument", instance)
+        except ImportError:
+            pass
+    import cProfile
+    instance = cProfile.Profile()
+    instance.enable()
+    return ("cprofile", instance)
+
+
+def _stop_profiler(profile):
+    if profile is None:
+        return None
+    kind, instance = profile
+    if kind == "pyinstrument":
+        instance.stop()
+        return instance.output_text()
+    instance.disable()
+    import pstats
+    output = io.StringIO()
+    pstats.Stats(instance, stream=output).sort_stats("cumulative").print_stats(30)
+    return output.getvalue()
@@ -0,0 +1,142 @@
+# utils/prompt_encoding.py
+import time
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from utils.vector_indicators import compute_indicator_matrix
+
+FORMATS = ("verbose", "csv", "delta")
+DEFAULT_TOKEN_BUDGET = 1500  # Prompt tokens spent on candles and the indicator summary
+
+_tokenizer = None
+
+
+def estimate_tokens(text):
+    """Token count of `text`: exact with tiktoken installed, else about four characters per token"""
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            import tiktoken
+            _tokenizer = tiktoken.get_encoding("cl100k_base").encode
+        except Exception:
+            _tokenizer = False
+    if _tokenizer:
+        return len(_tokenizer(text))
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class EncodedPrompt:
+    """A candle payload together with what it costs"""
+
+    text: str
+    fmt: str
+    bars: int
+    tokens: int
+    build_seconds: float
+
+
+def _timestamps(index):
+    # Intraday bars need the time of day; daily bars only the date
+    index = pd.DatetimeIndex(index)
+    if len(index) > 1 and (index[1:] - index[:-1]).min() < pd.Timedelta(days=1):
+        return index.strftime("%m-%d %H:%M")
+    return index.strftime("%Y-%m-%d")
+
+
+def encode_candles(df, fmt="csv", precision=2):
+    """Encode every row of an OHLCV frame as prompt text without row iteration
+
+    - "verbose": the original `Open=…, High=…` lines
+    - "csv": one header line, then `date,open,high,low,close,volume`
+    - "delta": the first close in full, then open/high/low/close as offsets
+      from the previous close in units of 10^-precision; volume in thousands
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown candle format: {fmt}")
+    if df.empty:
+        return ""
+    dates = _timestamps(df.index)
+    ohlc = df[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64)
+    volume = np.nan_to_num(df["Volume"].to_numpy(dtype=np.float64))
+
+    if fmt == "verbose":
+        frame = pd.DataFrame(np.round(ohlc, precision), columns=["Open", "High", "Low", "Close"])
+        frame["Volume"] = volume.astype(np.int64)
+        rows = (
+            "Open=" + frame["Open"].map(f"{{:.{precision}f}}".format)
+            + ", High=" + frame["High"].map(f"{{:.{precision}f}}".format)
+            + ", Low=" + frame["Low"].map(f"{{:.{precision}f}}".format)
+            + ", Close=" + frame["Close"].map(f"{{:.{precision}f}}".format)
+            + ", Volume=" + frame["Volume"].astype(str)
+        )
+        return "\n".join(pd.Index(dates) + ": " + rows.to_numpy())
+
+    if fmt == "csv":
+        frame = pd.DataFrame(np.round(ohlc, precision), columns=["open", "high", "low", "close"])
+        frame.insert(0, "date", dates)
+        frame["volume"] = volume.astype(np.int64)
+        return frame.to_csv(index=False, float_format=f"%.{precision}f", lineterminator="\n").rstrip("\n")
+
+    scale = 10 ** precision
+    prev_close = np.concatenate(([ohlc[0, 3]], ohlc[:-1, 3]))
+    offsets = np.rint((ohlc - prev_close[:, None]) * scale).astype(np.int64)
+    frame = pd.DataFrame(offsets, columns=["do", "dh", "dl", "dc"])
+    frame.insert(0, "date", dates)
+    frame["vol_k"] = np.rint(volume / 1000).astype(np.int64)
+    header = f"base_close={ohlc[0, 3]:.{precision}f} units=1e-{precision} (offsets from previous close)"
+    return header + "\n" + frame.to_csv(index=False, lineterminator="\n").rstrip("\n")
+
+
+def summarize_indicators(df, precision=2):
+    """One-line summary of the latest RSI, moving averages and Bollinger band position"""
+    if df.empty:
+        return ""
+    if "RSI" in df and "Upper Band" in df:
+        latest = df.iloc[-1]
+    else:
+        # Derive what's missing from the closes in one vectorized pass
+        matrix = compute_indicator_matrix(df["Close"].to_numpy(dtype=np.float64)[None, :])
+        latest = pd.Series({name: values[0, -1] for name, values in matrix.items()})
+        latest["Close"] = df["Close"].iloc[-1]
+
+    parts = [f"close={latest['Close']:.{precision}f}"]
+    for column in ("RSI", "MA20", "MA50", "EMA12", "EMA26"):
+        if column in latest and pd.notna(latest[column]):
+            parts.append(f"{column}={latest[column]:.{precision}f}")
+    width = latest.get("Upper Band", np.nan) - latest.get("Lower Band", np.nan)
+    if pd.notna(width) and width > 0:
+        # %B: 0 at the lower band, 1 at the upper band
+        position = (latest["Close"] - latest["Lower Band"]) / width
+        parts.append(f"band_position={position:.2f}")
+    return "Latest indicators: " + ", ".join(parts)
+
+
+def _join(summary, candles):
+    return summary + "\n" + candles if summary else candles
+
+
+def build_candle_payload(df, fmt="csv", precision=2, token_budget=DEFAULT_TOKEN_BUDGET, min_bars=5):
+    """Fit as many of the latest bars as `token_budget` allows, plus an indicator summary
+
+    The per-bar cost is measured on a sample of the encoding, so the bar
+    count is chosen in one step and only trimmed if the estimate overshoots.
+    """
+    start = time.perf_counter()
+    summary = summarize_indicators(df, precision)
+    budget = token_budget - estimate_tokens(summary)
+
+    sample = df.iloc[-min(len(df), 20):]
+    per_bar = estimate_tokens(encode_candles(sample, fmt, precision)) / max(len(sample), 1)
+    bars = int(min(len(df), max(min_bars, budget // max(per_bar, 1e-9))))
+    text = _join(summary, encode_candles(df.iloc[-bars:], fmt, precision))
+    while bars > min_bars and estimate_tokens(text) > token_budget:
+        bars = max(min_bars, int(bars * 0.9))
+        text = _join(summary, encode_candles(df.iloc[-bars:], fmt, precision))
+
+    return EncodedPrompt(text, fmt, bars, estimate_tokens(text), time.perf_counter() - start)
+
+
+def compare_encodings(df, precision=2, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Build the payload in every format so token counts and build times can be compared"""
+    return {fmt: build_candle_payload(df, fmt, precision, token_budget) for fmt in FORMATS}
@@ -1,141 +1,139 @@
 # utils/report_generator.py
-from fpdf import FPDF
-import tempfile
-import streamlit as st
-
-def generate_pdf_report(prediction, analysis):
-    """Generate a PDF report with the analysis results"""
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-
-    # Function to sanitize text for PDF
-    def sanitize_text(text):
-        # Replace unsupported Unicode characters with ASCII equivalents
-        replacements = {
-            "–": "-",  # Replace en dash with hyphen
-            "—": "-",  # Replace em dash with hyphen
-            "“": '"',  # Replace left double quotation mark with ASCII quote
-            "”": '"',  # Replace right double quotation mark with ASCII quote
-            "‘": "'",  # Replace left single quotation mark with ASCII quote
-            "’": "'",  # Replace right single quotation mark with ASCII quote
-            "≈": "≈",  # Approximately equal
-            "≠": "!=",  # Not equal
-            "≤": "<=",  # Less than or equal
-            "≥": ">=",  # Greater than or equal
-            "±": "+/-",  # Plus-minus
-            "°": "deg",  # Degree symbol
-            "•": "*",  # Bullet point
-            "…": "...",  # Ellipsis
-            "→": "->",  # Right arrow
-            "←": "<-",  # Left arrow
-            "×": "x",  # Multiplication sign
-            "÷": "/",  # Division sign
-            "∞": "inf",  # Infinity
-            "µ": "u",  # Micro symbol
-            "€": "EUR",  # Euro symbol
-            "£": "GBP",  # Pound symbol
-            "¥": "JPY",  # Yen symbol
-            "©": "(c)",  # Copyright
-            "®": "(R)",  # Registered trademark
-            "™": "(TM)",  # Trademark
-            "§": "Sect.",  # Section symbol
-            "¶": "P.",  # Paragraph symbol
-        }
-        # First try to encode as latin-1
-        try:
-            return text.encode("latin-1", "replace").decode("latin-1")
-        except:
-            # If that fails, replace remaining special characters
-            for old, new in replacements.items():
-                text = text.replace(old, new)
-            return text.encode("ascii", "replace").decode("ascii")
+import hashlib
+import io
+import json
+import zipfile
+from utils.lru import LRUCache
+from utils.pdf_stream import PDFStreamWriter
+from utils.profiling import annotate, timed
+
+# Finished ZIP bundles keyed by a hash of everything that goes into them
+MAX_CACHED_BUNDLES = 64
+_bundle_cache = LRUCache(MAX_CACHED_BUNDLES)
+
+
+# Moving averages a prediction may carry: MA20/MA50 for daily bars, EMA12/EMA26 intraday
+INDICATOR_LABELS = {
+    "ma20": "20-hour MA",
+    "ma50": "50-hour MA",
+    "ema12": "12-bar EMA",
+    "ema26": "26-bar EMA",
+}
+
+
+def write_report(writer, prediction, analysis, candlestick_img=None, rsi_img=None):
+    """Lay out one ticker's report on new pages of a `PDFStreamWriter`"""
+    writer.add_page()
 
     # Add title
-    pdf.cell(200, 10, txt=sanitize_text("Stock Analysis Report"), ln=True, align="C")
+    writer.cell(200, 10, "Stock Analysis Report", align="C")
 
     # Add prediction details
-    pdf.cell(200, 10, txt=sanitize_text(f"Ticker: {prediction['ticker']}"), ln=True)
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(f"Current Price: ${prediction['last_close']:.2f}"),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(f"Predicted Price: ${prediction['predicted_price']:.2f}"),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(
-            f"Predicted Change: {((prediction['predicted_price'] / prediction['last_close']) - 1) * 100:.1f}%"
-        ),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(f"Prediction Date: {prediction['prediction_date']}"),
-        ln=True,
-    )
+    writer.cell(200, 10, f"Ticker: {prediction['ticker']}")
+    writer.cell(200, 10, f"Current Price: ${prediction['last_close']:.2f}")
+    # Headless runs without a price model only report the technical snapshot
+    if prediction.get("predicted_price") is not None:
+        writer.cell(200, 10, f"Predicted Price: ${prediction['predicted_price']:.2f}")
+        writer.cell(
+            200,
+            10,
+            f"Predicted Change: {((prediction['predicted_price'] / prediction['last_close']) - 1) * 100:.1f}%",
+        )
+    writer.cell(200, 10, f"Prediction Date: {prediction['prediction_date']}")
 
     # Add technical indicators
-    pdf.cell(200, 10, txt=sanitize_text("Technical Indicators:"), ln=True)
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(
-            f"20-hour MA: ${prediction['technical_indicators']['ma20']:.2f}"
-        ),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(
-            f"50-hour MA: ${prediction['technical_indicators']['ma50']:.2f}"
-        ),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(f"RSI: {prediction['technical_indicators']['rsi']:.2f}"),
-        ln=True,
-    )
+    writer.cell(200, 10, "Technical Indicators:")
+    indicators = prediction["technical_indicators"]
+    for key, label in INDICATOR_LABELS.items():
+        if key in indicators:
+            writer.cell(200, 10, f"{label}: ${indicators[key]:.2f}")
+    writer.cell(200, 10, f"RSI: {indicators['rsi']:.2f}")
 
     # Add market insight
-    pdf.cell(200, 10, txt=sanitize_text("Market Insight:"), ln=True)
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(f"Summary: {prediction['market_insight']['summary']}"),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(f"Risk Level: {prediction['market_insight']['risk_level']}"),
-        ln=True,
-    )
-    pdf.cell(
-        200,
-        10,
-        txt=sanitize_text(
-            f"Recommendation: {prediction['market_insight']['recommendation']}"
-        ),
-        ln=True,
-    )
+    if prediction.get("market_insight"):
+        writer.cell(200, 10, "Market Insight:")
+        writer.cell(200, 10, f"Summary: {prediction['market_insight']['summary']}")
+        writer.cell(200, 10, f"Risk Level: {prediction['market_insight']['risk_level']}")
+        writer.cell(200, 10, f"Recommendation: {prediction['market_insight']['recommendation']}")
 
     # Add candlestick pattern analysis
-    pdf.cell(200, 10, txt=sanitize_text("Candlestick Pattern Analysis:"), ln=True)
-    pdf.multi_cell(0, 10, txt=sanitize_text(analysis))
+    writer.cell(200, 10, "Candlestick Pattern Analysis:")
+    writer.multi_cell(0, 10, analysis)
+
+    # Add charts
+    for image in (candlestick_img, rsi_img):
+        if image:
+            writer.ln(5)
+            writer.image(image, width=190)
+
+
+@timed("generate_pdf_report")
+def generate_pdf_report(prediction, analysis, candlestick_img=None, rsi_img=None):
+    """Generate a PDF report with the analysis results
+
+    Chart images are embedded from memory and the PDF is returned as bytes.
+    """
+    buffer = io.BytesIO()
+    writer = PDFStreamWriter(buffer)
+    write_report(writer, prediction, analysis, candlestick_img, rsi_img)
+    writer.close()
+    pdf_bytes = buffer.getvalue()
+    annotate(bytes=len(pdf_bytes), pages=len(writer.pages))
+    return pdf_bytes
+
+
+@timed("write_combined_report")
+def write_combined_report(reports, fileobj):
+    """Stream one PDF covering many tickers into `fileobj`, page by page
+
+    `reports` is an iterable (ideally a generator) of
+    `(prediction, analysis, candlestick_img, rsi_img)` tuples; each ticker's
+    pages are written out before the next one is requested, so memory stays
+    at one report no matter how long the watchlist is. Returns the number
+    of tickers written.
+    """
+    writer = PDFStreamWriter(fileobj)
+    count = 0
+    for prediction, analysis, candlestick_img, rsi_img in reports:
+        write_report(writer, prediction, analysis, candlestick_img, rsi_img)
+        count += 1
+    writer.close()
+    annotate(tickers=count, pages=len(writer.pages))
+    return count
+
+
+def build_report_bundle(prediction, analysis, candlestick_img=None, rsi_img=None):
+    """Build the ZIP of PDF report and charts in memory
+
+    Returns `(zip_bytes, zip_filename)`. Bundles are cached by a hash of their
+    inputs, so an identical report is never rebuilt.
+    """
+    ticker = prediction["ticker"]
+    digest = hashlib.sha256()
+    digest.update(json.dumps(prediction, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(analysis.encode("utf-8"))
+    for image in (candlestick_img, rsi_img):
+        digest.update(hashlib.sha256(image or b"").digest())
+    key = digest.hexdigest()
+
+    cached = _bundle_cache.get(key)
+    if cached is not None:
+        return cached
+
+    pdf_bytes = generate_pdf_report(prediction, analysis, candlestick_img, rsi_img)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr(f"{ticker}_analysis_report.pdf", pdf_bytes)
+        # Report inputs, so combined watchlist PDFs can be built from the bundles later
+        zipf.writestr(
+            f"{ticker}_report.json",
+            json.dumps({"prediction": prediction, "analysis": analysis}, default=str),
+        )
+        if candlestick_img:
+            zipf.writestr(f"{ticker}_candlestick_chart.png", candlestick_img)
+        if rsi_img:
+            zipf.writestr(f"{ticker}_rsi_chart.png", rsi_img)
+    bundle = (buffer.getvalue(), f"{ticker}_analysis_reports.zip")
 
-    # Save the PDF
-    pdf_output = f"{prediction['ticker']}_analysis_report.pdf"
-    pdf.output(pdf_output)
-    return pdf_output
+    _bundle_cache.set(key, bundle)
+    return bundle
@@ -0,0 +1,100 @@
+# utils/resample.py
+import re
+import pandas as pd
+
+# How each OHLCV column combines when bars are merged into a coarser bar
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+    "Dividends": "sum",
+    "Stock Splits": "max",
+}
+
+
+def period_to_offset(period):
+    """Convert a yfinance period string (7d, 1mo, 5y) to a DateOffset"""
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return pd.DateOffset(days=count)
+    if unit == "wk":
+        return pd.DateOffset(weeks=count)
+    if unit == "mo":
+        return pd.DateOffset(months=count)
+    return pd.DateOffset(years=count)
+
+
+def interval_to_timedelta(interval):
+    """Convert a yfinance interval string (5m, 60m, 1h, 1d, 1wk) to a Timedelta"""
+    match = re.fullmatch(r"(\d+)(m|h|d|wk)", interval)
+    if not match:
+        raise ValueError(f"Unsupported interval: {interval}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "m":
+        return pd.Timedelta(minutes=count)
+    if unit == "h":
+        return pd.Timedelta(hours=count)
+    if unit == "d":
+        return pd.Timedelta(days=count)
+    return pd.Timedelta(weeks=count)
+
+
+def is_intraday_interval(interval):
+    """Whether `interval` is shorter than a day (5m, 15m, 60m, 1h)"""
+    return interval_to_timedelta(interval) < pd.Timedelta(days=1)
+
+
+def can_resample(source_interval, target_interval):
+    """Whether bars at `target_interval` can be built from `source_interval` bars"""
+    source = interval_to_timedelta(source_interval)
+    target = interval_to_timedelta(target_interval)
+    return target >= source and target % source == pd.Timedelta(0)
+
+
+def trim_to_period(df, period):
+    """Keep the bars within `period` of the last bar (what the deprecated `df.last` did)"""
+    if df.empty:
+        return df
+    start = df.index[-1] - period_to_offset(period)
+    return df.iloc[df.index.searchsorted(start, side="right"):]
+
+
+def session_open(index):
+    """Earliest time of day in `index`, i.e. the session open of a window with a full session"""
+    return (index - index.normalize()).min()
+
+
+def resample_bars(df, interval, source_interval=None, open_time=None):
+    """Build coarser OHLCV bars at `interval` from a finer series
+
+    Intraday bins are anchored to the session open, so 60m bars start at
+    09:30 like Yahoo's do wherever the window starts. The open is the
+    earliest time of day in `df` unless `open_time` (a Timedelta since
+    midnight) is given, which a slice starting mid-session needs. Daily
+    bars are grouped by calendar day in the index's timezone. Bins with no
+    source bars (nights, weekends, holidays) are dropped rather than filled.
+    """
+    source_interval = source_interval or df.attrs.get("interval")
+    if source_interval is not None and not can_resample(source_interval, interval):
+        raise ValueError(f"Cannot build {interval} bars from {source_interval} bars")
+    if df.empty or source_interval == interval:
+        result = df.copy()
+        result.attrs["interval"] = interval
+        return result
+
+    rule = interval_to_timedelta(interval)
+    aggregations = {column: how for column, how in AGGREGATIONS.items() if column in df}
+    if rule < pd.Timedelta(days=1):
+        offset = (open_time if open_time is not None else session_open(df.index)) % rule
+        resampled = df.resample(rule, offset=offset, origin="start_day").agg(aggregations)
+    else:
+        resampled = df.resample(rule).agg(aggregations)
+
+    resampled = resampled[resampled["Open"].notna()] if "Open" in resampled else resampled.dropna(how="all")
+    resampled.attrs = {**df.attrs, "interval": interval}
+    return resampled
@@ -0,0 +1,231 @@
+# utils/screener.py
+import os
+import re
+import numpy as np
+import pandas as pd
+from utils.batch import fetch_batch
+from utils.data_fetcher import get_interval_and_period
+from utils.files import atomic_path
+from utils.profiling import annotate, timed
+from utils.resample import is_intraday_interval
+from utils.vector_indicators import DAILY_COLUMNS, INTRADAY_COLUMNS, compute_indicator_matrix, stack_closes
+
+DEFAULT_SCREENER_DIR = os.path.join(".cache", "screener")
+
+# Simple-average indicators (MA50, RSI, bands) only need the last bars, so
+# daily rows are computed from this tail; EMAs depend on the whole history
+WINDOW_BARS = 64
+
+
+def oversold(level=30):
+    """RSI at or below `level`"""
+    return lambda table: table["RSI"] <= level
+
+
+def overbought(level=70):
+    """RSI at or above `level`"""
+    return lambda table: table["RSI"] >= level
+
+
+def below_lower_band():
+    """Last close under the lower Bollinger band"""
+    return lambda table: table["Close"] < table["Lower Band"]
+
+
+def above_upper_band():
+    """Last close over the upper Bollinger band"""
+    return lambda table: table["Close"] > table["Upper Band"]
+
+
+def golden_cross():
+    """Fast average (MA20, or EMA12 intraday) crossed above the slow one on the last bar"""
+    return lambda table: table["Cross"] > 0
+
+
+def death_cross():
+    """Fast average crossed below the slow one on the last bar"""
+    return lambda table: table["Cross"] < 0
+
+
+# Named screens for the CLI: (filter, column to rank by, ascending)
+SCREENS = {
+    "oversold": (oversold(), "RSI", True),
+    "overbought": (overbought(), "RSI", False),
+    "below-lower-band": (below_lower_band(), "%B", True),
+    "above-upper-band": (above_upper_band(), "%B", False),
+    "golden-cross": (golden_cross(), "Spread", False),
+    "death-cross": (death_cross(), "Spread", True),
+}
+
+
+class Screener:
+    """Latest indicator values for every ticker in a universe, one row per ticker
+
+    `update` recomputes only the tickers whose last bar changed, in one
+    stacked `vector_indicators` pass with the same columns as
+    `calculate_technical_indicators`, and `query` filters and ranks the
+    table without touching any bars. Rows of tickers whose last refresh
+    failed are flagged `Stale` and left out of queries until they refresh
+    again. With a `root` directory the table is kept in a Parquet file per
+    period, so it survives restarts.
+    """
+
+    def __init__(self, period="1y", root=None):
+        self.period = period
+        self.interval, _ = get_interval_and_period(period)
+        self.intraday = is_intraday_interval(self.interval)
+        self.indicators = INTRADAY_COLUMNS if self.intraday else DAILY_COLUMNS
+        self.fast, self.slow = ("EMA12", "EMA26") if self.intraday else ("MA20", "MA50")
+        self.root = root
+        self.table = self.load() if root else None
+        if self.table is None:
+            self.table = self._empty()
+
+    def _empty(self):
+        columns = ["Timestamp", "Close", "Change", "Volume", *self.indicators, "%B", "Spread", "Cross"]
+        table = pd.DataFrame({column: pd.Series(dtype=float) for column in columns})
+        table["Timestamp"] = pd.Series(dtype="datetime64[ns, UTC]")
+        table["Stale"] = pd.Series(dtype=bool)
+        table.index.name = "Ticker"
+        return table
+
+    @property
+    def path(self):
+        return os.path.join(self.root, f"{re.sub(r'[^A-Za-z0-9]', '_', self.period)}.parquet")
+
+    def load(self):
+        """Return the stored table, or None if there is none (or it is unreadable)"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            table = pd.read_parquet(self.path)
+        except Exception:
+            return None
+        if "Stale" not in table:
+            table["Stale"] = False  # Stored before rows were flagged
+        return table
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with atomic_path(self.path) as tmp_path:
+            self.table.to_parquet(tmp_path)
+
+    def __len__(self):
+        return len(self.table)
+
+    @staticmethod
+    def _last_bar(df):
+        last = pd.Timestamp(df.index[-1])
+        last = last.tz_convert("UTC") if last.tz is not None else last.tz_localize("UTC")
+        return last, float(df["Close"].iat[-1])
+
+    def _set_stale(self, tickers, stale):
+        tickers = self.table.index.intersection([t.upper() for t in tickers])
+        if len(tickers) and (self.table.loc[tickers, "Stale"] != stale).any():
+            self.table.loc[tickers, "Stale"] = stale
+            return True
+        return False
+
+    @timed("screener_update")
+    def update(self, frames):
+        """Refresh the rows for `frames` (ticker -> OHLCV frame); returns the tickers recomputed
+
+        Tickers whose last bar and close are unchanged are skipped, so a
+        periodic refresh over a large universe only pays for what moved.
+        """
+        stored = dict(zip(self.table.index, zip(self.table["Timestamp"], self.table["Close"])))
+        unstaled = self._set_stale(frames, False)  # Fetched again, even if unchanged
+        changed = {}
+        for ticker, df in frames.items():
+            ticker = ticker.upper()
+            if len(df) >= 2 and stored.get(ticker) != self._last_bar(df):
+                changed[ticker] = df if self.intraday else df.tail(WINDOW_BARS)
+        annotate(tickers=len(frames), recomputed=len(changed))
+        if not changed:
+            if unstaled and self.root:
+                self.save()
+            return []
+
+        tickers, close = stack_closes(changed)
+        matrix = compute_indicator_matrix(close, intraday=self.intraday)
+        rows = {
+            "Timestamp": [pd.Timestamp(df.index[-1]) for df in changed.values()],
+            "Close": close[:, -1],
+            "Change": close[:, -1] / close[:, -2] - 1,
+            "Volume": [float(df["Volume"].iat[-1]) if "Volume" in df else np.nan for df in changed.values()],
+        }
+        for name in self.indicators:
+            rows[name] = matrix[name][:, -1]
+        band_width = rows["Upper Band"] - rows["Lower Band"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rows["%B"] = (rows["Close"] - rows["Lower Band"]) / band_width
+            rows["Spread"] = rows[self.fast] / rows[self.slow] - 1
+        # +1 when the fast average moved above the slow one on the last bar, -1 below
+        above = matrix[self.fast][:, -2:] > matrix[self.slow][:, -2:]
+        comparable = ~np.isnan(matrix[self.fast][:, -2:] - matrix[self.slow][:, -2:]).any(axis=1)
+        rows["Cross"] = np.where(comparable, above[:, 1].astype(int) - above[:, 0].astype(int), 0)
+
+        fresh = pd.DataFrame(rows, index=pd.Index(tickers, name="Ticker"))
+        fresh["Timestamp"] = pd.to_datetime(fresh["Timestamp"], utc=True)
+        fresh["Stale"] = False
+        kept = self.table.drop(index=fresh.index, errors="ignore")
+        self.table = pd.concat([kept, fresh]) if len(kept) else fresh
+        if self.root:
+            self.save()
+        return tickers
+
+    def refresh(self, tickers, **fetch_options):
+        """Fetch `tickers` through the bar cache and update their rows; returns `(updated, errors)`
+
+        Rows of tickers that fail to fetch are flagged stale rather than kept as current.
+        """
+        frames, errors = fetch_batch(tickers, self.period, **fetch_options)
+        updated = self.update(frames)
+        self.mark_stale(errors)
+        return updated, errors
+
+    def mark_stale(self, tickers):
+        """Flag the rows of `tickers` as out of date, so queries skip them until they update"""
+        if self._set_stale(tickers, True) and self.root:
+            self.save()
+
+    def remove(self, tickers):
+        """Drop tickers that left the universe"""
+        self.table = self.table.drop(index=[t.upper() for t in tickers], errors="ignore")
+        if self.root:
+            self.save()
+
+    @timed("screener_query")
+    def query(self, *filters, rank_by=None, ascending=True, limit=None, tickers=None, include_stale=False):
+        """Rows matching every filter, ranked by `rank_by`, at most `limit` of them
+
+        A filter is a callable taking the table and returning a boolean
+        Series (see `oversold`, `below_lower_band`, `golden_cross`) or a
+        `DataFrame.eval` expression string such as "RSI < 35 and Change < 0".
+        `tickers` restricts the query to part of the stored universe, and
+        stale rows are left out unless `include_stale` is set.
+        """
+        table = self.table
+        if not include_stale:
+            table = table[~table["Stale"].astype(bool)]
+        if tickers is not None:
+            table = table[table.index.isin([t.upper() for t in tickers])]
+        mask = np.ones(len(table), dtype=bool)
+        for condition in filters:
+            result = table.eval(condition) if isinstance(condition, str) else condition(table)
+            mask &= np.asarray(result, dtype=bool)
+        matches = table[mask]
+        if rank_by is not None:
+            matches = matches.sort_values(rank_by, ascending=ascending, na_position="last")
+        annotate(rows=len(table), matches=len(matches))
+        return matches.head(limit) if limit is not None else matches
+
+    def screen(self, *names, limit=None, tickers=None):
+        """Run named `SCREENS` together (all must match), ranked by the first one"""
+        if not names:
+            raise ValueError("No screen given")
+        unknown = [name for name in names if name not in SCREENS]
+        if unknown:
+            raise ValueError(f"Unknown screen(s): {', '.join(unknown)}; choose from {', '.join(SCREENS)}")
+        _, rank_by, ascending = SCREENS[names[0]]
+        return self.query(*(SCREENS[name][0] for name in names), rank_by=rank_by, ascending=ascending, limit=limit, tickers=tickers)
@@ -0,0 +1,251 @@
+# utils/shared_cache.py
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+import pandas as pd
+from utils.bars import Bars
+from utils.lru import LRUCache
+from utils.profiling import annotate
+from utils.sqlite_store import connect, create_lru_table, evict, make_parent_dirs
+
+DEFAULT_SHARED_PATH = os.path.join(".cache", "shared.sqlite3")
+
+_MISSING = object()
+
+
+def _sizeof(value):
+    """Rough in-memory size of a cached value, for the byte budget"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, Bars):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_sizeof(item) for item in value)
+    return 64
+
+
+def _storage_key(key):
+    """Stable text form of a tuple key for the cross-process backend"""
+    return hashlib.sha256(json.dumps(key, default=str).encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key so only the first one runs
+
+    Callers that arrive while a call is running wait for it and get its
+    result (or its exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            annotate(single_flight="waited")
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class SQLiteBackend:
+    """Cross-process store for `SharedCache` in a local SQLite file
+
+    Values are pickled, so the file must only be shared between processes
+    of this app. Leases let one process compute a key while the others poll
+    for its result.
+    """
+
+    def __init__(self, path=DEFAULT_SHARED_PATH, max_entries=2000, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        make_parent_dirs(path)
+        with connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+            create_lru_table(conn, "entries", "BLOB")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " key TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """Return `(value, expires_at)` for `key`, or None on a miss or expired entry"""
+        now = time.time()
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        try:
+            return pickle.loads(row[0]), row[1]
+        except (OSError, ValueError):
+            return None  # Refers to a file that is gone, e.g. pruned mapped bars
+
+    def set(self, key, value, expires_at):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, now),
+            )
+            evict(conn, "entries", now, self.max_entries, self.max_bytes)
+
+    def acquire(self, key, owner, lease_seconds):
+        """Take the compute lease for `key`; False if another live process holds it"""
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + lease_seconds),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key, owner):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def clear(self):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM leases")
+
+
+class SharedCache:
+    """Process-wide cache tier shared by every Streamlit session
+
+    A bounded in-process LRU with per-entry TTLs, single-flight computation
+    so concurrent sessions asking for the same key wait for one result, and
+    an optional cross-process `SQLiteBackend` (with compute leases) for
+    multi-worker deployments. Cached values are shared between sessions and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=256 * 1024 * 1024, backend=None, lease_seconds=120, poll_interval=0.05):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self._local = LRUCache(max_entries, max_bytes, sizeof=_sizeof)
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._owner = uuid.uuid4().hex
+
+    def get(self, key, default=None):
+        """Cached value for `key` from memory or the backend, else `default`"""
+        value = self._local.get(key, _MISSING)
+        if value is _MISSING and self.backend is not None:
+            stored = self.backend.get(_storage_key(key))
+            if stored is not None:
+                value, expires_at = stored
+                self._local.set(key, value, expires_at)
+        return default if value is _MISSING else value
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl
+        self._local.set(key, value, expires_at)
+        if self.backend is not None:
+            self.backend.set(_storage_key(key), value, expires_at)
+
+    def get_or_compute(self, key, compute, ttl):
+        """Return the cached value for `key`, computing it at most once across sessions
+
+        `key` is a tuple whose first item names the stage (e.g. "bars").
+        Exceptions from `compute` reach every waiting caller and are not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            annotate(shared_cache="hit")
+            return value
+        with self._lock:
+            self.misses += 1
+        annotate(shared_cache="miss")
+        return self._flights.do(key, lambda: self._compute(key, compute, ttl))
+
+    def _compute(self, key, compute, ttl):
+        # Another session may have finished this key between our miss and taking the flight
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.backend is None:
+            value = compute()
+            self.set(key, value, ttl)
+            return value
+
+        storage_key = _storage_key(key)
+        while not self.backend.acquire(storage_key, self._owner, self.lease_seconds):
+            # Another process is computing it; wait for its result, or take over
+            # once its lease is released without one or lapses (crashed worker)
+            time.sleep(self.poll_interval)
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                annotate(shared_cache="waited")
+                return value
+        try:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = compute()
+                self.set(key, value, ttl)
+            return value
+        finally:
+            self.backend.release(storage_key, self._owner)
+
+    def clear(self):
+        self._local.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = {"hits": self.hits, "misses": self.misses}
+        return {**counts, **self._local.stats()}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide shared tier
+
+    Setting `CMA_SHARED_CACHE_PATH` adds a SQLite backend at that path so
+    several server processes share results too.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = os.environ.get("CMA_SHARED_CACHE_PATH")
+            _default_cache = SharedCache(backend=SQLiteBackend(path) if path else None)
+    return _default_cache
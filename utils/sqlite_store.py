@@ -0,0 +1,47 @@
+# utils/sqlite_store.py
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+def make_parent_dirs(path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+@contextmanager
+def connect(path):
+    """Connection to the SQLite file at `path` that commits on success and always closes"""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:  # Commits on success, rolls back on error
+            yield conn
+    finally:
+        conn.close()
+
+
+def create_lru_table(conn, table, value_type):
+    """Table of `key`, `value`, `size`, `expires_at` and `last_access` rows, indexed for eviction"""
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {table} ("
+        " key TEXT PRIMARY KEY,"
+        f" value {value_type} NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " expires_at REAL NOT NULL,"
+        " last_access REAL NOT NULL)"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+
+
+def evict(conn, table, now, max_entries, max_bytes):
+    """Drop expired rows of `table`, then the least recently used until both limits hold"""
+    conn.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (now,))
+    count, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+    if count <= max_entries and total <= max_bytes:
+        return
+    for key, size in conn.execute(f"SELECT key, size FROM {table} ORDER BY last_access").fetchall():
+        if count <= max_entries and total <= max_bytes:
+            break
+        conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+        count -= 1
+        total -= size
@@ -0,0 +1,41 @@
+# utils/startup.py
+import importlib
+import threading
+
+# Third-party modules the utils import only on first use, slowest first
+HEAVY_MODULES = (
+    "yfinance",
+    "matplotlib.figure",
+    "mplfinance",
+    "openai",
+    "PIL.Image",
+    "fpdf.fonts",
+)
+
+_preload_thread = None
+_preload_lock = threading.Lock()
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass  # The code path that needs it reports the failure when used
+
+
+def preload_heavy_modules(modules=HEAVY_MODULES, wait=False):
+    """Import `modules` on a background thread, once per process
+
+    The page renders without paying for them, and by the time the first
+    request needs a chart or a download they are usually already loaded.
+    Returns the thread; `wait=True` blocks until it is done.
+    """
+    global _preload_thread
+    with _preload_lock:
+        if _preload_thread is None:
+            _preload_thread = threading.Thread(target=_import_all, args=(modules,), name="preload", daemon=True)
+            _preload_thread.start()
+    if wait:
+        _preload_thread.join()
+    return _preload_thread
@@ -0,0 +1,240 @@
+# utils/streaming_indicators.py
+import math
+import numbers
+from collections import deque
+
+NAN = float("nan")
+
+
+def _close_of(bar):
+    """Accept either a bare close price or a bar mapping/Series with a Close field"""
+    if isinstance(bar, numbers.Real):
+        return float(bar)
+    return float(bar["Close"])
+
+
+class RollingWindow:
+    """Fixed-size ring buffer with O(1) running mean and sample variance
+
+    The sum is Kahan-compensated and the variance uses Welford add/remove
+    updates, the same online formulations pandas uses for rolling mean/std,
+    so results agree with `rolling(window)` to floating-point noise. Windows
+    containing a NaN report NaN, like pandas with min_periods=window.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nan_count = 0
+        self.nobs = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.mean_x = 0.0
+        self.ssqdm = 0.0
+        self.last_value = NAN
+        self.same_run = 0
+
+    def _add(self, value):
+        self.nobs += 1
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+        delta = value - self.mean_x
+        self.mean_x += delta / self.nobs
+        self.ssqdm += ((self.nobs - 1) * delta * delta) / self.nobs
+
+    def _remove(self, value):
+        self.nobs -= 1
+        y = -value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+        if self.nobs:
+            delta = value - self.mean_x
+            self.mean_x -= delta / self.nobs
+            self.ssqdm -= ((self.nobs + 1) * delta * delta) / self.nobs
+        else:
+            self.mean_x = self.ssqdm = 0.0
+
+    def push(self, value):
+        # Track runs of identical values so a flat window reports exactly zero spread
+        self.same_run = self.same_run + 1 if value == self.last_value else 1
+        self.last_value = value
+        self.values.append(value)
+        if math.isnan(value):
+            self.nan_count += 1
+        else:
+            self._add(value)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if math.isnan(old):
+                self.nan_count -= 1
+            else:
+                self._remove(old)
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window and self.nan_count == 0
+
+    @property
+    def mean(self):
+        return self.total / self.window if self.ready else NAN
+
+    @property
+    def sum(self):
+        return self.total if self.ready else NAN
+
+    @property
+    def std(self):
+        if not self.ready or self.window < 2:
+            return NAN
+        if self.same_run >= self.window:
+            return 0.0
+        return math.sqrt(max(self.ssqdm, 0.0) / (self.window - 1))
+
+
+class SMA:
+    """Simple moving average, equal to Close.rolling(window).mean()"""
+
+    def __init__(self, window):
+        self.buffer = RollingWindow(window)
+        self.value = NAN
+
+    def update(self, bar):
+        self.buffer.push(_close_of(bar))
+        self.value = self.buffer.mean
+        return self.value
+
+
+class EMA:
+    """Exponential moving average, equal to Close.ewm(span, adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.old_wt = 1.0
+        self.value = NAN
+
+    def update(self, bar):
+        close = _close_of(bar)
+        if math.isnan(self.value):
+            if not math.isnan(close):
+                self.value = close
+            return self.value
+        # Same weighting as pandas' online ewm, so a missing bar still decays the old weight
+        self.old_wt *= 1 - self.alpha
+        if not math.isnan(close):
+            if self.value != close:
+                self.value = (self.old_wt * self.value + self.alpha * close) / (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+        return self.value
+
+
+class RSI:
+    """Relative Strength Index over `period` bars
+
+    `method="simple"` uses rolling means of gains and losses exactly as
+    `calculate_technical_indicators` does. `method="wilder"` seeds with the
+    same simple average and then applies Wilder's smoothing.
+    """
+
+    def __init__(self, period=14, method="simple"):
+        if method not in ("simple", "wilder"):
+            raise ValueError(f"Unknown RSI method: {method}")
+        self.period = period
+        self.method = method
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.avg_gain = NAN
+        self.avg_loss = NAN
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, bar):
+        close = _close_of(bar)
+        delta = close - self.prev_close
+        self.prev_close = close
+        # NaN deltas (first bar, missing bars) count as zero, like delta.where(...) in pandas
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.gains.push(gain)
+        self.losses.push(loss)
+
+        if self.method == "wilder" and not math.isnan(self.avg_gain):
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        else:
+            self.avg_gain = self.gains.mean
+            self.avg_loss = self.losses.mean
+
+        if math.isnan(self.avg_gain) or math.isnan(self.avg_loss):
+            self.value = NAN
+        elif self.avg_loss == 0:
+            self.value = NAN if self.avg_gain == 0 else 100.0
+        else:
+            self.value = 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+        return self.value
+
+
+class BollingerBands:
+    """Middle band, standard deviation and upper/lower bands over `window` bars"""
+
+    def __init__(self, window=20, num_std=2):
+        self.buffer = RollingWindow(window)
+        self.num_std = num_std
+        self.middle = self.std = self.upper = self.lower = NAN
+
+    def update(self, bar):
+        self.buffer.push(_close_of(bar))
+        self.middle = self.buffer.mean
+        self.std = self.buffer.std
+        self.upper = self.middle + self.num_std * self.std
+        self.lower = self.middle - self.num_std * self.std
+        return self.middle, self.std, self.upper, self.lower
+
+
+class IndicatorState:
+    """All indicators of `calculate_technical_indicators`, updated one bar at a time
+
+    Each `update` costs O(1) regardless of how much history has been seen and
+    returns a dict with the same columns the batch function adds: EMA12/EMA26
+    for intraday bars or MA20/MA50 for daily bars, then RSI and the
+    Bollinger columns. The 20-bar window is shared by MA20 and the bands.
+    """
+
+    def __init__(self, intraday=False, rsi_method="simple"):
+        self.intraday = intraday
+        self.bands = BollingerBands(20)
+        self.rsi = RSI(14, method=rsi_method)
+        if intraday:
+            self.ema12 = EMA(12)
+            self.ema26 = EMA(26)
+        else:
+            self.ma50 = SMA(50)
+        self.bars_seen = 0
+
+    @classmethod
+    def from_frame(cls, df, intraday=False, rsi_method="simple"):
+        """Warm up a state from an existing OHLCV frame (one pass over its closes)"""
+        state = cls(intraday=intraday, rsi_method=rsi_method)
+        for close in df["Close"].to_numpy(dtype=float):
+            state.update(close)
+        return state
+
+    def update(self, bar):
+        close = _close_of(bar)
+        self.bars_seen += 1
+        middle, std, upper, lower = self.bands.update(close)
+        row = {}
+        if self.intraday:
+            row["EMA12"] = self.ema12.update(close)
+            row["EMA26"] = self.ema26.update(close)
+        else:
+            row["MA20"] = middle
+            row["MA50"] = self.ma50.update(close)
+        row["RSI"] = self.rsi.update(close)
+        row["Middle Band"] = middle
+        row["Std Dev"] = std
+        row["Upper Band"] = upper
+        row["Lower Band"] = lower
+        return row
@@ -0,0 +1,129 @@
+# utils/vector_indicators.py
+import numpy as np
+import pandas as pd
+
+# Column names match calculate_technical_indicators so results are interchangeable
+INTRADAY_COLUMNS = ["EMA12", "EMA26", "RSI", "Middle Band", "Std Dev", "Upper Band", "Lower Band"]
+DAILY_COLUMNS = ["MA20", "MA50", "RSI", "Middle Band", "Std Dev", "Upper Band", "Lower Band"]
+
+
+def _window_sums(values, valid_count, window):
+    """Trailing window sums along axis 1 from one cumulative sum
+
+    Windows that contain a NaN (including the left padding of shorter
+    histories) come back as NaN, matching pandas' rolling(min_periods=window).
+    """
+    csum = np.cumsum(values, axis=1, dtype=np.float64)
+    sums = csum.copy()
+    sums[:, window:] -= csum[:, :-window]
+    counts = valid_count.copy()
+    counts[:, window:] -= valid_count[:, :-window]
+    sums[counts < window] = np.nan
+    if window > 1:
+        sums[:, :window - 1] = np.nan
+    return sums
+
+
+def _ewm(close, span):
+    """Exponential mean across all rows at once, mirroring pandas ewm(span, adjust=False)"""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(close, dtype=np.float64)
+    if close.shape[1] == 0:
+        return out
+    weighted = close[:, 0].astype(np.float64)
+    old_wt = np.ones(close.shape[0])
+    out[:, 0] = weighted
+    for i in range(1, close.shape[1]):
+        cur = close[:, i]
+        observed = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+        # Rows with history decay their old weight even on a missing bar (ignore_na=False)
+        old_wt = np.where(started, old_wt * (1 - alpha), old_wt)
+        update = started & observed
+        blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(update, 1.0, old_wt)
+        # Rows still waiting for their first observation start at the raw value
+        weighted = np.where(~started & observed, cur, weighted)
+        out[:, i] = weighted
+    return out
+
+
+def compute_indicator_matrix(close, intraday=False, dtype=np.float64):
+    """Compute indicators for a stacked (n_tickers x n_bars) close matrix
+
+    Returns a dict of column name -> 2-D array with the same semantics as
+    `calculate_technical_indicators`. Shorter histories should be left-padded
+    with NaN (see `stack_closes`). Window sums come from one cumulative sum per
+    input and the 20-bar sums are shared by MA20, the Bollinger middle band and
+    the standard deviation. Accumulation is always float64; `dtype` sets the
+    output precision, e.g. np.float32 to halve memory on large universes.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    nan_mask = np.isnan(close)
+    valid = np.cumsum(~nan_mask, axis=1)
+    out = {}
+
+    # Variance is shift-invariant, so centre each row first to keep sum-of-squares cancellation small
+    with np.errstate(invalid="ignore"):
+        totals = np.where(nan_mask, 0.0, close).sum(axis=1, keepdims=True)
+        centre = np.nan_to_num(totals / valid[:, -1:]) if close.shape[1] else np.zeros((close.shape[0], 1))
+    filled = np.where(nan_mask, 0.0, close - centre)
+
+    sum20 = _window_sums(filled, valid, 20)
+    sumsq20 = _window_sums(filled * filled, valid, 20)
+    mean20 = sum20 / 20 + centre
+    var20 = np.maximum((sumsq20 - sum20 * sum20 / 20) / 19, 0.0)
+    std20 = np.sqrt(var20)
+
+    if intraday:
+        out["EMA12"] = _ewm(close, 12)
+        out["EMA26"] = _ewm(close, 26)
+    else:
+        out["MA20"] = mean20
+        out["MA50"] = _window_sums(filled, valid, 50) / 50 + centre
+
+    # RSI with simple 14-bar averages; like pandas' delta.where, a NaN delta counts as zero
+    delta = np.full_like(close, np.nan)
+    delta[:, 1:] = close[:, 1:] - close[:, :-1]
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    # Only the left padding is excluded; bars inside a ticker's history always count
+    in_history = np.cumsum(valid > 0, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = _window_sums(gains, in_history, 14) / _window_sums(losses, in_history, 14)
+        out["RSI"] = 100 - (100 / (1 + rs))
+
+    out["Middle Band"] = mean20
+    out["Std Dev"] = std20
+    out["Upper Band"] = mean20 + 2 * std20
+    out["Lower Band"] = mean20 - 2 * std20
+
+    return {name: values.astype(dtype, copy=False) for name, values in out.items()}
+
+
+def stack_closes(frames, dtype=np.float64):
+    """Stack the Close column of each frame into a right-aligned (n_tickers x n_bars) matrix"""
+    tickers = list(frames)
+    n_bars = max((len(frames[t]) for t in tickers), default=0)
+    close = np.full((len(tickers), n_bars), np.nan, dtype=dtype)
+    for row, ticker in enumerate(tickers):
+        values = pd.to_numeric(frames[ticker]["Close"]).to_numpy(dtype=dtype)
+        if len(values):
+            close[row, -len(values):] = values
+    return tickers, close
+
+
+def indicator_frames(frames, intraday=False, dtype=np.float64):
+    """Indicator columns for a dict of OHLCV frames, computed in one stacked pass"""
+    tickers, close = stack_closes(frames)
+    matrix = compute_indicator_matrix(close, intraday=intraday, dtype=dtype)
+    columns = INTRADAY_COLUMNS if intraday else DAILY_COLUMNS
+    result = {}
+    for row, ticker in enumerate(tickers):
+        n = len(frames[ticker])
+        result[ticker] = pd.DataFrame(
+            {name: matrix[name][row, close.shape[1] - n:] for name in columns},
+            index=frames[ticker].index,
+        )
+    return result
@@ -1,104 +1,217 @@
 # utils/visualization.py
-import matplotlib.pyplot as plt
-import mplfinance as mpf
-import tempfile
-import streamlit as st
+import io
+from concurrent.futures import ProcessPoolExecutor
+from utils import notify
+from utils.data_fetcher import get_interval_and_period
+from utils.profiling import annotate, timed
+from utils.resample import interval_to_timedelta
+from utils.shared_cache import get_default_cache as get_shared_cache
 
-def plot_predictions(stock_data, prediction, period):
-    """Create visualization of stock data and predictions using candlestick chart"""
+SCREEN_DPI = 100
+PRINT_DPI = 300
+CHART_BARS = 70  # Bars shown for every period
+
+
+def _to_bytes(fig, dpi, fmt):
+    buffer = io.BytesIO()
+    if fmt != "png":
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+    # Charts are opaque, so write RGB instead of matplotlib's RGBA PNGs; PDF
+    # reports embed RGB PNG data without decoding it
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image
+    canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+    sizes = []
+    connection = canvas.mpl_connect("draw_event", lambda event: sizes.append(event.renderer.get_canvas_width_height()))
     try:
-        # Get data for the selected period
-        if period == "1d":
-            data = stock_data.tail(70)  # 24 hours for 1 day
-        elif period == "5d":
-            data = stock_data.tail(70)  # 24 hours * 5 days = 120 hours
-        elif period == "1mo":
-            data = stock_data.tail(70)
-        elif period == "6mo":
-            data = stock_data.tail(70)
-        elif period == "1y":
-            data = stock_data.tail(70)
-        elif period == "5y":
-            data = stock_data.tail(70)
+        fig.savefig(buffer, format="rgba", dpi=dpi, bbox_inches="tight")
+    finally:
+        canvas.mpl_disconnect(connection)
+    pixels = buffer.getvalue()
+    width = int(sizes[-1][0])
+    image = Image.frombuffer("RGBA", (width, len(pixels) // (4 * width)), pixels, "raw", "RGBA", 0, 1)
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="png", dpi=(dpi, dpi))
+    return output.getvalue()
+
+
+def _draw_candles(price_ax, volume_ax, data, title):
+    import mplfinance as mpf
+    mpf.plot(
+        data,
+        ax=price_ax,
+        volume=volume_ax,
+        type="candle",
+        style="yahoo",
+        axtitle=title,
+        ylabel="Price ($)",  # Updated to $ for US stocks
+        mav=(20, 50),  # Add 20-hour and 50-hour moving averages
+        show_nontrading=False,
+    )
+
+
+def _candlestick_axes():
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(14, 8))
+    grid = fig.add_gridspec(4, 1, hspace=0.05)
+    price_ax = fig.add_subplot(grid[0:3, 0])
+    volume_ax = fig.add_subplot(grid[3, 0], sharex=price_ax)
+    return fig, price_ax, volume_ax
+
+
+def build_candlestick_figure(data, title):
+    """Candlestick chart with volume and 20/50-bar moving averages on a standalone Figure"""
+    # An explicit Figure keeps rendering off pyplot's global state, so it is thread-safe
+    fig, price_ax, volume_ax = _candlestick_axes()
+    _draw_candles(price_ax, volume_ax, data, title)
+    return fig
+
+
+def _fill_rsi_zones(ax, data):
+    return [
+        ax.fill_between(data.index, data["RSI"], 70, where=(data["RSI"] >= 70), color="red", alpha=0.2),
+        ax.fill_between(data.index, data["RSI"], 30, where=(data["RSI"] <= 30), color="green", alpha=0.2),
+    ]
+
+
+def _rsi_axes(data):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(14, 4))
+    ax = fig.add_subplot()
+    line, = ax.plot(data.index, data["RSI"], label="RSI", color="purple", linewidth=2)
+
+    # Add RSI zones with better visibility
+    ax.axhline(y=70, color="red", linestyle="--", alpha=0.5, label="Overbought (70)")
+    ax.axhline(y=30, color="green", linestyle="--", alpha=0.5, label="Oversold (30)")
+    fills = _fill_rsi_zones(ax, data)
+
+    ax.set_title("RSI Indicator", fontsize=12, pad=20)
+    ax.set_ylabel("RSI", fontsize=10)
+    ax.set_xlabel("Date", fontsize=10)
+    ax.grid(True, alpha=0.3)
+    ax.tick_params(axis="x", rotation=45)
+
+    # Move RSI legend to the right
+    ax.legend(bbox_to_anchor=(1.05, 1), loc="upper left", borderaxespad=0.0, frameon=True, fontsize=10)
+    return fig, ax, line, fills
+
+
+def build_rsi_figure(data):
+    """RSI line with shaded overbought/oversold zones on a standalone Figure"""
+    fig, _, _, _ = _rsi_axes(data)
+    return fig
+
+
+class LiveChart:
+    """Candlestick and RSI figures kept across live updates and redrawn in place
+
+    The figures, axes, RSI guide lines and legend are built once; each
+    `render` only redraws the candles and swaps the RSI line data and zone
+    fills, then encodes both figures.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self._candles = None
+        self._rsi = None
+
+    def render(self, stock_data, dpi=SCREEN_DPI, fmt="png"):
+        data = stock_data.tail(CHART_BARS)
+        if self._candles is None:
+            self._candles = _candlestick_axes()
+            self._rsi = _rsi_axes(data)
         else:
-            data = stock_data.tail(70)  # Default to 30 days
-
-        # Create a candlestick chart
-        mpf.plot(
-            data,
-            type="candle",
-            style="yahoo",  # You can choose other styles like 'classic', 'yahoo', etc.
-            title=f"{prediction['ticker']} Stock Analysis - {prediction['prediction_date']}",
-            ylabel="Price ($)",  # Updated to $ for US stocks
-            volume=True,  # Add volume subplot
-            mav=(20, 50),  # Add 20-hour and 50-hour moving averages
-            figsize=(14, 8),
-            show_nontrading=False,
-            returnfig=False,
-        )
-
-        # Display the plot in Streamlit
-        st.pyplot(plt.gcf())
-
-        # Save the candlestick chart
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-            plt.savefig(tmpfile.name, bbox_inches="tight", dpi=300)
-            candlestick_img = tmpfile.name
-
-        # Create RSI plot with improved styling
-        plt.figure(figsize=(14, 4))
-        plt.plot(data.index, data["RSI"], label="RSI", color="purple", linewidth=2)
-
-        # Add RSI zones with better visibility
-        plt.axhline(
-            y=70, color="red", linestyle="--", alpha=0.5, label="Overbought (70)"
-        )
-        plt.axhline(
-            y=30, color="green", linestyle="--", alpha=0.5, label="Oversold (30)"
-        )
-
-        plt.fill_between(
-            data.index,
-            data["RSI"],
-            70,
-            where=(data["RSI"] >= 70),
-            color="red",
-            alpha=0.2,
-        )
-        plt.fill_between(
-            data.index,
-            data["RSI"],
-            30,
-            where=(data["RSI"] <= 30),
-            color="green",
-            alpha=0.2,
-        )
-
-        plt.title("RSI Indicator", fontsize=12, pad=20)
-        plt.ylabel("RSI", fontsize=10)
-        plt.xlabel("Date", fontsize=10)
-        plt.grid(True, alpha=0.3)
-        plt.tick_params(axis="x", rotation=45)
-
-        # Move RSI legend to the right
-        plt.legend(
-            bbox_to_anchor=(1.05, 1),
-            loc="upper left",
-            borderaxespad=0.0,
-            frameon=True,
-            fontsize=10,
-        )
-
-        # Display the RSI plot in Streamlit
-        st.pyplot(plt)
-
-        # Save the RSI chart
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-            plt.savefig(tmpfile.name, bbox_inches="tight", dpi=300)
-            rsi_img = tmpfile.name
+            _, ax, line, fills = self._rsi
+            line.set_data(data.index, data["RSI"])
+            for fill in fills:
+                fill.remove()
+            self._rsi = (self._rsi[0], ax, line, _fill_rsi_zones(ax, data))
+            ax.relim()
+            ax.autoscale_view()
+
+        fig, price_ax, volume_ax = self._candles
+        price_ax.clear()
+        volume_ax.clear()
+        _draw_candles(price_ax, volume_ax, data, self.title)
+        return _to_bytes(fig, dpi, fmt), _to_bytes(self._rsi[0], dpi, fmt)
+
+
+def _render(data, prediction, dpi, fmt):
+    title = f"{prediction['ticker']} Stock Analysis - {prediction['prediction_date']}"
+    images = (
+        _to_bytes(build_candlestick_figure(data, title), dpi, fmt),
+        _to_bytes(build_rsi_figure(data), dpi, fmt),
+    )
+    annotate(dpi=dpi, format=fmt, bytes=sum(len(image) for image in images))
+    return images
+
+
+def render_charts(stock_data, prediction, period, dpi=SCREEN_DPI, fmt="png", cache=None):
+    """Render the candlestick and RSI charts to image bytes, reusing cached images
+
+    Charts only depend on the last bars of `stock_data`, so finished images
+    are kept in the process-wide `SharedCache` (or `cache`) by ticker,
+    prediction date and price, last bar, period and output settings for one
+    bar of the period's interval.
+    Concurrent sessions wait for a single render. Pass `cache=False` to
+    always render.
+    """
+    data = stock_data.tail(CHART_BARS)
+    if cache is None:
+        cache = get_shared_cache()
+    if not cache:
+        return _render(data, prediction, dpi, fmt)
+
+    # The last close is part of the key because the last bar changes while it is still forming,
+    # and the prediction fields drawn on the charts are too
+    key = (
+        "charts",
+        prediction["ticker"],
+        prediction.get("prediction_date"),
+        prediction.get("predicted_price"),
+        data.index[-1],
+        float(data["Close"].iat[-1]),
+        period,
+        dpi,
+        fmt,
+    )
+    interval, _ = get_interval_and_period(period)
+    ttl = interval_to_timedelta(interval).total_seconds()
+    return cache.get_or_compute(key, lambda: _render(data, prediction, dpi, fmt), ttl)
+
+
+def _render_job(job):
+    stock_data, prediction, period, dpi, fmt = job
+    return render_charts(stock_data, prediction, period, dpi, fmt)
+
+
+def render_charts_batch(jobs, max_workers=None, dpi=SCREEN_DPI, fmt="png"):
+    """Render charts for many (stock_data, prediction, period) jobs in a process pool
+
+    Returns a list of (candlestick, rsi) image bytes in job order.
+    """
+    jobs = [(stock_data, prediction, period, dpi, fmt) for stock_data, prediction, period in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+@timed("plot_predictions")
+def plot_predictions(stock_data, prediction, period, dpi=SCREEN_DPI, fmt="png"):
+    """Create visualization of stock data and predictions using candlestick chart
+
+    Returns the candlestick and RSI charts as in-memory image bytes.
+    """
+    try:
+        candlestick_img, rsi_img = render_charts(stock_data, prediction, period, dpi, fmt)
+
+        # Display the plots in Streamlit
+        import streamlit as st
+        st.image(candlestick_img)
+        st.image(rsi_img)
 
     except Exception as e:
-        st.error(f"Error in plotting: {str(e)}")
+        notify.error(f"Error in plotting: {str(e)}")
         return None, None
 
     return candlestick_img, rsi_img